@@ -0,0 +1,184 @@
+# admission.py
+"""
+Admission control ของ endpoint หนัก (export Excel / PDF, ใบจอง PDF)
+
+แต่ละกลุ่ม (pool) มีความจุเป็นหน่วย (units) ต่อ worker:
+- request ใช้ units ตามจำนวนแถวที่คาดว่าจะ export (COUNT ก่อนเริ่มงาน)
+    units = ceil(rows / ADMISSION_<POOL>_ROWS_PER_UNIT) ไม่เกินความจุของ pool
+  → export ใหญ่มากรันได้ทีละงาน, export เล็กรันพร้อมกันได้หลายงาน
+- units ไม่พอ → เข้าคิวรอไม่เกิน ADMISSION_<POOL>_WAIT วินาที
+- คิวเต็ม (ADMISSION_<POOL>_QUEUE) / รอนานเกิน → 429 + Retry-After ทันที
+  แทนที่จะปล่อยให้ export หลายงานกิน RAM จน login / my_bookings ช้าไปด้วย
+- จำนวนแถวเกิน ADMISSION_<POOL>_MAX_ROWS (0 = ไม่จำกัด) → 400 ให้แคบช่วงวันที่ลง
+
+    @admit("export", estimate=lambda: count_rows())
+    def report_excel(): ...
+
+    with admission.slot("slip"):
+        pdf = render(...)
+
+response แบบ stream (Parquet) ถือ slot ไว้จน generator จบ → enter_context ใน ExitStack
+แล้วปิดตอน stream จบแทน @admit
+
+metrics: admission_in_use{pool}, admission_queue_depth{pool}, admission_rejected_total{pool,reason}
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import jsonify
+
+from metrics import registry
+
+in_use_gauge = registry.gauge("admission_in_use", "Admission units in use", ("pool",))
+queue_gauge = registry.gauge("admission_queue_depth", "Requests waiting for admission", ("pool",))
+rejected = registry.counter(
+    "admission_rejected_total", "Requests rejected by admission control", ("pool", "reason")
+)
+
+# pool → (ความจุ units, คิว, รอ (วินาที), แถวต่อ unit, แถวสูงสุด)
+DEFAULTS = {
+    "export": (4, 8, 10.0, 20000, 0),
+    "slip": (4, 16, 5.0, 1, 0),
+}
+
+
+class AdmissionRejected(RuntimeError):
+    """pool เต็ม — ตอบ 429 + Retry-After"""
+
+    def __init__(self, pool: str, reason: str, retry_after: int):
+        super().__init__(f"{pool} admission rejected ({reason})")
+        self.pool = pool
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ExportTooLarge(ValueError):
+    def __init__(self, rows: int, max_rows: int):
+        super().__init__(f"export has {rows} rows, the limit is {max_rows}; narrow the date range")
+        self.rows = rows
+        self.max_rows = max_rows
+
+
+class Pool:
+    """semaphore แบบมีน้ำหนัก + คิวรอจำกัดขนาด"""
+
+    def __init__(self, name, capacity, max_queue, wait, rows_per_unit, max_rows):
+        self.name = name
+        self.capacity = max(int(capacity), 1)
+        self.max_queue = max(int(max_queue), 0)
+        self.wait = float(wait)
+        self.rows_per_unit = max(int(rows_per_unit), 1)
+        self.max_rows = int(max_rows)
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._waiting = 0
+
+    def units_for(self, rows) -> int:
+        if rows is None:
+            return 1
+        if self.max_rows and rows > self.max_rows:
+            raise ExportTooLarge(rows, self.max_rows)
+        return min(max(math.ceil(rows / self.rows_per_unit), 1), self.capacity)
+
+    def _reject(self, reason):
+        rejected.inc(pool=self.name, reason=reason)
+        raise AdmissionRejected(self.name, reason, max(int(math.ceil(self.wait)), 1))
+
+    def acquire(self, units: int):
+        with self._cond:
+            if self._in_use + units <= self.capacity and self._waiting == 0:
+                self._take(units)
+                return
+            if self._waiting >= self.max_queue:
+                self._reject("queue_full")
+
+            self._waiting += 1
+            queue_gauge.set(self._waiting, pool=self.name)
+            deadline = time.monotonic() + self.wait
+            try:
+                while self._in_use + units > self.capacity:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject("timeout")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+                queue_gauge.set(self._waiting, pool=self.name)
+            self._take(units)
+
+    def _take(self, units):
+        self._in_use += units
+        in_use_gauge.set(self._in_use, pool=self.name)
+
+    def release(self, units: int):
+        with self._cond:
+            self._in_use -= units
+            in_use_gauge.set(self._in_use, pool=self.name)
+            self._cond.notify_all()
+
+
+class AdmissionController:
+    def __init__(self):
+        self.pools = {}
+
+    def init_app(self, app):
+        cfg = app.config
+        for name, (capacity, queue, wait, rows_per_unit, max_rows) in DEFAULTS.items():
+            prefix = f"ADMISSION_{name.upper()}_"
+            self.pools[name] = Pool(
+                name,
+                cfg.get(prefix + "UNITS", capacity),
+                cfg.get(prefix + "QUEUE", queue),
+                cfg.get(prefix + "WAIT", wait),
+                cfg.get(prefix + "ROWS_PER_UNIT", rows_per_unit),
+                cfg.get(prefix + "MAX_ROWS", max_rows),
+            )
+            in_use_gauge.set(0, pool=name)
+            queue_gauge.set(0, pool=name)
+
+    @contextmanager
+    def slot(self, pool_name: str, rows: int = None):
+        pool = self.pools.get(pool_name)
+        if pool is None:
+            # ยังไม่ได้ init (script / test ที่ไม่ได้สร้าง app) → ไม่จำกัด
+            yield
+            return
+        units = pool.units_for(rows)
+        pool.acquire(units)
+        try:
+            yield
+        finally:
+            pool.release(units)
+
+
+admission = AdmissionController()
+
+
+def admit(pool_name: str, estimate=None):
+    """
+    decorator ของ route หนัก — estimate() คืนจำนวนแถวที่คาดไว้ (None = 1 unit)
+    วางใต้ @replica_read → COUNT อ่านจาก replica ได้เหมือน query จริง
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                rows = estimate() if estimate is not None else None
+                with admission.slot(pool_name, rows):
+                    return fn(*args, **kwargs)
+            except ExportTooLarge as e:
+                return too_large_response(pool_name, e)
+
+        return wrapper
+
+    return decorator
+
+
+def too_large_response(pool_name: str, e: ExportTooLarge):
+    rejected.inc(pool=pool_name, reason="too_large")
+    return jsonify({"message": str(e), "rows": e.rows, "max_rows": e.max_rows}), 400
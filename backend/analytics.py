@@ -0,0 +1,251 @@
+# analytics.py
+"""
+สถิติเชิงวิเคราะห์ (turnaround / SLA, workload ของ messenger, ปริมาณงานต่อหน่วยงาน)
+
+ดึงเฉพาะคอลัมน์ที่ endpoint นั้นใช้ด้วย query เดียว (hot + archive ถ้าช่วงวันที่ต้องใช้)
+แล้วคำนวณด้วย NumPy / pandas แบบ vectorized ทั้งหมด — ไม่มี loop ต่อแถวใน Python
+- ค่าที่ส่งออกจาก DB เป็นตัวเลขเกือบทั้งหมด:
+    turnaround  = วินาที (int) คำนวณใน SQL → ไม่แปลง datetime ทีละแถว
+    status      = small int (eventlog.STATUS_CODES) แทนข้อความ
+    messenger   = messenger_id (ชื่อที่สะกดต่างกันไม่แยกเป็นคนละคน) → ชื่อจากตาราง messengers
+    department  = ข้อความ (เฉพาะ department-volume) → Categorical
+- Postgres (psycopg2): COPY → CSV (bytes) → pyarrow.csv (C++, ไม่สร้าง Python object ต่อแถว)
+- DB อื่น: fetchall จาก DBAPI cursor → DataFrame.from_records
+
+เวลา (bench/bench_analytics.py, Postgres 16, 1M bookings, เครื่อง 1 vCPU) ดูที่ routes/admin.py หมวด 12
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+from sqlalchemy import Integer, case, cast, func, literal_column, select, union_all
+
+from eventlog import STATUS_CODES, STATUS_NAMES, STATUS_OTHER
+from models import db, Booking, BookingArchive, Messenger
+
+# ขอบ histogram ของ turnaround (ชั่วโมง)
+TURNAROUND_BUCKETS = (0, 1, 2, 4, 8, 24, 48, 72, np.inf)
+PERCENTILES = (50, 90, 95, 99)
+
+# คอลัมน์ที่ load_frame เลือกได้ → ชนิดใน pyarrow
+COLUMN_TYPES = {
+    "turnaround": pa.int64(),
+    "status": pa.int8(),
+    "messenger_id": pa.int64(),
+    "department": pa.dictionary(pa.int32(), pa.string()),
+}
+ALL_COLUMNS = tuple(COLUMN_TYPES)
+
+# code → ชื่อ (index = code) สำหรับ Categorical.from_codes
+_STATUS_CATEGORIES = ["OTHER"] + [STATUS_NAMES[code] for code in sorted(STATUS_NAMES)]
+
+
+def seconds_between(start, end):
+    """end - start เป็นวินาที (float) ตาม dialect ของ DB"""
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start)
+    if dialect == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 86400.0
+    # MySQL / อื่น ๆ
+    return func.timestampdiff(literal_column("SECOND"), start, end)
+
+
+def _expressions(model):
+    return {
+        "turnaround": cast(seconds_between(model.created_at, model.approved_at), Integer),
+        "status": case(
+            *[(model.status == name, code) for name, code in STATUS_CODES.items()],
+            else_=STATUS_OTHER,
+        ),
+        "messenger_id": model.messenger_id,
+        "department": model.department,
+    }
+
+
+def _select_for(model, filters, columns):
+    expressions = _expressions(model)
+    stmt = select(*[expressions[c].label(c) for c in columns])
+    if "start_date" in filters:
+        stmt = stmt.where(model.booking_date >= filters["start_date"])
+    if "end_date" in filters:
+        stmt = stmt.where(model.booking_date <= filters["end_date"])
+    if "company_id" in filters:
+        stmt = stmt.where(model.company_id == filters["company_id"])
+    if "status" in filters:
+        stmt = stmt.where(model.status == filters["status"])
+    return stmt
+
+
+def _fetch_postgres(conn, stmt, columns) -> pd.DataFrame:
+    """COPY ... TO STDOUT (CSV, bytes) → pyarrow.csv: ไม่สร้าง Python object ต่อแถวเลย"""
+    compiled = stmt.compile(dialect=conn.dialect)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        sql = cursor.mogrify(str(compiled), compiled.params).decode()
+        buffer = io.BytesIO()
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    table = pa_csv.read_csv(
+        pa.py_buffer(buffer.getbuffer()),
+        read_options=pa_csv.ReadOptions(column_names=list(columns)),
+        # คอลัมน์เดียวที่เป็น NULL = บรรทัดว่าง → ต้องนับเป็นแถว
+        parse_options=pa_csv.ParseOptions(ignore_empty_lines=False),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={c: COLUMN_TYPES[c] for c in columns},
+            # NULL ใน CSV ของ COPY = ช่องว่างไม่มี quote / "" = ข้อความว่าง
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    return table.to_pandas()
+
+
+def _fetch_rows(conn, stmt, columns) -> pd.DataFrame:
+    # อ่านจาก DBAPI cursor ตรง ๆ (ข้าม Row ของ SQLAlchemy — คอลัมน์ที่เลือกไม่ต้องแปลงค่า)
+    rows = conn.execute(stmt).cursor.fetchall()
+    df = pd.DataFrame.from_records(rows, columns=list(columns), coerce_float=True)
+    if "department" in df:
+        df["department"] = df["department"].astype("category")
+    return df
+
+
+def load_frame(filters, include_archive=False, columns=ALL_COLUMNS) -> pd.DataFrame:
+    """
+    columnar fetch → DataFrame เฉพาะ columns ที่ขอ
+    turnaround เป็นชั่วโมง (NaN = ยังไม่ approve), status เป็น Categorical ของชื่อ,
+    messenger_id เป็น float (NaN = ยังไม่มี messenger)
+    """
+    stmt = _select_for(Booking, filters, columns)
+    if include_archive:
+        stmt = union_all(stmt, _select_for(BookingArchive, filters, columns))
+
+    # session.connection() → ผ่าน RoutingSession (ใช้ replica ได้)
+    conn = db.session.connection()
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+        df = _fetch_postgres(conn, stmt, columns)
+    else:
+        df = _fetch_rows(conn, stmt, columns)
+
+    if "turnaround" in df:
+        df["turnaround"] = df["turnaround"].astype(np.float64) / 3600.0
+    if "status" in df:
+        codes = df["status"].to_numpy(dtype=np.int8, na_value=STATUS_OTHER)
+        df["status"] = pd.Categorical.from_codes(codes, _STATUS_CATEGORIES).remove_unused_categories()
+    if "messenger_id" in df:
+        df["messenger_id"] = df["messenger_id"].astype(np.float64)
+    return df
+
+
+def _round(value, digits=2):
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+# ---------------- turnaround / SLA ---------------- #
+
+def turnaround_stats(df: pd.DataFrame, sla_hours: float):
+    hours = df["turnaround"].to_numpy()
+    done = hours[~np.isnan(hours) & (hours >= 0)]
+
+    counts, _ = np.histogram(done, bins=TURNAROUND_BUCKETS)
+    labels = [
+        f"{int(lo)}-{int(hi)}h" if np.isfinite(hi) else f">{int(lo)}h"
+        for lo, hi in zip(TURNAROUND_BUCKETS[:-1], TURNAROUND_BUCKETS[1:])
+    ]
+
+    if done.size:
+        pct = np.percentile(done, PERCENTILES)
+        within = float(np.count_nonzero(done <= sla_hours)) / done.size * 100
+    else:
+        pct = [np.nan] * len(PERCENTILES)
+        within = None
+
+    return {
+        "bookings": int(len(df)),
+        "completed": int(done.size),
+        "mean_hours": _round(done.mean()) if done.size else None,
+        "percentiles_hours": {f"p{p}": _round(v) for p, v in zip(PERCENTILES, pct)},
+        "sla_hours": sla_hours,
+        "within_sla_percent": _round(within),
+        "histogram": [{"bucket": label, "count": int(n)} for label, n in zip(labels, counts)],
+    }
+
+
+# ---------------- per-group ---------------- #
+
+def _quantile_frame(grouped, column):
+    q = grouped[column].quantile([0.5, 0.9]).unstack()
+    q.columns = ["p50_hours", "p90_hours"]
+    return q
+
+
+def messenger_workload(df: pd.DataFrame, sla_hours: float):
+    """
+    ต่อ messenger_id (booking เก่าที่มีแต่ messenger_name → รัน flask backfill-messengers ก่อน)
+    ต้องมีคอลัมน์ turnaround, status, messenger_id
+    """
+    done = df[df["messenger_id"].notna() & (df["status"] == "SUCCESS")]
+    if done.empty:
+        return []
+
+    done = done.assign(
+        in_sla=done["turnaround"] <= sla_hours,
+        messenger_id=done["messenger_id"].astype(np.int64),
+    )
+    grouped = done.groupby("messenger_id")
+    stats = pd.DataFrame(
+        {
+            "jobs": grouped.size(),
+            "mean_hours": grouped["turnaround"].mean(),
+            "within_sla": grouped["in_sla"].sum(),
+        }
+    ).join(_quantile_frame(grouped, "turnaround"))
+    stats["share_percent"] = stats["jobs"] / stats["jobs"].sum() * 100
+    stats["within_sla_percent"] = stats["within_sla"] / stats["jobs"] * 100
+    stats = stats.sort_values("jobs", ascending=False)
+    names = dict(
+        db.session.query(Messenger.id, Messenger.name).filter(Messenger.id.in_(stats.index.tolist()))
+    )
+
+    return [
+        {
+            "messenger_id": int(messenger_id),
+            "messenger": names.get(int(messenger_id)),
+            "jobs": int(row.jobs),
+            "share_percent": _round(row.share_percent),
+            "mean_hours": _round(row.mean_hours),
+            "p50_hours": _round(row.p50_hours),
+            "p90_hours": _round(row.p90_hours),
+            "within_sla_percent": _round(row.within_sla_percent),
+        }
+        for messenger_id, row in stats.iterrows()
+    ]
+
+
+def department_volume(df: pd.DataFrame):
+    if df.empty:
+        return []
+
+    by_status = pd.crosstab(df["department"], df["status"])
+    total = by_status.sum(axis=1)
+    cancel = by_status["CANCEL"] if "CANCEL" in by_status else 0
+    median = df.groupby("department", observed=True)["turnaround"].median()
+
+    frame = pd.DataFrame({"total": total, "cancel_rate": cancel / total * 100, "p50": median})
+    frame = frame.sort_values("total", ascending=False)
+    statuses = list(by_status.columns)
+
+    return [
+        {
+            "department": name,
+            "total": int(row.total),
+            "by_status": {s: int(by_status.at[name, s]) for s in statuses},
+            "cancel_rate_percent": _round(row.cancel_rate),
+            "p50_turnaround_hours": _round(row.p50),
+        }
+        for name, row in frame.iterrows()
+    ]
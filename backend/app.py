@@ -1,64 +1,132 @@
+import datetime as dt
+import logging
+
+import click
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from config import Config
 from models import db, User, Company
 from routes.auth import auth_bp
 from routes.booking import booking_bp
 from routes.admin import admin_bp  # ★ blueprint ฝั่ง admin (report, manage bookings ฯลฯ)
+from routes.events import events_bp
+from realtime import event_broker
+from passwords import hash_pool, PasswordHashBusy
+from ratelimit import rate_limiter
+from profiling import request_profiler
+from applog import configure_logging
+from metrics import metrics, jwt_failures
+from archive import archive_bookings, months_ago
+from messengers import backfill_messengers
+from replica import replica_router
+from cache import result_cache
+from prerender import slip_prerenderer
+from admission import admission, AdmissionRejected
+from board import dispatch_board
+import tokens
+from sqliteprofile import sqlite_profile
 
 jwt = JWTManager()
+log = logging.getLogger("booking.app")
 
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
-    # debug ดู config DB ตอน start
-    print(">>> DATABASE =", app.config.get("SQLALCHEMY_DATABASE_URI"))
+    configure_logging(app)
+
+    # อยู่หลัง nginx → remote_addr มาจาก X-Forwarded-For (rate limit / access log ต่อ client จริง)
+    if app.config["TRUSTED_PROXIES"]:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["TRUSTED_PROXIES"])
+
+    # debug ดู config DB ตอน start (ไม่ log รหัสผ่านใน URL)
+    log.info(
+        "starting app",
+        extra={"database": app.config.get("SQLALCHEMY_DATABASE_URI", "").split("@")[-1]},
+    )
 
     # เปิด CORS สำหรับ /api/*
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
     # init extensions
+    sqlite_profile.configure(app)  # ก่อน db.init_app: bind อ่าน + ขนาด pool ของ SQLite
     db.init_app(app)
+    sqlite_profile.init_app(app)
+    replica_router.init_app(app)
     jwt.init_app(app)
+    event_broker.init_app(app)
+    hash_pool.init_app(app)
+    rate_limiter.init_app(app)
+    request_profiler.init_app(app)
+    metrics.init_app(app)
+    result_cache.init_app(app)
+    slip_prerenderer.init_app(app)
+    admission.init_app(app)
+    tokens.init_app(app)
+    dispatch_board.init_app(app)  # warm board วันนี้ / พรุ่งนี้
 
     # ---------- register blueprints ---------- #
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(booking_bp, url_prefix="/api/bookings")
     app.register_blueprint(admin_bp, url_prefix="/api/admin")  # ★ route สำหรับ admin
+    app.register_blueprint(events_bp, url_prefix="/api/events")  # SSE push
 
     # ---------- health check ---------- #
     @app.route("/api/health")
     def health():
         return {"status": "ok"}
 
+    # ---------- password hash pool เต็ม ---------- #
+    @app.errorhandler(PasswordHashBusy)
+    def password_hash_busy(e):
+        return jsonify({"message": "server is busy, please try again"}), 503, {
+            "Retry-After": "1"
+        }
+
+    # ---------- export / PDF เกินความจุ (admission.py) ---------- #
+    @app.errorhandler(AdmissionRejected)
+    def admission_rejected(e):
+        return jsonify({"message": "server is busy with other exports, please try again"}), 429, {
+            "Retry-After": str(e.retry_after)
+        }
+
     # ---------- JWT error handlers ---------- #
 
     @jwt.unauthorized_loader
     def unauthorized_callback(reason: str):
         # ไม่มี token / header ผิดรูปแบบ
-        print(">>> JWT unauthorized_loader:", reason)
+        jwt_failures.inc(reason="unauthorized")
+        log.info("jwt unauthorized", extra={"reason": reason})
         return jsonify({"msg": reason}), 401
 
     @jwt.invalid_token_loader
     def invalid_token_callback(reason: str):
         # token เสีย / decode ไม่ได้
-        print(">>> JWT invalid_token_loader:", reason)
+        jwt_failures.inc(reason="invalid")
+        log.info("jwt invalid token", extra={"reason": reason})
         return jsonify({"msg": reason}), 422
 
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
         # token หมดอายุ
-        print(">>> JWT expired_token_loader: token expired")
+        jwt_failures.inc(reason="expired")
+        log.info("jwt token expired")
         return jsonify({"msg": "token expired"}), 401
 
+    @jwt.token_in_blocklist_loader
+    def token_in_blocklist_callback(jwt_header, jwt_payload):
+        # family ของ refresh token ถูก revoke (logout / เปลี่ยนรหัสผ่าน / ใช้ token ซ้ำ)
+        return tokens.is_access_token_revoked(jwt_payload)
+
     @jwt.revoked_token_loader
     def revoked_token_callback(jwt_header, jwt_payload):
-        # token ถูก revoke (ถ้าใช้ blacklist)
-        print(">>> JWT revoked_token_loader: token revoked")
+        # token ถูก revoke (tokens.py)
+        jwt_failures.inc(reason="revoked")
+        log.info("jwt token revoked")
         return jsonify({"msg": "token revoked"}), 401
 
     # ---------- CLI: flask init-db ---------- #
@@ -94,6 +162,47 @@ def create_app():
             db.session.commit()
             print("Database initialized.")
 
+    # ---------- CLI: flask ensure-indexes ---------- #
+    @app.cli.command("ensure-indexes")
+    def ensure_indexes():
+        """flask ensure-indexes : สร้างตาราง + index ที่เพิ่มใน models.py ให้ DB ที่มีอยู่แล้ว"""
+        with app.app_context():
+            # ตารางใหม่ → create_all สร้างพร้อม index
+            db.create_all()
+            # create_all ไม่เพิ่ม index ให้ตารางเดิม → สร้างทีละตัว (ข้ามตัวที่มีแล้ว)
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(db.engine, checkfirst=True)
+                    print(f" - {table.name}.{index.name}")
+            print("Indexes ensured.")
+
+    # ---------- CLI: flask archive-bookings ---------- #
+    @app.cli.command("archive-bookings")
+    @click.option("--before", help="ย้าย booking ที่ booking_date < YYYY-MM-DD")
+    @click.option("--months", type=int, help="ย้าย booking ที่เก่ากว่า N เดือน (default ARCHIVE_AFTER_MONTHS)")
+    def archive_bookings_command(before, months):
+        """flask archive-bookings : ย้าย booking SUCCESS/CANCEL เก่าไป bookings_archive"""
+        if before:
+            cutoff = dt.date.fromisoformat(before)
+        else:
+            cutoff = months_ago(months or app.config["ARCHIVE_AFTER_MONTHS"])
+        with app.app_context():
+            db.create_all()
+            moved = archive_bookings(cutoff, app.config["ARCHIVE_BATCH_SIZE"])
+            print(f"Archived {moved} bookings before {cutoff.isoformat()}.")
+
+    # ---------- CLI: flask backfill-messengers ---------- #
+    @app.cli.command("backfill-messengers")
+    @click.option("--dry-run", is_flag=True, help="แสดงชื่อที่จะรวมกันโดยไม่เขียน DB")
+    def backfill_messengers_command(dry_run):
+        """flask backfill-messengers : สร้าง messengers จาก messenger_name เดิม + เติม messenger_id"""
+        with app.app_context():
+            updated = backfill_messengers(dry_run=dry_run)
+            if dry_run:
+                print("Dry run, nothing written.")
+            else:
+                print(f"Linked {updated} bookings to messengers.")
+
     return app
 
 
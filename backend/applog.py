@@ -0,0 +1,107 @@
+# applog.py
+"""
+Structured logging (JSON ต่อบรรทัด) ผ่าน queue
+
+- handler ของ logger จริงคือ QueueHandler → ใส่ record ลง queue แล้วกลับทันที
+- QueueListener (thread แยก) เป็นคนเขียนลง stdout
+- queue เต็ม → ทิ้ง record นั้น + นับใน log_records_dropped_total
+  (ไม่ยอมให้ logging ทำให้ request ค้าง)
+
+ใช้งาน:
+    log = logging.getLogger("booking.admin")
+    log.info("report exported", extra={"rows": 1234, "format": "pdf"})
+"""
+
+import datetime as dt
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+from flask import g, request
+
+from metrics import registry
+
+log_dropped = registry.counter("log_records_dropped_total", "Log records dropped (queue full)")
+
+# attribute มาตรฐานของ LogRecord — ที่เหลือคือ extra ของผู้เรียก
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            "ts": dt.datetime.utcfromtimestamp(record.created).isoformat() + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_dropped.inc()
+
+
+_listener = None
+access_log = logging.getLogger("booking.access")
+
+
+def configure_logging(app):
+    """ตั้ง root logger (ครั้งเดียวต่อ process) + access log ต่อ request"""
+    if app.config.get("LOG_REQUESTS", True):
+        app.before_request(_start_timer)
+        app.after_request(_log_request)
+
+    global _listener
+    if _listener is not None:
+        return
+
+    cfg = app.config
+    stream = logging.StreamHandler(sys.stdout)
+    if cfg.get("LOG_FORMAT", "json") == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    q = queue.Queue(maxsize=cfg.get("LOG_QUEUE_SIZE", 10000))
+    _listener = logging.handlers.QueueListener(q, stream, respect_handler_level=False)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers[:] = [NonBlockingQueueHandler(q)]
+    root.setLevel(cfg.get("LOG_LEVEL", "INFO"))
+    # werkzeug access log ซ้ำกับ request log ของเรา
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+
+def _start_timer():
+    g._log_t0 = time.perf_counter()
+
+
+def _log_request(response):
+    t0 = g.pop("_log_t0", None)
+    if t0 is not None:
+        access_log.info(
+            "request",
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - t0) * 1000, 2),
+                "remote_addr": request.remote_addr,
+            },
+        )
+    return response
@@ -0,0 +1,122 @@
+# archive.py
+"""
+ย้าย booking เก่าที่ปิดแล้วออกจากตาราง bookings (hot) ไป bookings_archive
+
+    flask archive-bookings                  # เก่ากว่า ARCHIVE_AFTER_MONTHS เดือน
+    flask archive-bookings --before 2025-01-01
+
+- ย้ายเฉพาะ SUCCESS / CANCEL ทีละ batch (INSERT ... SELECT + DELETE ใน transaction เดียว)
+- ไม่เขียน tombstone: แถวที่ย้ายยังเป็นข้อมูลจริง (/bookings/my, report, parquet อ่านจาก archive)
+  client ที่ sync แบบ incremental จึงเก็บแถวไว้ตามเดิม — tombstone มีไว้สำหรับการลบจริงเท่านั้น
+- report / stats จะ union archive เข้ามาเองเฉพาะเมื่อช่วงวันที่ที่ขอ
+  ย้อนไปถึงข้อมูลที่อยู่ใน archive (ดู archive_horizon)
+
+เลือกใช้ตาราง archive แทน partition ของ Postgres เพื่อให้ใช้ได้ทั้ง Postgres และ SQLite
+"""
+
+import datetime as dt
+import heapq
+import threading
+import time
+
+from sqlalchemy import delete, func, insert, literal, select
+
+from models import db, Booking, BookingArchive
+
+ARCHIVE_STATUSES = ("SUCCESS", "CANCEL")
+
+# วันที่ล่าสุดใน archive (cache ต่อ worker)
+_horizon_lock = threading.Lock()
+_horizon = {"loaded_at": None, "value": None}
+HORIZON_TTL = 60
+
+
+def months_ago(months: int, today: dt.date = None) -> dt.date:
+    today = today or dt.date.today()
+    year, month = divmod(today.year * 12 + today.month - 1 - months, 12)
+    return dt.date(year, month + 1, 1)
+
+
+def archive_bookings(cutoff: dt.date, batch_size: int = 5000, log=print) -> int:
+    """ย้าย booking ที่ปิดแล้วและ booking_date < cutoff → คืนจำนวนแถวที่ย้าย"""
+    columns = [c.name for c in Booking.__table__.columns]
+    hot = Booking.__table__
+    moved = 0
+
+    while True:
+        ids = [
+            row[0]
+            for row in db.session.execute(
+                select(hot.c.id)
+                .where(hot.c.booking_date < cutoff, hot.c.status.in_(ARCHIVE_STATUSES))
+                .order_by(hot.c.id)
+                .limit(batch_size)
+            )
+        ]
+        if not ids:
+            break
+
+        now = dt.datetime.utcnow()
+        db.session.execute(
+            insert(BookingArchive.__table__).from_select(
+                columns + ["archived_at"],
+                select(*[hot.c[name] for name in columns], literal(now)).where(hot.c.id.in_(ids)),
+            )
+        )
+        # Core DELETE ไม่ผ่าน event after_delete ของ ORM → ไม่มี tombstone
+        db.session.execute(delete(hot).where(hot.c.id.in_(ids)))
+        db.session.commit()
+
+        moved += len(ids)
+        log(f" - archived {moved} bookings")
+
+    reset_horizon()
+    return moved
+
+
+# ---------------- read path ---------------- #
+
+def reset_horizon():
+    with _horizon_lock:
+        _horizon["loaded_at"] = None
+
+
+def archive_horizon(fresh: bool = False):
+    """booking_date ล่าสุดใน archive (None = archive ว่าง) — fresh = ไม่ใช้ cache"""
+    now = time.monotonic()
+    if not fresh:
+        with _horizon_lock:
+            if _horizon["loaded_at"] is not None and now - _horizon["loaded_at"] < HORIZON_TTL:
+                return _horizon["value"]
+
+    # MAX บน index ix_bookings_archive_date → อ่าน index แถวเดียว
+    value = db.session.query(func.max(BookingArchive.booking_date)).scalar()
+    with _horizon_lock:
+        _horizon.update(loaded_at=now, value=value)
+    return value
+
+
+def needs_archive(start_date: dt.date = None) -> bool:
+    """
+    ช่วงวันที่ที่เริ่มจาก start_date (None = ตั้งแต่ต้น) ต้องอ่าน archive ด้วยไหม
+    horizon เพิ่มขึ้นอย่างเดียว → cache ตอบ "ต้องอ่าน" ได้เสมอ แต่ "ไม่ต้องอ่าน" ต้องเช็ค DB
+    (archive-bookings รันใน process อื่น reset cache ของ worker ไม่ได้)
+    """
+    horizon = archive_horizon()
+    if horizon is not None and (start_date is None or start_date <= horizon):
+        return True
+    horizon = archive_horizon(fresh=True)
+    if horizon is None:
+        return False
+    return start_date is None or start_date <= horizon
+
+
+def merge_newest_first(*row_lists):
+    """รวม list ของ (booking, company) ที่เรียง booking_date, booking_time desc อยู่แล้ว"""
+    return list(
+        heapq.merge(
+            *row_lists,
+            key=lambda row: (row[0].booking_date, row[0].booking_time),
+            reverse=True,
+        )
+    )
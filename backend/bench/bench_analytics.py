@@ -0,0 +1,72 @@
+# bench/bench_analytics.py
+"""
+Benchmark: analytics (turnaround / workload / department) บนข้อมูลจริงใน DB
+
+    DATABASE_URL=postgresql://... python bench/datagen.py --bookings 1000000
+    DATABASE_URL=postgresql://... python bench/bench_analytics.py --repeat 3
+
+วัดต่อ endpoint (ไม่ผ่าน HTTP / cache) — แต่ละ endpoint ดึงเฉพาะคอลัมน์ที่ใช้:
+  load    = analytics.load_frame (Postgres: COPY → pyarrow.csv, อื่น ๆ: fetchall)
+  compute = turnaround_stats / messenger_workload / department_volume
+พิมพ์ผล JSON: จำนวนแถว, dialect, best / median ของแต่ละช่วง (วินาที) ต่อ endpoint
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sla-hours", type=float, default=24)
+    args = parser.parse_args()
+
+    import analytics
+    from app import create_app
+    from models import db
+
+    endpoints = {
+        "turnaround": (("turnaround",), lambda df: analytics.turnaround_stats(df, args.sla_hours)),
+        "messenger_workload": (
+            ("turnaround", "status", "messenger_id"),
+            lambda df: analytics.messenger_workload(df, args.sla_hours),
+        ),
+        "department_volume": (("turnaround", "status", "department"), analytics.department_volume),
+    }
+
+    def summary(values):
+        values = sorted(values)
+        return {"best": round(values[0], 3), "median": round(values[len(values) // 2], 3)}
+
+    app = create_app()
+    result = {}
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        for name, (columns, compute) in endpoints.items():
+            loads, computes, totals = [], [], []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                df = analytics.load_frame({}, columns=columns)
+                t1 = time.perf_counter()
+                compute(df)
+                t2 = time.perf_counter()
+                loads.append(t1 - t0)
+                computes.append(t2 - t1)
+                totals.append(t2 - t0)
+            result[name] = {
+                "rows": len(df),
+                "load_seconds": summary(loads),
+                "compute_seconds": summary(computes),
+                "total_seconds": summary(totals),
+            }
+
+    print(json.dumps({"dialect": dialect, "cpu_count": os.cpu_count(), "endpoints": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# bench/bench_bulk_users.py
+"""
+Benchmark: สร้าง user ทีละคน (POST /api/admin/users) vs import ทีละก้อน (POST /api/admin/users/import)
+
+    python bench/bench_bulk_users.py --users 5000                                # method จาก config (scrypt)
+    python bench/bench_bulk_users.py --users 5000 --method pbkdf2:sha256:1000   # ตัดเวลา hash ออก ดูแต่ DB
+    python bench/bench_bulk_users.py --users 5000 --single-sample 0              # ทีละคนครบทุกคน (ไม่คูณสเกล)
+
+รันผ่าน Flask test client บน SQLite ชั่วคราว (DB เดียว, username คนละ prefix ต่อโหมด)
+import แบ่งส่งครั้งละ max_rows (ตาม USER_IMPORT_HASH_BUDGET) แบบเดียวกับ client จริง
+พิมพ์ผล JSON: เวลารวม, user/s, จำนวนที่สร้าง ของแต่ละโหมด + จำนวนก้อน / request ที่นานที่สุดของ import
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ADMIN_USERNAME = "bench-admin"
+ADMIN_PASSWORD = "bench-admin-123"
+
+
+def make_users(n: int, prefix: str):
+    return [
+        {
+            "username": f"{prefix}{i:05d}",
+            "password": f"pw-{i:05d}-secret",
+            "full_name": f"พนักงาน {i}",
+            "email": f"{prefix}{i}@example.com",
+            "role": "USER",
+        }
+        for i in range(n)
+    ]
+
+
+def make_client(method: str, workers: int):
+    path = tempfile.mktemp(suffix=".db")
+    os.environ["DATABASE_URL"] = "sqlite:///" + path
+
+    from app import create_app
+    from models import db, User
+
+    app = create_app()
+    if method:
+        app.config["PASSWORD_HASH_METHOD"] = method
+    if workers:
+        from passwords import hash_pool
+
+        app.config["PASSWORD_BULK_WORKERS"] = workers
+        hash_pool.init_app(app)
+    with app.app_context():
+        db.create_all()
+        admin = User(username=ADMIN_USERNAME, role="ADMIN", is_active=True)
+        admin.set_password(ADMIN_PASSWORD)
+        db.session.add(admin)
+        db.session.commit()
+
+    client = app.test_client()
+    res = client.post("/api/auth/login", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+    headers = {"Authorization": "Bearer " + res.get_json()["access_token"]}
+    return app, client, headers, path
+
+
+def bench_single(client, headers, users):
+    t0 = time.perf_counter()
+    created = 0
+    for user in users:
+        if client.post("/api/admin/users", headers=headers, json=user).status_code == 201:
+            created += 1
+    return time.perf_counter() - t0, created
+
+
+def bench_bulk(client, headers, users, max_rows):
+    t0 = time.perf_counter()
+    created, longest = 0, 0.0
+    for i in range(0, len(users), max_rows):
+        t1 = time.perf_counter()
+        res = client.post("/api/admin/users/import", headers=headers, json={"users": users[i : i + max_rows]})
+        longest = max(longest, time.perf_counter() - t1)
+        created += res.get_json()["created"]
+    return time.perf_counter() - t0, created, longest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--method", default=None, help="werkzeug hash method (default = PASSWORD_HASH_METHOD)")
+    parser.add_argument("--workers", type=int, default=0, help="PASSWORD_BULK_WORKERS (0 = CPU count)")
+    parser.add_argument(
+        "--single-sample", type=int, default=200, help="ทีละคนแค่ N คนแล้วคูณสเกล (0 = ครบทุกคน)"
+    )
+    args = parser.parse_args()
+
+    app, client, headers, path = make_client(args.method, args.workers)
+    import userimport
+
+    with app.app_context():
+        max_rows = userimport.max_rows()
+    result = {
+        "users": args.users,
+        "method": app.config["PASSWORD_HASH_METHOD"],
+        "cpu_count": os.cpu_count(),
+        "max_rows": max_rows,
+    }
+
+    users = make_users(args.users, "single")
+    sample = users[: args.single_sample] if args.single_sample else users
+    elapsed, created = bench_single(client, headers, sample)
+    scale = len(users) / len(sample)
+    result["single"] = {
+        "seconds": round(elapsed * scale, 2),
+        "users_per_second": round(len(sample) / elapsed, 1),
+        "created": created,
+        "extrapolated": scale != 1,
+    }
+
+    users = make_users(args.users, "bulk")
+    elapsed, created, longest = bench_bulk(client, headers, users, max_rows)
+    os.unlink(path)
+    result["bulk"] = {
+        "seconds": round(elapsed, 2),
+        "users_per_second": round(len(users) / elapsed, 1),
+        "created": created,
+        "requests": -(-len(users) // max_rows),
+        "longest_request_seconds": round(longest, 2),
+    }
+    result["speedup"] = round(result["single"]["seconds"] / result["bulk"]["seconds"], 1)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench/bench_dispatch.py
+"""
+Benchmark dispatch planner (ไม่ต้องใช้ DB)
+
+    python bench/bench_dispatch.py --jobs 3000 --messengers 6 --repeat 5
+
+make_fixture() ใช้ seed คงที่ → ได้ชุดงาน + ตารางระยะทางเดิมทุกครั้ง
+ใช้เทียบผล plan ข้าม commit ได้ (total_trips / total_distance ต้องเท่าเดิม)
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dispatch import DistanceMatrix, plan_day  # noqa: E402
+
+DEPARTMENTS = ["บัญชี", "การเงิน", "บุคคล", "จัดซื้อ", "กฎหมาย", "ไอที", "ขาย", "การตลาด"]
+
+
+def make_fixture(jobs: int = 3000, buildings: int = 40, floors: int = 12, seed: int = 26):
+    rng = random.Random(seed)
+    names = [f"อาคาร {i + 1}" for i in range(buildings)]
+    coords = [(rng.uniform(0, 10), rng.uniform(0, 10)) for _ in names]
+    distances = [
+        [round(((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5, 3) for bx, by in coords]
+        for ax, ay in coords
+    ]
+    matrix = DistanceMatrix(names, distances)
+
+    slots = ["MORNING"] * 5 + ["AFTERNOON"] * 4 + ["ANY"]
+    rows = [
+        {
+            "id": i + 1,
+            "building": rng.choice(names),
+            "floor": str(rng.randint(1, floors)),
+            "department": rng.choice(DEPARTMENTS),
+            "slot": rng.choice(slots),
+        }
+        for i in range(jobs)
+    ]
+    return rows, matrix, names[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=3000)
+    parser.add_argument("--messengers", type=int, default=6)
+    parser.add_argument("--max-stops", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    jobs, matrix, depot = make_fixture(args.jobs)
+    messengers = [f"messenger-{i + 1}" for i in range(args.messengers)]
+
+    timings = []
+    plan = None
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        plan = plan_day(jobs, messengers, matrix, depot=depot, max_stops=args.max_stops)
+        timings.append(time.perf_counter() - t0)
+
+    timings.sort()
+    print(
+        json.dumps(
+            {
+                "jobs": args.jobs,
+                "messengers": args.messengers,
+                "total_trips": plan["total_trips"],
+                "total_distance": plan["total_distance"],
+                "best_ms": round(timings[0] * 1000, 2),
+                "median_ms": round(timings[len(timings) // 2] * 1000, 2),
+            },
+            ensure_ascii=False,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
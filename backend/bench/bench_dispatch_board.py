@@ -0,0 +1,117 @@
+# bench/bench_dispatch_board.py
+"""
+Benchmark: GET /api/admin/bookings (โหลดประวัติทั้งหมด) vs GET /api/admin/dispatch/board (memory)
+
+    python bench/bench_dispatch_board.py --history 50000 --today 300 --requests 200
+
+รันผ่าน Flask test client บน SQLite ชั่วคราว: seed booking ย้อนหลัง --history แถว
++ วันนี้ --today แถว แล้ววัด latency ต่อ request ของทั้งสอง endpoint
+(board: วัดทั้งผ่าน HTTP และเรียก dispatch_board.board_json ตรง ๆ)
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ADMIN_USERNAME = "bench-admin"
+ADMIN_PASSWORD = "bench-admin-123"
+
+
+def booking_values(day: dt.date, i: int, company_id: int, user_id: int):
+    return {
+        "company_id": company_id,
+        "booking_date": day,
+        "booking_time": dt.time(8 + i % 9, i % 60),
+        "requester_name": f"ผู้แจ้ง {i}",
+        "job_type": "ส่งเอกสาร",
+        "detail": "รายละเอียดงาน",
+        "department": "บัญชี",
+        "building": "A",
+        "floor": str(i % 20),
+        "contact_name": "ติดต่อ",
+        "contact_phone": "0800000000",
+        "status": ("PENDING", "SUCCESS", "CANCEL")[i % 3],
+        "created_by": user_id,
+    }
+
+
+def make_client(history: int, today_rows: int):
+    path = tempfile.mktemp(suffix=".db")
+    os.environ["DATABASE_URL"] = "sqlite:///" + path
+
+    from sqlalchemy import insert
+
+    from app import create_app
+    from models import db, Booking, Company, User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        admin = User(username=ADMIN_USERNAME, role="ADMIN", is_active=True)
+        admin.set_password(ADMIN_PASSWORD)
+        company = Company(name="Bench")
+        db.session.add_all([admin, company])
+        db.session.commit()
+        today = dt.date.today()
+        rows = [
+            booking_values(today - dt.timedelta(days=1 + i % 365), i, company.id, admin.id)
+            for i in range(history)
+        ]
+        rows += [booking_values(today, i, company.id, admin.id) for i in range(today_rows)]
+        db.session.execute(insert(Booking), rows)
+        db.session.commit()
+
+    client = app.test_client()
+    res = client.post("/api/auth/login", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+    headers = {"Authorization": "Bearer " + res.get_json()["access_token"]}
+    return app, client, headers, path
+
+
+def timed(fn, n: int):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, default=50000)
+    parser.add_argument("--today", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--full-requests", type=int, default=5, help="จำนวนครั้งของ /admin/bookings")
+    args = parser.parse_args()
+
+    app, client, headers, path = make_client(args.history, args.today)
+    from board import dispatch_board
+
+    full = timed(lambda: client.get("/api/admin/bookings", headers=headers), args.full_requests)
+    board = timed(lambda: client.get("/api/admin/dispatch/board", headers=headers), args.requests)
+    with app.app_context():
+        day = dt.date.today()
+        direct = timed(lambda: dispatch_board.board_json(day), args.requests * 10)
+    os.unlink(path)
+
+    print(
+        json.dumps(
+            {
+                "history": args.history,
+                "today": args.today,
+                "admin_bookings_ms": round(full * 1000, 1),
+                "dispatch_board_http_ms": round(board * 1000, 2),
+                "dispatch_board_json_us": round(direct * 1e6, 1),
+                "speedup_http": round(full / board, 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# bench/bench_login_storm.py
+"""
+Load test: API ยังตอบเร็วไหมระหว่าง login storm
+
+    python bench/bench_login_storm.py --attackers 32 --seconds 5
+    python bench/bench_login_storm.py --no-ratelimit     # ดูผลของ hash pool อย่างเดียว
+
+start server จริง (werkzeug threaded, แยก process) บน SQLite ชั่วคราว แล้ว
+  - attacker threads ยิง /api/auth/login ด้วยรหัสผิดรัว ๆ
+  - probe thread เรียก /api/bookings/companies แล้ววัด latency
+พิมพ์ผล JSON: latency ของ probe ก่อน/ระหว่าง storm + จำนวน status ที่ attacker ได้
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return round(values[k] * 1000, 2)
+
+
+def request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as res:
+            res.read()
+            return res.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def probe(base, stop, out):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        request(base + "/api/bookings/companies")
+        out.append(time.perf_counter() - t0)
+        time.sleep(0.02)
+
+
+def attacker(base, stop, statuses, idx):
+    n = 0
+    while not stop.is_set():
+        statuses[request(base + "/api/auth/login", {"username": f"user{idx}", "password": f"bad{n}"})] += 1
+        n += 1
+
+
+def serve(port, users):
+    from werkzeug.serving import make_server
+    from app import create_app
+    from models import db, User, Company
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        for i in range(users):
+            u = User(username=f"user{i}", role="USER")
+            u.set_password("correct-horse")
+            db.session.add(u)
+        db.session.add(Company(name="บริษัทตัวอย่าง A"))
+        db.session.commit()
+
+    make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attackers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--port", type=int, default=16099)
+    parser.add_argument("--no-ratelimit", action="store_true")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = "sqlite:///" + tempfile.mktemp(suffix=".db")
+    if args.no_ratelimit:
+        os.environ["LOGIN_LIMIT_PER_IP"] = "0"
+        os.environ["LOGIN_FAILURES_PER_USER"] = "0"
+
+    # server แยก process → GIL ของ client ไม่ไปถ่วง server
+    server = multiprocessing.Process(target=serve, args=(args.port, args.attackers), daemon=True)
+    server.start()
+    base = f"http://127.0.0.1:{args.port}"
+    while True:
+        try:
+            request(base + "/api/health")
+            break
+        except OSError:
+            time.sleep(0.1)
+
+    # baseline
+    stop = threading.Event()
+    baseline = []
+    t = threading.Thread(target=probe, args=(base, stop, baseline))
+    t.start()
+    time.sleep(min(args.seconds, 2))
+    stop.set()
+    t.join()
+
+    # storm
+    stop = threading.Event()
+    during, statuses = [], Counter()
+    threads = [threading.Thread(target=probe, args=(base, stop, during))]
+    threads += [
+        threading.Thread(target=attacker, args=(base, stop, statuses, i))
+        for i in range(args.attackers)
+    ]
+    for th in threads:
+        th.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for th in threads:
+        th.join()
+    server.terminate()
+
+    print(
+        json.dumps(
+            {
+                "attackers": args.attackers,
+                "ratelimit": not args.no_ratelimit,
+                "probe_baseline_ms": {"p50": percentile(baseline, 50), "p95": percentile(baseline, 95)},
+                "probe_during_storm_ms": {
+                    "p50": percentile(during, 50),
+                    "p95": percentile(during, 95),
+                    "p99": percentile(during, 99),
+                },
+                "login_statuses": dict(statuses),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# bench/bench_sqlite_profile.py
+"""
+Benchmark: SQLite ค่าเดิม (SQLITE_PROFILE=default) vs tuned (WAL + pragma + pool อ่านแยก)
+
+    python bench/bench_sqlite_profile.py
+    python bench/bench_sqlite_profile.py --seconds 10 --readers 8 --writers 2 --rows 20000
+
+แต่ละ profile รันใน subprocess แยก (Config อ่าน env ตอน import) บนไฟล์ SQLite ชั่วคราว:
+  - seed bookings --rows แถว
+  - writer thread: insert booking + commit ทีละแถว (แบบ create_booking) ผ่าน engine หลัก
+  - reader thread: query แบบหน้า report (COUNT ตามสถานะ + 50 แถวล่าสุดของวัน) ผ่าน bind "replica"
+    ถ้ามี (tuned) ไม่งั้น engine หลัก
+พิมพ์ผล JSON: reads/s, writes/s, จำนวน error "database is locked", p95 ของ write ต่อ profile
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROFILES = ("default", "tuned")
+
+
+def booking_values(i: int, company_id: int, user_id: int):
+    day = dt.date(2026, 1, 1) + dt.timedelta(days=i % 60)
+    return {
+        "company_id": company_id,
+        "booking_date": day,
+        "booking_time": dt.time(8 + i % 10, i % 60),
+        "requester_name": f"ผู้แจ้ง {i}",
+        "job_type": ("ส่งเอกสาร", "รับเอกสาร", "ธนาคาร")[i % 3],
+        "detail": "รายละเอียดงาน " * 4,
+        "department": ("บัญชี", "บุคคล", "ขาย")[i % 3],
+        "building": "A",
+        "floor": str(i % 20),
+        "contact_name": "ติดต่อ",
+        "contact_phone": "0800000000",
+        "status": ("PENDING", "APPROVED", "DONE")[i % 3],
+        "created_by": user_id,
+    }
+
+
+def run_profile(args):
+    """ทำงานใน subprocess: env SQLITE_PROFILE / DATABASE_URL ถูกตั้งไว้แล้ว"""
+    from sqlalchemy import func, insert, select
+    from sqlalchemy.exc import OperationalError
+
+    from app import create_app
+    from models import db, Booking, Company, User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        user = User(username="bench", role="ADMIN", is_active=True, password_hash="x")
+        company = Company(name="Bench")
+        db.session.add_all([user, company])
+        db.session.commit()
+        user_id, company_id = user.id, company.id
+        db.session.execute(
+            insert(Booking), [booking_values(i, company_id, user_id) for i in range(args.rows)]
+        )
+        db.session.commit()
+        write_engine = db.engine
+        read_engine = db.engines.get("replica", db.engine)
+
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+    write_latencies = []
+    lock = threading.Lock()
+
+    def reader(n):
+        day = dt.date(2026, 1, 1) + dt.timedelta(days=n % 60)
+        by_status = select(Booking.status, func.count()).group_by(Booking.status)
+        latest = (
+            select(Booking.id, Booking.requester_name, Booking.status)
+            .where(Booking.booking_date == day)
+            .order_by(Booking.booking_time.desc())
+            .limit(50)
+        )
+        while not stop.is_set():
+            try:
+                with read_engine.connect() as conn:
+                    conn.execute(by_status).all()
+                    conn.execute(latest).all()
+                key = "reads"
+            except OperationalError:
+                key = "read_errors"
+            with lock:
+                counts[key] += 1
+
+    def writer(n):
+        i = args.rows + n * 10 ** 7
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                with write_engine.begin() as conn:
+                    conn.execute(insert(Booking), [booking_values(i, company_id, user_id)])
+                key = "writes"
+            except OperationalError:
+                key = "write_errors"
+            elapsed = time.perf_counter() - t0
+            i += 1
+            with lock:
+                counts[key] += 1
+                write_latencies.append(elapsed)
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    write_latencies.sort()
+    p95 = write_latencies[int(len(write_latencies) * 0.95)] if write_latencies else None
+    return {
+        "reads_per_second": round(counts["reads"] / args.seconds, 1),
+        "writes_per_second": round(counts["writes"] / args.seconds, 1),
+        "read_errors": counts["read_errors"],
+        "write_errors": counts["write_errors"],
+        "write_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        "read_pool": "replica" if read_engine is not write_engine else "primary",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--profile", choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args)))
+        return
+
+    result = {"seconds": args.seconds, "readers": args.readers, "writers": args.writers, "rows": args.rows}
+    for profile in PROFILES:
+        path = tempfile.mktemp(suffix=".db")
+        env = dict(os.environ, SQLITE_PROFILE=profile, DATABASE_URL="sqlite:///" + path)
+        try:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--profile", profile] + sys.argv[1:],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.unlink(path + suffix)
+        result[profile] = json.loads(out.strip().splitlines()[-1])
+
+    default, tuned = result["default"], result["tuned"]
+    result["speedup"] = {
+        key: round(tuned[key] / default[key], 1) if default[key] else None
+        for key in ("reads_per_second", "writes_per_second")
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# bench/datagen.py
+"""
+สร้างข้อมูลจำลองสำหรับ benchmark (bulk insert)
+
+    DATABASE_URL=postgresql://... python bench/datagen.py \
+        --companies 20 --users 500 --bookings 1000000
+
+- ข้อความภาษาไทย (ชื่อ, หน่วยงาน, รายละเอียด)
+- วันที่เอียงไปทางปัจจุบัน (งานส่วนใหญ่อยู่ในช่วงหลัง ๆ)
+- สถานะตามอายุงาน: งานเก่าเกือบทั้งหมด SUCCESS/CANCEL, งานใหม่ยัง PENDING
+- seed คงที่ → ได้ชุดข้อมูลเดิมทุกครั้ง
+"""
+
+import argparse
+import datetime as dt
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIRST_NAMES = ["สมชาย", "สมหญิง", "วิชัย", "นภา", "ประเสริฐ", "กมล", "อรุณี", "ธนา", "ศิริพร", "อนันต์"]
+LAST_NAMES = ["ใจดี", "สุขสันต์", "ทองคำ", "ศรีสุข", "วงศ์ไทย", "มั่นคง", "รุ่งเรือง", "แก้วมณี"]
+DEPARTMENTS = ["ฝ่ายบัญชี", "ฝ่ายการเงิน", "ฝ่ายบุคคล", "ฝ่ายจัดซื้อ", "ฝ่ายกฎหมาย", "ฝ่ายไอที", "ฝ่ายขาย", "ฝ่ายการตลาด"]
+JOB_TYPES = ["ส่งเอกสาร", "รับเอกสาร", "ส่งพัสดุ", "รับเช็ค", "วางบิล", "ยื่นเอกสารราชการ"]
+DETAILS = [
+    "ส่งเอกสารสัญญาให้ลูกค้าลงนาม",
+    "รับเช็คค่าบริการประจำเดือน",
+    "วางบิลพร้อมใบกำกับภาษี",
+    "ยื่นแบบภาษีที่สำนักงานสรรพากร",
+    "ส่งพัสดุตัวอย่างสินค้า",
+    "รับเอกสารตัวจริงคืนจากธนาคาร",
+]
+BUILDINGS = [f"อาคาร {c}" for c in "ABCDEFGH"] + [""]
+# booking_time ที่ใช้จริง: ช่วงเช้า / ช่วงบ่าย / ไม่ระบุเวลา
+TIMES = [dt.time(11, 59, 59)] * 5 + [dt.time(16, 29, 59)] * 4 + [dt.time(0, 0, 0)]
+
+
+def thai_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def pick_status(rng, age_days: int) -> str:
+    if age_days < 0:
+        return "PENDING" if rng.random() < 0.9 else "CANCEL"
+    if age_days < 3:
+        r = rng.random()
+        return "PENDING" if r < 0.5 else ("SUCCESS" if r < 0.9 else "CANCEL")
+    return "SUCCESS" if rng.random() < 0.88 else "CANCEL"
+
+
+def generate(companies: int, users: int, bookings: int, days: int = 730, seed: int = 31, batch: int = 10000):
+    """ต้องเรียกภายใน app context"""
+    from sqlalchemy import insert
+
+    from models import db, Booking, Company, User
+    from messengers import resolve_messenger
+    from passwords import hash_password
+
+    rng = random.Random(seed)
+    db.create_all()
+
+    company_rows = [{"name": f"บริษัทจำลอง {i + 1:03d} จำกัด", "is_active": True} for i in range(companies)]
+    db.session.execute(insert(Company), company_rows)
+
+    # hash ครั้งเดียวแล้วใช้ซ้ำทุก user (ไม่ให้เวลาส่วนนี้กิน benchmark)
+    pw_hash = hash_password("password123")
+    now = dt.datetime.utcnow()
+    user_rows = [
+        {
+            "username": f"bench{i + 1:06d}",
+            "password_hash": pw_hash,
+            "full_name": thai_name(rng),
+            "email": f"bench{i + 1:06d}@example.com",
+            "phone": f"08{rng.randint(10000000, 99999999)}",
+            "role": "USER",
+            "is_approver": False,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(users)
+    ]
+    db.session.execute(insert(User), user_rows)
+    db.session.commit()
+
+    messenger = resolve_messenger("ขวัญเมือง")
+    db.session.commit()
+
+    company_ids = [c.id for c in Company.query.with_entities(Company.id).all()]
+    user_ids = [u.id for u in User.query.with_entities(User.id).filter(User.username.like("bench%")).all()]
+    # user บางคนจองเยอะกว่าคนอื่นมาก (Pareto)
+    user_weights = [rng.paretovariate(1.2) for _ in user_ids]
+    company_weights = [rng.paretovariate(1.5) for _ in company_ids]
+
+    today = dt.date.today()
+    inserted = 0
+    while inserted < bookings:
+        n = min(batch, bookings - inserted)
+        users_pick = rng.choices(user_ids, weights=user_weights, k=n)
+        companies_pick = rng.choices(company_ids, weights=company_weights, k=n)
+        rows = []
+        for i in range(n):
+            # เอียงไปทางปัจจุบัน + มีงานล่วงหน้าเล็กน้อย
+            age = int(days * (rng.random() ** 2.5))
+            if rng.random() < 0.05:
+                age = -rng.randint(1, 14)
+            booking_date = today - dt.timedelta(days=age)
+            created_at = dt.datetime.combine(booking_date, dt.time(8)) - dt.timedelta(hours=rng.randint(1, 72))
+            status = pick_status(rng, age)
+            rows.append(
+                {
+                    "company_id": companies_pick[i],
+                    "booking_date": booking_date,
+                    "booking_time": rng.choice(TIMES),
+                    "requester_name": thai_name(rng),
+                    "job_type": rng.choice(JOB_TYPES),
+                    "detail": rng.choice(DETAILS) + f" เลขที่ {rng.randint(1000, 99999)}",
+                    "department": rng.choice(DEPARTMENTS),
+                    "building": rng.choice(BUILDINGS),
+                    "floor": str(rng.randint(1, 20)),
+                    "contact_name": thai_name(rng),
+                    "contact_phone": f"02{rng.randint(1000000, 9999999)}",
+                    "status": status,
+                    "created_by": users_pick[i],
+                    "approved_at": created_at + dt.timedelta(hours=rng.randint(1, 48)) if status == "SUCCESS" else None,
+                    "messenger_id": messenger.id if status == "SUCCESS" else None,
+                    "messenger_name": messenger.name if status == "SUCCESS" else None,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+        db.session.execute(insert(Booking), rows)
+        db.session.commit()
+        inserted += n
+        print(f" - bookings {inserted}/{bookings}", flush=True)
+
+    return {"companies": companies, "users": users, "bookings": bookings}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=20)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--seed", type=int, default=31)
+    args = parser.parse_args()
+
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        t0 = time.perf_counter()
+        generate(args.companies, args.users, args.bookings, args.days, args.seed)
+        print(f">>> generated in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# bench/replica_check.py
+"""
+ทดสอบ read-replica routing กับ DB สองก้อนบนเครื่อง (SQLite primary + replica)
+
+    python bench/replica_check.py
+    # หรือ Postgres สองตัวที่ตั้ง replication ไว้แล้ว
+    DATABASE_URL=postgresql://...primary DATABASE_REPLICA_URL=postgresql://...replica \
+        python bench/replica_check.py --no-copy
+
+โหมด SQLite: "replication" = copy ไฟล์ primary ทับ replica (--no-copy ข้ามขั้นนี้)
+เช็ค:
+  1) report / stats อ่านจาก replica เมื่อ replica ตามทัน
+  2) replica ตามหลังเกิน REPLICA_MAX_LAG_SECONDS → อ่าน primary
+  3) user ที่เพิ่งเขียนข้อมูลอ่าน primary (read-after-write)
+"""
+
+import argparse
+import datetime as dt
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--no-copy", action="store_true", help="ไม่ copy primary → replica (ใช้ replication จริง)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="replica-check-")
+    primary_path = os.path.join(tmp, "primary.db")
+    replica_path = os.path.join(tmp, "replica.db")
+    os.environ.setdefault("DATABASE_URL", "sqlite:///" + primary_path)
+    os.environ.setdefault("DATABASE_REPLICA_URL", "sqlite:///" + replica_path)
+    os.environ["REPLICA_MAX_LAG_SECONDS"] = "60"
+    os.environ["REPLICA_LAG_CHECK_INTERVAL"] = "0"
+    # เช็คว่า query ไปที่ DB ไหน → ต้องรันจริงทุกครั้ง ไม่ตอบจาก result cache (cache.py)
+    os.environ["CACHE_BACKEND"] = "none"
+
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+
+    from app import create_app
+    from models import db, Booking, Company, User
+
+    def replicate():
+        if args.no_copy:
+            return
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+        shutil.copyfile(primary_path, replica_path)
+
+    app = create_app()
+    hits = {"primary": 0, "replica": 0}
+
+    def counter(name):
+        def count(conn, cursor, statement, *args):
+            # ไม่นับ query เช็ค lag ของ router เอง
+            if "max(bookings.updated_at)" not in statement:
+                hits[name] += 1
+
+        return count
+    with app.app_context():
+        for name, engine in (("primary", db.engines[None]), ("replica", db.engines["replica"])):
+            event.listen(engine, "before_cursor_execute", counter(name))
+
+        db.create_all()
+        admin = User(username="replica-admin", full_name="Replica Admin", role="ADMIN", is_active=True)
+        admin.password_hash = "-"
+        company = Company(name="บริษัททดสอบ")
+        db.session.add_all([admin, company])
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id))
+        company_id = company.id
+        replicate()
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def reads(path):
+        before = dict(hits)
+        res = client.get(path, headers=headers)
+        assert res.status_code == 200, res.get_data(as_text=True)
+        return {k: hits[k] - before[k] for k in hits}
+
+    def add_booking(updated_at):
+        with app.app_context():
+            db.session.add(
+                Booking(
+                    company_id=company_id,
+                    booking_date=dt.date.today(),
+                    booking_time=dt.time(11, 59, 59),
+                    requester_name="ทดสอบ",
+                    job_type="ส่งเอกสาร",
+                    detail="replica check",
+                    department="ไอที",
+                    building="A",
+                    floor="1",
+                    contact_name="ทดสอบ",
+                    contact_phone="0800000000",
+                    status="PENDING",
+                    created_by=1,
+                    updated_at=updated_at,
+                )
+            )
+            db.session.commit()
+
+    from replica import replica_router
+
+    results = []
+
+    # 1) replica ตามทัน → report ไป replica
+    r = reads("/api/admin/report")
+    results.append(("in sync → replica", r["replica"] > 0))
+
+    # 2) primary มีงานที่ replica ยังไม่มี เก่ากว่า max lag → primary
+    add_booking(dt.datetime.utcnow())
+    add_booking(dt.datetime.utcnow() + dt.timedelta(minutes=5))
+    r = reads("/api/admin/summary")
+    results.append(("lagging → primary", r["replica"] == 0 and r["primary"] > 0))
+
+    # 3) replica ตามทันแล้ว แต่ user เพิ่งเขียน → primary จนหมดช่วง
+    with app.app_context():
+        replicate()
+    res = client.patch("/api/admin/bookings/1/status", json={"status": "SUCCESS"}, headers=headers)
+    assert res.status_code == 200, res.get_data(as_text=True)
+    r = reads("/api/admin/stats/bookings-by-status")
+    results.append(("read-after-write → primary", r["replica"] == 0))
+    replica_router._sticky.clear()  # ข้ามช่วง REPLICA_MAX_LAG_SECONDS
+    r = reads("/api/admin/stats/bookings-by-status")
+    results.append(("caught up → replica", r["replica"] > 0))
+
+    ok = True
+    for name, passed in results:
+        ok &= passed
+        print(f"{'OK ' if passed else 'FAIL'} {name}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
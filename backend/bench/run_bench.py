@@ -0,0 +1,247 @@
+# bench/run_bench.py
+"""
+Benchmark endpoint หลัก ๆ แล้วเขียนผลเป็น JSON (ไว้เทียบข้าม commit)
+
+    # DB ชั่วคราว (SQLite) + สร้างข้อมูลจำลอง
+    python bench/run_bench.py --generate --bookings 200000 --out bench_results.json
+
+    # DB ที่มีข้อมูลอยู่แล้ว ผ่าน server ที่รันอยู่
+    DATABASE_URL=postgresql://... python bench/run_bench.py \
+        --base-url http://127.0.0.1:16000 --out bench_results.json
+
+    # เทียบกับผลรอบก่อน
+    python bench/run_bench.py --generate --compare old.json
+
+ผลต่อ scenario: p50 / p95 / p99 / mean (ms), throughput (req/s), ขนาด response,
+peak RSS (เฉพาะโหมด test client ซึ่งรันใน process เดียวกัน)
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+ADMIN_USERNAME = "bench-admin"
+ADMIN_PASSWORD = "bench-admin-123"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return round(values[k] * 1000, 2)
+
+
+def peak_rss_mb() -> float:
+    # Linux: ru_maxrss เป็น KB
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+# ---------------- clients ---------------- #
+
+class TestClient:
+    mode = "test_client"
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path, token):
+        res = self.client.get(path, headers={"Authorization": f"Bearer {token}"})
+        return res.status_code, len(res.get_data())
+
+
+class HttpClient:
+    mode = "server"
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def _open(self, req):
+        try:
+            with urllib.request.urlopen(req, timeout=600) as res:
+                return res.status, res.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def get(self, path, token):
+        req = urllib.request.Request(self.base_url + path, headers={"Authorization": f"Bearer {token}"})
+        status, body = self._open(req)
+        return status, len(body)
+
+
+# ---------------- scenarios ---------------- #
+
+def build_scenarios(recent_booking_id):
+    today = dt.date.today()
+    month_ago = (today - dt.timedelta(days=30)).isoformat()
+    year_ago = (today - dt.timedelta(days=365)).isoformat()
+    month = f"start_date={month_ago}&end_date={today.isoformat()}"
+    year = f"start_date={year_ago}&end_date={today.isoformat()}"
+
+    # (name, path, token key, iterations factor)
+    return [
+        ("my_bookings", "/api/bookings/my", "user", 1.0),
+        ("list_companies", "/api/bookings/companies", "user", 1.0),
+        ("admin_bookings_all", "/api/admin/bookings", "admin", 0.2),
+        ("report_month", f"/api/admin/report?{month}", "admin", 1.0),
+        ("report_year_success", f"/api/admin/report?{year}&status=SUCCESS", "admin", 0.2),
+        ("report_excel_month", f"/api/admin/report/excel?{month}", "admin", 0.2),
+        ("report_pdf_month", f"/api/admin/report/pdf?{month}", "admin", 0.2),
+        ("booking_pdf", f"/api/bookings/{recent_booking_id}/pdf", "user", 1.0),
+        ("summary", "/api/admin/summary", "admin", 1.0),
+        ("stats_daily_bookings", "/api/admin/stats/daily-bookings", "admin", 1.0),
+        ("stats_bookings_by_company", "/api/admin/stats/bookings-by-company", "admin", 1.0),
+        ("stats_bookings_by_status", "/api/admin/stats/bookings-by-status", "admin", 1.0),
+    ]
+
+
+def run_scenario(client, path, token, iterations, warmup):
+    for _ in range(warmup):
+        client.get(path, token)
+
+    timings, size, errors = [], 0, 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        status, size = client.get(path, token)
+        timings.append(time.perf_counter() - t0)
+        if status >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "p99_ms": percentile(timings, 99),
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 2),
+        "throughput_rps": round(iterations / elapsed, 2) if elapsed else None,
+        "response_bytes": size,
+        "peak_rss_mb": peak_rss_mb() if client.mode == "test_client" else None,
+    }
+
+
+def compare(current, previous_path):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)["scenarios"]
+    print(f"{'scenario':32} {'p50 old':>10} {'p50 new':>10} {'change':>8}")
+    for name, res in current.items():
+        old = previous.get(name)
+        if not old:
+            continue
+        change = (res["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0
+        print(f"{name:32} {old['p50_ms']:>10} {res['p50_ms']:>10} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--generate", action="store_true", help="สร้างข้อมูลจำลองก่อนรัน")
+    parser.add_argument("--companies", type=int, default=20)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=50000)
+    parser.add_argument("--base-url", help="ยิงผ่าน server ที่รันอยู่แทน test client")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", help="รันเฉพาะ scenario (คั่นด้วย ,)")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="ไฟล์ผลรอบก่อนสำหรับเทียบ p50")
+    args = parser.parse_args()
+
+    if args.generate and not os.getenv("DATABASE_URL"):
+        os.environ["DATABASE_URL"] = "sqlite:///" + tempfile.mktemp(suffix=".db")
+
+    from sqlalchemy import func
+
+    from app import create_app
+    from models import db, Booking, User
+
+    app = create_app()
+    with app.app_context():
+        if args.generate:
+            from datagen import generate
+
+            t0 = time.perf_counter()
+            generate(args.companies, args.users, args.bookings)
+            print(f">>> generated dataset in {time.perf_counter() - t0:.1f}s")
+
+        if not User.query.filter_by(username=ADMIN_USERNAME).first():
+            admin = User(username=ADMIN_USERNAME, full_name="Benchmark Admin", role="ADMIN", is_active=True)
+            admin.set_password(ADMIN_PASSWORD)
+            db.session.add(admin)
+            db.session.commit()
+
+        # user ที่มี booking เยอะที่สุด = กรณีหนักสุดของ /bookings/my
+        heavy_user_id, heavy_count = (
+            db.session.query(Booking.created_by, func.count())
+            .group_by(Booking.created_by)
+            .order_by(func.count().desc())
+            .first()
+        )
+        heavy_user = db.session.get(User, heavy_user_id)
+        recent_booking_id = db.session.query(func.max(Booking.id)).scalar()
+        dataset = {
+            "bookings": Booking.query.count(),
+            "users": User.query.count(),
+            "heavy_user_bookings": heavy_count,
+        }
+
+        # login ผ่าน token ตรง ๆ ไม่ต้องรู้รหัสของ user จำลอง
+        from flask_jwt_extended import create_access_token
+
+        tokens = {
+            "admin": create_access_token(identity=str(User.query.filter_by(username=ADMIN_USERNAME).first().id)),
+            "user": create_access_token(identity=str(heavy_user.id)),
+        }
+
+    client = HttpClient(args.base_url) if args.base_url else TestClient(app)
+    only = set(args.only.split(",")) if args.only else None
+
+    results = {}
+    for name, path, who, factor in build_scenarios(recent_booking_id):
+        if only and name not in only:
+            continue
+        iterations = max(1, int(args.iterations * factor))
+        results[name] = run_scenario(client, path, tokens[who], iterations, args.warmup)
+        r = results[name]
+        print(f"{name:32} p50={r['p50_ms']:>9}ms p95={r['p95_ms']:>9}ms rps={r['throughput_rps']}")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": dt.datetime.utcnow().isoformat(),
+            "mode": client.mode,
+            "database": app.config["SQLALCHEMY_DATABASE_URI"].split("://")[0],
+            "dataset": dataset,
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "scenarios": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f">>> results written to {args.out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
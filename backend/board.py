@@ -0,0 +1,368 @@
+# board.py
+"""
+Dispatch board: booking ของวันนี้ / พรุ่งนี้ในหน่วยความจำของ worker
+
+    GET /api/admin/dispatch/board?date=YYYY-MM-DD[&status=PENDING]   (default วันนี้)
+
+- ช่วงวันที่ (rolling window) = วันนี้ - DISPATCH_BOARD_PAST_DAYS .. วันนี้ + DISPATCH_BOARD_DAYS
+  ข้ามเที่ยงคืน → โหลด window ใหม่ทั้งชุด (ไม่กี่วัน, query เดียว)
+- เก็บแบบ compact: BoardEntry (__slots__) เฉพาะ field ที่หน้า MessengerSchedulePage ใช้
+  จัดกลุ่มตามวันที่ → {booking id: entry}, JSON ของแต่ละวันถูก cache ไว้จนกว่าวันนั้นจะเปลี่ยน
+- warm ตอน start (init_app) — ถ้ายังไม่มีตาราง (เช่นก่อน create_all) จะโหลดตอน request แรกแทน
+- อัปเดตจาก signal booking_changed (create_booking / update_status / occurrence) ไม่ต้อง query
+- worker อื่นเขียนได้ → ทุก DISPATCH_BOARD_SYNC_INTERVAL วินาทีดึงเฉพาะแถวที่ updated_at
+  ขยับ (index ix_bookings_updated_at_id) + booking_tombstones + occurrence ของ booking ซ้ำ
+  (0 = ปิด: ใช้ได้เมื่อรัน worker เดียว)
+- occurrence ของ booking ซ้ำที่ยังไม่ materialize อยู่บน board ด้วย (virtual = true)
+"""
+
+import datetime as dt
+import logging
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from capacity import SLOTS, slot_of
+from metrics import registry
+from models import db, Booking, BookingTombstone, Company
+from signals import booking_changed
+import series as booking_series
+
+log = logging.getLogger("booking.board")
+
+board_entries = registry.gauge("dispatch_board_entries", "Bookings held in the in-memory dispatch board")
+board_loads = registry.counter(
+    "dispatch_board_loads_total", "Dispatch board reloads from the database", ("reason",)
+)
+
+_slot_order = {slot: i for i, slot in enumerate(SLOTS)}
+
+
+class BoardEntry:
+    """booking (หรือ occurrence) หนึ่งงานบน board"""
+
+    __slots__ = (
+        "id",
+        "booking_date",
+        "booking_time",
+        "slot",
+        "status",
+        "company_id",
+        "company_name",
+        "requester_name",
+        "job_type",
+        "detail",
+        "department",
+        "building",
+        "floor",
+        "contact_name",
+        "contact_phone",
+        "messenger_id",
+        "messenger_name",
+        "approved_by",
+        "approved_at",
+        "updated_at",
+        "series_id",
+    )
+
+    def __init__(self, b, company_name: str, series_id: int = None):
+        """b = Booking หรือ series.Occurrence (attribute ชื่อเดียวกัน)"""
+        self.id = b.id
+        self.booking_date = b.booking_date
+        self.booking_time = b.booking_time
+        self.slot = slot_of(b.booking_time)
+        self.status = b.status
+        self.company_id = b.company_id
+        self.company_name = company_name
+        self.requester_name = b.requester_name
+        self.job_type = b.job_type
+        self.detail = b.detail
+        self.department = b.department
+        self.building = b.building
+        self.floor = b.floor
+        self.contact_name = b.contact_name
+        self.contact_phone = b.contact_phone
+        self.messenger_id = b.messenger_id
+        self.messenger_name = b.messenger_name
+        self.approved_by = b.approved_by
+        self.approved_at = b.approved_at
+        self.updated_at = b.updated_at
+        self.series_id = series_id
+
+    def sort_key(self):
+        return (_slot_order[self.slot], self.booking_time, str(self.id))
+
+    def to_dict(self):
+        """key เดียวกับ to_dict_list ของ /admin/bookings (ยกเว้น object company)"""
+        data = {
+            "id": self.id,
+            "booking_date": self.booking_date.isoformat(),
+            "booking_time": self.booking_time.strftime("%H:%M"),
+            "slot": self.slot,
+            "status": self.status,
+            "company_id": self.company_id,
+            "company_name": self.company_name,
+            "requester_name": self.requester_name,
+            "job_type": self.job_type,
+            "detail": self.detail,
+            "department": self.department,
+            "building": self.building,
+            "floor": self.floor,
+            "contact_name": self.contact_name,
+            "contact_phone": self.contact_phone,
+            "messenger_id": self.messenger_id,
+            "messenger_name": self.messenger_name,
+            "approved_by_name": self.messenger_name,
+            "approved_by": self.approved_by,
+            "approved_at": self.approved_at.isoformat() if self.approved_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+        if self.series_id is not None:
+            data["series_id"] = self.series_id
+            data["occurrence_date"] = data["booking_date"]
+            data["virtual"] = True
+        return data
+
+
+class DispatchBoard:
+    def __init__(self):
+        self._lock = threading.Lock()  # ข้อมูลใน board
+        self._refresh_lock = threading.Lock()  # มีแค่ thread เดียวที่โหลดจาก DB
+        self._today = None
+        self._bookings = {}  # date -> {booking id: BoardEntry}
+        self._occurrences = {}  # date -> [BoardEntry] (virtual)
+        self._dates = {}  # booking id -> date (หา entry เดิมตอนวันที่เปลี่ยน)
+        self._json = {}  # date -> bytes ของ board ทั้งวัน
+        self._version = 0  # เพิ่มทุกครั้งที่ board เปลี่ยน (กัน cache JSON ที่สร้างจากข้อมูลเก่า)
+        self._stale_occurrences = set()
+        self._watermark = None  # updated_at (UTC) ของรอบ sync ถัดไป
+        self._synced_at = 0.0
+        self.past_days = 0
+        self.days = 1
+        self.sync_interval = 5
+
+    def init_app(self, app):
+        cfg = app.config
+        self.past_days = cfg.get("DISPATCH_BOARD_PAST_DAYS", 0)
+        self.days = cfg.get("DISPATCH_BOARD_DAYS", 1)
+        self.sync_interval = cfg.get("DISPATCH_BOARD_SYNC_INTERVAL", 5)
+        booking_changed.connect(self._on_booking_changed, sender=app, weak=False)
+
+        with app.app_context():
+            try:
+                self.ensure()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                log.info("dispatch board not warmed, loading on first request", extra={"error": str(e)})
+
+    def window(self, today: dt.date = None):
+        today = today or self._today or dt.date.today()
+        return (
+            today - dt.timedelta(days=self.past_days),
+            today + dt.timedelta(days=self.days),
+        )
+
+    # ---------------- load / sync ---------------- #
+
+    def ensure(self):
+        """เรียกทุก request: ปกติไม่แตะ DB (เช็คแค่วันที่ / เวลา sync)"""
+        today = dt.date.today()
+        due = self.sync_interval > 0 and time.monotonic() - self._synced_at >= self.sync_interval
+        if today == self._today and not due and not self._stale_occurrences:
+            return
+
+        with self._refresh_lock:
+            if today != self._today:
+                self._roll(today)
+            elif self.sync_interval > 0 and time.monotonic() - self._synced_at >= self.sync_interval:
+                self._sync()
+            if self._stale_occurrences:
+                with self._lock:
+                    days, self._stale_occurrences = self._stale_occurrences, set()
+                self._load_occurrences(min(days), max(days))
+
+    def _roll(self, today: dt.date):
+        """โหลดทั้ง window ใหม่ (ตอน warm / ข้ามวัน) — ไม่กี่วัน query เดียว"""
+        reason = "warm" if self._today is None else "rollover"
+        lo, hi = self.window(today)
+        # watermark ก่อน query → แถวที่เขียนระหว่างโหลดจะมาอีกครั้งตอน sync (upsert ซ้ำได้)
+        watermark = dt.datetime.utcnow()
+        fresh = {lo + dt.timedelta(days=i): {} for i in range((hi - lo).days + 1)}
+        rows = (
+            db.session.query(Booking, Company.name)
+            .join(Company, Booking.company_id == Company.id)
+            .filter(Booking.booking_date >= lo, Booking.booking_date <= hi)
+            .all()
+        )
+        for b, company_name in rows:
+            fresh[b.booking_date][b.id] = BoardEntry(b, company_name)
+
+        with self._lock:
+            self._bookings = fresh
+            self._dates = {booking_id: day for day, entries in fresh.items() for booking_id in entries}
+            self._occurrences = {}
+            self._json = {}
+            self._version += 1
+            self._watermark = watermark
+            self._today = today
+        self._load_occurrences(lo, hi)
+        self._synced_at = time.monotonic()
+        board_loads.inc(reason=reason)
+        self._update_gauge()
+
+    def _sync(self):
+        """แถวที่ worker อื่นเขียน / ลบ ตั้งแต่รอบก่อน"""
+        lo, hi = self.window()
+        safety = dt.timedelta(seconds=current_app.config["SYNC_SAFETY_SECONDS"])
+        since = self._watermark - safety
+        watermark = dt.datetime.utcnow()
+
+        rows = (
+            db.session.query(Booking, Company.name)
+            .join(Company, Booking.company_id == Company.id)
+            .filter(Booking.updated_at >= since)
+            .all()
+        )
+        deleted = (
+            db.session.query(BookingTombstone.booking_id)
+            .filter(BookingTombstone.deleted_at >= since)
+            .all()
+        )
+        for b, company_name in rows:
+            self._put(BoardEntry(b, company_name))
+        for (booking_id,) in deleted:
+            self._remove(booking_id)
+
+        with self._lock:
+            self._watermark = watermark
+        # series แก้ไข / ข้ามวัน / materialize จาก worker อื่น
+        self._load_occurrences(lo, hi)
+        self._synced_at = time.monotonic()
+        board_loads.inc(reason="sync")
+        self._update_gauge()
+
+    def _load_occurrences(self, lo: dt.date, hi: dt.date):
+        fresh = {lo + dt.timedelta(days=i): [] for i in range((hi - lo).days + 1)}
+        for occ, company in booking_series.expand(lo, hi):
+            if occ.booking_date in fresh:
+                fresh[occ.booking_date].append(
+                    BoardEntry(occ, company.name if company else None, series_id=occ.series.id)
+                )
+        with self._lock:
+            for day, entries in fresh.items():
+                if day in self._bookings:
+                    self._occurrences[day] = entries
+                    self._json.pop(day, None)
+            self._version += 1
+
+    # ---------------- write hooks ---------------- #
+
+    def invalidate_occurrences(self, day: dt.date = None):
+        """
+        series สร้าง / หยุด / ข้ามวัน → expand occurrence วันนั้นใหม่ตอน request ถัดไป
+        day = None → ทุกวันใน window
+        """
+        with self._lock:
+            if day is None:
+                self._stale_occurrences.update(self._bookings)
+            elif day in self._bookings:
+                self._stale_occurrences.add(day)
+
+    def _on_booking_changed(self, sender, booking, action):
+        try:
+            company = booking.company
+            self._put(BoardEntry(booking, company.name if company else None))
+            if action == "created":
+                # อาจเป็น occurrence ที่เพิ่ง materialize → expand วันนั้นใหม่ตอน request ถัดไป
+                with self._lock:
+                    if booking.booking_date in self._bookings:
+                        self._stale_occurrences.add(booking.booking_date)
+            self._update_gauge()
+        except Exception:
+            # board เป็นแค่ view — พังแล้วไม่ควรทำให้ request ที่ commit แล้ว error
+            log.exception("dispatch board update failed")
+
+    def _put(self, entry: BoardEntry):
+        with self._lock:
+            self._version += 1
+            old = self._dates.pop(entry.id, None)
+            if old is not None:
+                self._bookings[old].pop(entry.id, None)
+                self._json.pop(old, None)
+            day = self._bookings.get(entry.booking_date)
+            if day is not None:
+                day[entry.id] = entry
+                self._dates[entry.id] = entry.booking_date
+                self._json.pop(entry.booking_date, None)
+
+    def _remove(self, booking_id: int):
+        with self._lock:
+            old = self._dates.pop(booking_id, None)
+            if old is not None:
+                self._version += 1
+                self._bookings[old].pop(booking_id, None)
+                self._json.pop(old, None)
+
+    def _update_gauge(self):
+        with self._lock:
+            board_entries.set(
+                len(self._dates) + sum(len(entries) for entries in self._occurrences.values())
+            )
+
+    # ---------------- read ---------------- #
+
+    def _snapshot(self, day: dt.date):
+        """(entries เรียงตาม slot / เวลา, version) — entries = None ถ้าวันที่อยู่นอก window"""
+        with self._lock:
+            bookings = self._bookings.get(day)
+            if bookings is None:
+                return None, self._version
+            entries = list(bookings.values()) + self._occurrences.get(day, [])
+            version = self._version
+        entries.sort(key=BoardEntry.sort_key)
+        return entries, version
+
+    def payload(self, day: dt.date, entries):
+        lo, hi = self.window()
+        slots = {slot: [] for slot in SLOTS}
+        counts = {}
+        for entry in entries:
+            slots[entry.slot].append(entry.to_dict())
+            counts[entry.status] = counts.get(entry.status, 0) + 1
+        return {
+            "date": day.isoformat(),
+            "window": {"start": lo.isoformat(), "end": hi.isoformat()},
+            "total": len(entries),
+            "counts": dict(sorted(counts.items())),
+            "slots": slots,
+        }
+
+    def board_json(self, day: dt.date, status: str = None):
+        """
+        JSON (bytes) ของ board วันนั้น — None ถ้าวันที่อยู่นอก window
+        ไม่กรอง status → ใช้ cache ของวัน (สร้างใหม่เมื่อวันนั้นเปลี่ยนเท่านั้น)
+        """
+        self.ensure()
+        if status is None:
+            with self._lock:
+                cached = self._json.get(day)
+            if cached is not None:
+                return cached
+
+        entries, version = self._snapshot(day)
+        if entries is None:
+            return None
+        if status is not None:
+            entries = [e for e in entries if e.status == status]
+        body = current_app.json.dumps(self.payload(day, entries)).encode()
+        if status is None:
+            with self._lock:
+                # ระหว่าง serialize มีการเขียน → ไม่ cache (request ถัดไปสร้างใหม่)
+                if version == self._version:
+                    self._json[day] = body
+        return body
+
+
+dispatch_board = DispatchBoard()
@@ -0,0 +1,332 @@
+# cache.py
+"""
+Cache ผลลัพธ์ของ report / stats (ใช้ร่วมกันได้หลาย worker)
+
+    @cached_result("report")
+    def report(): ...
+
+key = endpoint + query string ที่ normalize แล้ว (เรียง key, ตัดค่าว่าง) + generation
+- generation เพิ่มทุกครั้งที่มี booking ถูกเขียน (signal booking_changed)
+  → entry เก่าทั้งหมดใช้ไม่ได้ทันที ไม่ต้องไล่ลบทีละ key
+- single-flight: key ที่ยังไม่มีใน cache มีแค่ worker เดียวที่คำนวณ
+  ที่เหลือรอผลจาก cache (ไม่เกิน CACHE_LOCK_TIMEOUT แล้วคำนวณเอง)
+  lock ถูกปล่อยแต่ไม่มีผลใน cache (error / ไม่ใช่ 200 / ttl 0) → เลิกรอ คำนวณเองทันที
+- cache เฉพาะ response 200
+- ผลที่อ่านจาก read replica (replica.py) อาจช้ากว่า generation ที่ใช้เป็น key
+  → เก็บแค่ CACHE_REPLICA_TTL วินาที (0 = ไม่ cache)
+
+backend เลือกผ่าน CACHE_BACKEND:
+  "memory"               → MemoryCacheBackend (LRU ต่อ worker)
+  "sqlite"               → SQLiteCacheBackend (ไฟล์ CACHE_SQLITE_PATH ใช้ร่วมกันทุก worker บนเครื่องเดียว)
+  "package.module:Class" → backend อื่น (เช่น network cache) ที่มี method
+                           get / set / add_lock / release_lock / generation / bump_generation
+                           (+ has_lock ถ้ามี — ไม่มีจะเช็คด้วย add_lock แล้วปล่อยทันที)
+  "none"                 → ปิด cache
+"""
+
+import importlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import Response, g, make_response, request
+
+from metrics import registry
+from signals import booking_changed
+
+log = logging.getLogger("booking.cache")
+
+cache_requests = registry.counter(
+    "result_cache_requests_total", "Report/stats result cache lookups", ("endpoint", "result")
+)
+
+
+# ---------------- backends ---------------- #
+
+class MemoryCacheBackend:
+    def __init__(self, app=None):
+        cfg = app.config if app is not None else {}
+        self.max_entries = cfg.get("CACHE_MAX_ENTRIES", 256)
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires, value)
+        self._locks = {}  # key -> expires
+        self._generation = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value: bytes, ttl: float):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def add_lock(self, key, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            if self._locks.get(key, 0) > now:
+                return False
+            self._locks[key] = now + ttl
+            return True
+
+    def release_lock(self, key):
+        with self._lock:
+            self._locks.pop(key, None)
+
+    def has_lock(self, key) -> bool:
+        with self._lock:
+            return self._locks.get(key, 0) > time.time()
+
+    def generation(self) -> int:
+        return self._generation
+
+    def bump_generation(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+
+class SQLiteCacheBackend:
+    """ไฟล์ SQLite (WAL) บนเครื่อง — ทุก worker / process เปิดไฟล์เดียวกัน"""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires REAL)",
+        "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, expires REAL)",
+        "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)",
+    )
+    # ลบ entry หมดอายุทุก ๆ N ครั้งที่ set
+    PRUNE_EVERY = 100
+
+    def __init__(self, app=None):
+        cfg = app.config if app is not None else {}
+        self.path = cfg.get("CACHE_SQLITE_PATH") or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "cache.sqlite3"
+        )
+        self._local = threading.local()
+        self._sets = 0
+        conn = self._conn()
+        with conn:
+            for stmt in self.SCHEMA:
+                conn.execute(stmt)
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('generation', 0)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value: bytes, ttl: float):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, value, now + ttl),
+        )
+        self._sets += 1
+        if self._sets % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+
+    def add_lock(self, key, ttl: float) -> bool:
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM locks WHERE key = ? AND expires <= ?", (key, now))
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO locks (key, expires) VALUES (?, ?)", (key, now + ttl)
+            )
+        return cur.rowcount == 1
+
+    def release_lock(self, key):
+        self._conn().execute("DELETE FROM locks WHERE key = ?", (key,))
+
+    def has_lock(self, key) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM locks WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def generation(self) -> int:
+        row = self._conn().execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def bump_generation(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'generation'")
+            conn.execute("DELETE FROM cache")
+
+
+BACKENDS = {"memory": MemoryCacheBackend, "sqlite": SQLiteCacheBackend}
+
+
+# ---------------- extension ---------------- #
+
+class ResultCache:
+    def __init__(self):
+        self.backend = None
+        self.ttl = 60
+        self.replica_ttl = 5
+        self.lock_timeout = 30
+
+    def init_app(self, app):
+        cfg = app.config
+        name = cfg.get("CACHE_BACKEND", "memory")
+        self.ttl = cfg.get("CACHE_TTL", 60)
+        self.replica_ttl = cfg.get("CACHE_REPLICA_TTL", 5)
+        self.lock_timeout = cfg.get("CACHE_LOCK_TIMEOUT", 30)
+        if name == "none":
+            self.backend = None
+            return
+        if name in BACKENDS:
+            backend_cls = BACKENDS[name]
+        else:
+            module_name, _, cls_name = name.partition(":")
+            backend_cls = getattr(importlib.import_module(module_name), cls_name)
+        self.backend = backend_cls(app)
+        booking_changed.connect(self._on_booking_changed, sender=app, weak=False)
+
+    def _on_booking_changed(self, sender, booking, action):
+        self.invalidate()
+
+    def invalidate(self):
+        if self.backend is None:
+            return
+        try:
+            self.backend.bump_generation()
+        except Exception as e:
+            log.warning("cache invalidate failed", extra={"error": str(e)})
+
+    def key_for(self, endpoint: str) -> str:
+        params = sorted((k, v) for k, v in request.args.items(multi=True) if v != "")
+        return f"{endpoint}:{self.backend.generation()}:{urlencode(params)}"
+
+    def get_or_compute(self, endpoint, key, compute):
+        """compute() → (body bytes, status, ttl) — ttl None = CACHE_TTL"""
+        cached = self.backend.get(key)
+        if cached is not None:
+            cache_requests.inc(endpoint=endpoint, result="hit")
+            return cached, "HIT"
+
+        if not self.backend.add_lock(key, self.lock_timeout):
+            # worker อื่นกำลังคำนวณ key นี้ → รอผล
+            deadline = time.monotonic() + self.lock_timeout
+            delay = 0.01
+            while time.monotonic() < deadline:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.2)
+                cached = self.backend.get(key)
+                if cached is not None:
+                    cache_requests.inc(endpoint=endpoint, result="wait")
+                    return cached, "WAIT"
+                if not self._lock_held(key):
+                    # worker แรกเสร็จแล้ว: อาจ set ก่อนปล่อย lock พอดี → ดูอีกครั้ง
+                    # ไม่มี = ไม่ได้ cache (error / ไม่ใช่ 200 / ttl 0) → ไม่ต้องรอต่อ
+                    cached = self.backend.get(key)
+                    if cached is not None:
+                        cache_requests.inc(endpoint=endpoint, result="wait")
+                        return cached, "WAIT"
+                    break
+            return self._compute(endpoint, key, compute, locked=False)
+        return self._compute(endpoint, key, compute, locked=True)
+
+    def _lock_held(self, key) -> bool:
+        has_lock = getattr(self.backend, "has_lock", None)
+        if has_lock is not None:
+            return has_lock(key)
+        if self.backend.add_lock(key, self.lock_timeout):
+            self.backend.release_lock(key)
+            return False
+        return True
+
+    def _compute(self, endpoint, key, compute, locked):
+        cache_requests.inc(endpoint=endpoint, result="miss")
+        try:
+            body, status, ttl = compute()
+            ttl = self.ttl if ttl is None else ttl
+            if status == 200 and ttl > 0:
+                self.backend.set(key, body, ttl)
+            return body if status == 200 else None, "MISS"
+        finally:
+            if locked:
+                self.backend.release_lock(key)
+
+
+result_cache = ResultCache()
+
+
+class _ViewError(Exception):
+    """ห่อ exception จาก route ให้แยกจาก error ของ cache backend"""
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+def cached_result(endpoint: str):
+    """
+    decorator ของ route JSON ที่อ่านอย่างเดียวและผลไม่ขึ้นกับ user ที่เรียก
+    วางหลัง @admin_required (ตรวจสิทธิ์ก่อนทุกครั้ง)
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if result_cache.backend is None:
+                return fn(*args, **kwargs)
+
+            response = None
+
+            def compute():
+                nonlocal response
+                try:
+                    response = make_response(fn(*args, **kwargs))
+                except Exception as e:
+                    raise _ViewError(e) from e
+                # replica_read ตั้ง g._read_replica ไว้ถ้า route นี้อ่านจาก replica
+                ttl = result_cache.replica_ttl if g.get("_read_replica") else None
+                return response.get_data(), response.status_code, ttl
+
+            try:
+                key = result_cache.key_for(endpoint)
+                body, state = result_cache.get_or_compute(endpoint, key, compute)
+            except _ViewError as e:
+                # error ของ route เอง → ส่งต่อตามปกติ (ไม่รัน route ซ้ำ)
+                raise e.error
+            except Exception as e:
+                # cache backend พัง → ตอบจาก DB ตรง ๆ
+                log.warning("result cache unavailable", extra={"error": str(e)})
+                return response if response is not None else fn(*args, **kwargs)
+
+            if response is None:
+                response = Response(body, mimetype="application/json")
+            response.headers["X-Cache"] = state
+            return response
+
+        return wrapper
+
+    return decorator
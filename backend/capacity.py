@@ -0,0 +1,261 @@
+# capacity.py
+"""
+Messenger capacity ต่อ slot (ช่วงเช้า / ช่วงบ่าย / ไม่ระบุเวลา)
+
+- slot ได้มาจาก booking_time (sentinel 11:59:59, 16:29:59, 00:00:00)
+- rule ความจุอยู่ในตาราง slot_capacities (ต่อ company / building / slot)
+- นับรวม occurrence ของ booking ซ้ำ (series.py) ที่ยังไม่ materialize ด้วย
+- SlotOccupancyIndex เก็บจำนวนงานต่อ slot ไว้ใน memory ของ worker
+  ใช้ตอบ availability เท่านั้น (เป็น hint — อาจช้ากว่า DB ได้ถึง SLOT_INDEX_TTL
+  และ worker อื่นไม่ได้ invalidate) การ reject ทุกครั้งมาจาก locked_full_rule
+- reserve_lock + SELECT ... FOR UPDATE บน rule ทำให้การเช็ค + insert เป็น atomic
+"""
+
+import datetime as dt
+import threading
+import time as _time
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import and_, func, or_
+
+from models import db, Booking, SlotCapacity
+from series import occurrence_counts
+
+SLOT_MORNING = "MORNING"
+SLOT_AFTERNOON = "AFTERNOON"
+SLOT_ANY = "ANY"
+SLOTS = (SLOT_MORNING, SLOT_AFTERNOON, SLOT_ANY)
+
+MIDNIGHT = dt.time(0, 0, 0)
+NOON = dt.time(12, 0, 0)
+
+# สถานะที่ยังนับว่าใช้ messenger อยู่
+ACTIVE_STATUSES = ("PENDING", "SUCCESS")
+
+
+def slot_of(t: dt.time) -> str:
+    """แปลง booking_time → slot (ให้ตรงกับ format_booking_time ใน PDF)"""
+    if t is None or t.replace(microsecond=0) == MIDNIGHT:
+        return SLOT_ANY
+    return SLOT_MORNING if t < NOON else SLOT_AFTERNOON
+
+
+def slot_clause(slot: str):
+    """เงื่อนไข SQL ของ booking_time ที่อยู่ใน slot นั้น"""
+    if slot == SLOT_ANY:
+        return Booking.booking_time == MIDNIGHT
+    if slot == SLOT_MORNING:
+        return and_(Booking.booking_time > MIDNIGHT, Booking.booking_time < NOON)
+    return Booking.booking_time >= NOON
+
+
+def rule_matches(rule, company_id, building, slot) -> bool:
+    return (
+        (rule.company_id is None or rule.company_id == company_id)
+        and (rule.building is None or rule.building == building)
+        and (rule.slot is None or rule.slot == slot)
+    )
+
+
+# ---------------- In-memory occupancy index ---------------- #
+
+class SlotOccupancyIndex:
+    """
+    จำนวน booking ที่ active ต่อ (วันที่, slot, company_id, building)
+    โหลดจาก DB ทีละช่วงวันด้วย GROUP BY ครั้งเดียว และหมดอายุตาม ttl
+    (worker อื่นเขียนเพิ่มได้ ค่าจึงเป็น hint ส่วนการเช็คจริงทำใน DB)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # date -> (loaded_at, {(slot, company_id, building): count})
+        self._days = {}
+
+    def _ttl(self) -> int:
+        return current_app.config.get("SLOT_INDEX_TTL", 30)
+
+    def ensure(self, start: dt.date, end: dt.date):
+        now = _time.monotonic()
+        ttl = self._ttl()
+        with self._lock:
+            stale = [
+                start + dt.timedelta(days=i)
+                for i in range((end - start).days + 1)
+                if (start + dt.timedelta(days=i)) not in self._days
+                or now - self._days[start + dt.timedelta(days=i)][0] > ttl
+            ]
+        if not stale:
+            return
+
+        lo, hi = min(stale), max(stale)
+        rows = (
+            db.session.query(
+                Booking.booking_date,
+                Booking.booking_time,
+                Booking.company_id,
+                Booking.building,
+                func.count(),
+            )
+            .filter(
+                Booking.booking_date >= lo,
+                Booking.booking_date <= hi,
+                Booking.status.in_(ACTIVE_STATUSES),
+            )
+            .group_by(
+                Booking.booking_date,
+                Booking.booking_time,
+                Booking.company_id,
+                Booking.building,
+            )
+            .all()
+        )
+
+        fresh = {lo + dt.timedelta(days=i): defaultdict(int) for i in range((hi - lo).days + 1)}
+        for d, t, company_id, building, count in rows:
+            fresh[d][(slot_of(t), company_id, building or "")] += count
+        # occurrence ของ booking ซ้ำที่ยังไม่ materialize ก็ใช้ messenger เหมือนกัน
+        for (d, t, company_id, building), count in occurrence_counts(lo, hi).items():
+            fresh[d][(slot_of(t), company_id, building)] += count
+
+        with self._lock:
+            for d, counts in fresh.items():
+                self._days[d] = (now, counts)
+
+    def count(self, day: dt.date, slot: str, rule) -> int:
+        with self._lock:
+            entry = self._days.get(day)
+            if not entry:
+                return 0
+            return sum(
+                n
+                for (s, company_id, building), n in entry[1].items()
+                if rule_matches(rule, company_id, building, slot) and s == slot
+            )
+
+    def add(self, day: dt.date, slot: str, company_id: int, building: str, delta: int = 1):
+        with self._lock:
+            entry = self._days.get(day)
+            if entry:
+                entry[1][(slot, company_id, building or "")] += delta
+
+    def invalidate(self, day: dt.date = None):
+        with self._lock:
+            if day is None:
+                self._days.clear()
+            else:
+                self._days.pop(day, None)
+
+
+slot_index = SlotOccupancyIndex()
+
+# กัน request ใน worker เดียวกันเช็ค + insert ซ้อนกัน
+reserve_lock = threading.Lock()
+
+
+# ---------------- Capacity check ---------------- #
+
+def matching_rules(company_id, building, slot, for_update=False):
+    q = SlotCapacity.query.filter(
+        SlotCapacity.is_active.is_(True),
+        or_(SlotCapacity.company_id.is_(None), SlotCapacity.company_id == company_id),
+        or_(SlotCapacity.building.is_(None), SlotCapacity.building == (building or "")),
+        or_(SlotCapacity.slot.is_(None), SlotCapacity.slot == slot),
+    ).order_by(SlotCapacity.id)
+    if for_update:
+        # Postgres: ล็อก row ของ rule ไว้จน commit → worker อื่นต้องรอ
+        q = q.with_for_update()
+    return q.all()
+
+
+def count_for_rule(rule, start: dt.date, end: dt.date, slot: str, virtual) -> dict:
+    """
+    {date: จำนวนงาน active} ใน [start, end] ที่ rule นี้ครอบคลุม — GROUP BY ครั้งเดียวทั้งช่วง
+    virtual = occurrence_counts(start, end) (expand series ครั้งเดียวแล้วใช้ร่วมกันทุก rule)
+    """
+    q = db.session.query(Booking.booking_date, func.count()).filter(
+        Booking.booking_date >= start,
+        Booking.booking_date <= end,
+        slot_clause(slot),
+        Booking.status.in_(ACTIVE_STATUSES),
+    )
+    if rule.company_id is not None:
+        q = q.filter(Booking.company_id == rule.company_id)
+    if rule.building is not None:
+        q = q.filter(Booking.building == rule.building)
+    counts = defaultdict(int, q.group_by(Booking.booking_date).all())
+    for (d, t, company_id, building), n in virtual.items():
+        if slot_of(t) == slot and rule_matches(rule, company_id, building, slot):
+            counts[d] += n
+    return counts
+
+
+def locked_full_day(company_id, building, days, slot):
+    """
+    เช็คจริงหลายวันพร้อมกันใน transaction ปัจจุบัน (ต้องเรียกภายใต้ reserve_lock
+    แล้ว insert + commit ต่อทันที) → คืน (วันแรกที่เต็ม, rule) หรือ None
+    """
+    days = sorted(days)
+    if not days:
+        return None
+    rules = matching_rules(company_id, building, slot, for_update=True)
+    if not rules:
+        return None
+
+    start, end = days[0], days[-1]
+    virtual = occurrence_counts(start, end)
+    first = None
+    for rule in rules:
+        counts = count_for_rule(rule, start, end, slot, virtual)
+        for day in days:
+            if counts[day] >= rule.capacity:
+                if first is None or day < first[0]:
+                    first = (day, rule)
+                break
+    return first
+
+
+def locked_full_rule(company_id, building, day, slot):
+    """locked_full_day ของวันเดียว → คืน rule ที่เต็มแล้ว หรือ None"""
+    full = locked_full_day(company_id, building, [day], slot)
+    return full[1] if full else None
+
+
+def availability(start: dt.date, end: dt.date, company_id=None, building=None):
+    """
+    ความจุคงเหลือต่อวัน/slot สำหรับ company + building ที่ระบุ
+    remaining = None หมายถึงไม่มี rule จำกัด
+    """
+    rules = [
+        r
+        for r in SlotCapacity.query.filter(SlotCapacity.is_active.is_(True)).all()
+        if r.company_id in (None, company_id) and r.building in (None, building)
+    ]
+    slot_index.ensure(start, end)
+
+    days = []
+    for i in range((end - start).days + 1):
+        day = start + dt.timedelta(days=i)
+        slots = {}
+        for slot in SLOTS:
+            best = None
+            for rule in rules:
+                if rule.slot not in (None, slot):
+                    continue
+                booked = slot_index.count(day, slot, rule)
+                remaining = max(rule.capacity - booked, 0)
+                if best is None or remaining < best["remaining"]:
+                    best = {
+                        "capacity": rule.capacity,
+                        "booked": booked,
+                        "remaining": remaining,
+                        "rule_id": rule.id,
+                    }
+            slots[slot] = best or {
+                "capacity": None,
+                "booked": None,
+                "remaining": None,
+                "rule_id": None,
+            }
+        days.append({"date": day.isoformat(), "slots": slots})
+    return days
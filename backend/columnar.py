@@ -0,0 +1,242 @@
+# columnar.py
+"""
+Export bookings เป็น Parquet (Apache Arrow) สำหรับงาน BI
+
+    GET /api/admin/report/parquet?start_date&end_date&status&company_id[&since=<watermark>]
+
+- filter ชุดเดียวกับ /report, /report/excel (parse_report_filters / apply_report_filters)
+  รวม bookings_archive ถ้าช่วงวันที่ต้องใช้ (needs_archive)
+- อ่าน DB เป็นก้อน (stream_results + partitions ทีละ EXPORT_PARQUET_BATCH_ROWS แถว)
+  → ก้อนละ 1 RecordBatch / 1 row group → ส่งออกทันที ไม่ต้องถือทั้งไฟล์ไว้ใน RAM
+- company_name, status, job_type, department, messenger_name เป็น dictionary (categorical)
+  ทั้งใน schema ของ Arrow และ encoding ของ Parquet
+- occurrence ของ booking ซ้ำที่ยังไม่ materialize ไม่อยู่ในไฟล์ (ยังไม่ใช่ข้อมูลจริง)
+
+incremental (?since=):
+  ใช้ watermark รูปแบบเดียวกับ /bookings/changes (sync.py) — เฉพาะแถวที่ updated_at
+  อยู่หลัง watermark และก่อน now - SYNC_SAFETY_SECONDS
+  watermark ถัดไปอยู่ใน header X-Watermark และ metadata ของไฟล์ ("watermark")
+  id ที่ถูกลบหลัง watermark อยู่ใน metadata "deleted_booking_ids" (JSON)
+"""
+
+import datetime as dt
+import json
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from flask import current_app
+from sqlalchemy import and_, func, or_, select
+
+from archive import needs_archive
+from metrics import export_duration, export_size
+from models import db, Booking, BookingArchive, BookingTombstone, Company
+from sync import format_watermark, parse_watermark
+
+MIMETYPE = "application/vnd.apache.parquet"
+
+_dictionary = pa.dictionary(pa.int32(), pa.string())
+
+# (ชื่อคอลัมน์, ชนิด Arrow) เรียงตามลำดับใน select
+SCHEMA = pa.schema(
+    [
+        ("booking_id", pa.int64()),
+        ("booking_date", pa.date32()),
+        ("booking_time", pa.time64("us")),
+        ("company_id", pa.int32()),
+        ("company_name", _dictionary),
+        ("requester_name", pa.string()),
+        ("job_type", _dictionary),
+        ("department", _dictionary),
+        ("building", pa.string()),
+        ("floor", pa.string()),
+        ("detail", pa.string()),
+        ("contact_name", pa.string()),
+        ("contact_phone", pa.string()),
+        ("status", _dictionary),
+        ("messenger_id", pa.int32()),
+        ("messenger_name", _dictionary),
+        ("created_by", pa.int32()),
+        ("approved_by", pa.int32()),
+        ("approved_at", pa.timestamp("us")),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+    ]
+)
+DICTIONARY_COLUMNS = [f.name for f in SCHEMA if pa.types.is_dictionary(f.type)]
+
+
+def _select_for(model, filters, window=None):
+    """select คอลัมน์ตาม SCHEMA (join ชื่อบริษัท) — window = (since_ts, after_id, until)"""
+    t = model.__table__.c
+    stmt = (
+        select(
+            t.id,
+            t.booking_date,
+            t.booking_time,
+            t.company_id,
+            Company.name,
+            t.requester_name,
+            t.job_type,
+            t.department,
+            t.building,
+            t.floor,
+            t.detail,
+            t.contact_name,
+            t.contact_phone,
+            t.status,
+            t.messenger_id,
+            t.messenger_name,
+            t.created_by,
+            t.approved_by,
+            t.approved_at,
+            t.created_at,
+            t.updated_at,
+        )
+        .join(Company, t.company_id == Company.id)
+    )
+    stmt = _where(stmt, model, filters, window)
+    # incremental: เรียงตาม watermark, ทั้งหมด: เรียงตาม primary key (ไม่ต้อง sort ทั้งตาราง)
+    return stmt.order_by(t.updated_at, t.id) if window else stmt.order_by(t.id)
+
+
+def _where(stmt, model, filters, window):
+    t = model.__table__.c
+    if "start_date" in filters:
+        stmt = stmt.where(t.booking_date >= filters["start_date"])
+    if "end_date" in filters:
+        stmt = stmt.where(t.booking_date <= filters["end_date"])
+    if "status" in filters:
+        stmt = stmt.where(t.status == filters["status"])
+    if "company_id" in filters:
+        stmt = stmt.where(t.company_id == filters["company_id"])
+    if window:
+        since_ts, after_id, until = window
+        stmt = stmt.where(
+            or_(t.updated_at > since_ts, and_(t.updated_at == since_ts, t.id > after_id)),
+            t.updated_at < until,
+        )
+    return stmt
+
+
+class ExportPlan:
+    """ขอบเขตของ export หนึ่งครั้ง (คำนวณก่อนส่ง header → watermark ถัดไปรู้ล่วงหน้า)"""
+
+    def __init__(self, filters, since: str = None):
+        """raise ValueError ถ้า since ผิดรูปแบบ"""
+        self.filters = filters
+        self.models = (
+            (Booking, BookingArchive) if needs_archive(filters.get("start_date")) else (Booking,)
+        )
+        self.window = None
+        self.watermark = None
+        self.incremental = since is not None
+        if self.incremental:
+            since_ts, after_id = parse_watermark(since)
+            safety = dt.timedelta(seconds=current_app.config["SYNC_SAFETY_SECONDS"])
+            until = max(dt.datetime.utcnow() - safety, since_ts)
+            self.window = (since_ts, after_id, until)
+            # แถวที่ updated_at == until ยังไม่ได้ export → รอบหน้าเริ่มที่ (until, 0)
+            self.watermark = format_watermark(until, 0)
+
+    def count(self) -> int:
+        """COUNT แถวที่จะ export (ใช้ประเมิน admission)"""
+        total = 0
+        for model in self.models:
+            stmt = _where(select(func.count()).select_from(model.__table__), model, self.filters, self.window)
+            total += db.session.execute(stmt).scalar()
+        return total
+
+    def deleted_ids(self):
+        if not self.incremental:
+            return []
+        since_ts, _, until = self.window
+        rows = db.session.execute(
+            select(BookingTombstone.booking_id).where(
+                BookingTombstone.deleted_at > since_ts, BookingTombstone.deleted_at < until
+            )
+        ).scalars()
+        return sorted(set(rows))
+
+    def open(self, batch_rows: int):
+        """
+        execute query ทุกตัวตอนนี้เลย (ยังอยู่ใน context ของ route → replica_read มีผล)
+        คืน iterator ของ partition (list ของ row) ที่อ่านจาก cursor ทีละ batch_rows แถว
+        """
+        results = [
+            db.session.execute(
+                _select_for(model, self.filters, self.window),
+                execution_options={"stream_results": True},
+            )
+            for model in self.models
+        ]
+        return (part for result in results for part in result.partitions(batch_rows))
+
+
+def record_batch(rows) -> pa.RecordBatch:
+    """partition ของ row → RecordBatch ตาม SCHEMA (แปลงทีละคอลัมน์)"""
+    columns = list(zip(*rows))
+    arrays = []
+    for field, values in zip(SCHEMA, columns):
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+class _ChunkSink:
+    """file-like ที่ ParquetWriter เขียนลง → เก็บไว้จนกว่า generator จะดึงออกไปส่ง"""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_parquet(plan: ExportPlan, partitions, on_close=None):
+    """generator ของ byte ของไฟล์ Parquet — 1 row group ต่อ partition"""
+    t0 = time.perf_counter()
+    sink = _ChunkSink()
+    try:
+        metadata = {"filters": json.dumps({k: str(v) for k, v in plan.filters.items()})}
+        if plan.incremental:
+            metadata["watermark"] = plan.watermark
+            metadata["deleted_booking_ids"] = json.dumps(plan.deleted_ids())
+
+        writer = pq.ParquetWriter(
+            sink,
+            SCHEMA.with_metadata(metadata),
+            compression=current_app.config.get("EXPORT_PARQUET_COMPRESSION", "zstd"),
+            use_dictionary=DICTIONARY_COLUMNS,
+        )
+        for rows in partitions:
+            writer.write_batch(record_batch(rows))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+        export_duration.observe(time.perf_counter() - t0, format="parquet")
+        export_size.observe(sink.position, format="parquet")
+    finally:
+        if on_close is not None:
+            on_close()
@@ -1,4 +1,6 @@
 import os
+from datetime import timedelta
+
 from dotenv import load_dotenv
 
 # -------------------------------------------------------
@@ -15,6 +17,27 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///dev.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # read replica (ว่าง = ปิด) → route report / export / stats อ่านจาก replica
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+    SQLALCHEMY_BINDS = {"replica": DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    # replica ตามหลังเกินนี้ → อ่าน primary แทน / หลัง user เขียนข้อมูลอ่าน primary นานเท่านี้
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 30))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", 5))
+
+    # SQLite (ไฟล์) — tuned = WAL + pragma + pool อ่านแยก + checkpoint เบื้องหลัง (sqliteprofile.py)
+    # opt-in: ผล bench/bench_sqlite_profile.py → อ่าน 47 → 196 req/s แต่เขียนลดลง 931 → 772 req/s
+    # (~17%, commit ผ่าน WAL + pool เขียนแยก) — เปิดเฉพาะสาขาที่อ่าน (report / export) มากกว่าเขียน
+    SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default")  # default | tuned
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 65536))  # ต่อ connection
+    SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", 256))
+    SQLITE_WAL_AUTOCHECKPOINT = int(os.getenv("SQLITE_WAL_AUTOCHECKPOINT", 1000))  # หน้า
+    SQLITE_JOURNAL_SIZE_LIMIT_MB = int(os.getenv("SQLITE_JOURNAL_SIZE_LIMIT_MB", 64))
+    SQLITE_WRITE_POOL_SIZE = int(os.getenv("SQLITE_WRITE_POOL_SIZE", 5))
+    SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", 10))  # 0 = ไม่แยก pool อ่าน
+    SQLITE_CHECKPOINT_INTERVAL = int(os.getenv("SQLITE_CHECKPOINT_INTERVAL", 60))  # วินาที
+    SQLITE_OPTIMIZE_INTERVAL = int(os.getenv("SQLITE_OPTIMIZE_INTERVAL", 3600))  # วินาที, 0 = ปิด
+
     # ===============================
     # JWT AUTH CONFIG
     # ===============================
@@ -22,7 +45,51 @@ class Config:
     JWT_TOKEN_LOCATION = ["headers"]
     JWT_HEADER_NAME = "Authorization"
     JWT_HEADER_TYPE = "Bearer"
-    JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv("JWT_EXPIRES_MIN", 1440))  # default 24hr
+    # access token อายุสั้น (นาที) — ต่ออายุด้วย refresh token ไม่ต้อง login / hash password ใหม่
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv("JWT_EXPIRES_MIN", 15)))
+    REFRESH_TOKEN_DAYS = int(os.getenv("REFRESH_TOKEN_DAYS", 14))
+    # refresh token เดิมถูกใช้ซ้ำภายในกี่วินาทีหลัง rotate → 409 (หลาย tab แย่งกัน) แทนการ revoke
+    REFRESH_REUSE_GRACE_SECONDS = int(os.getenv("REFRESH_REUSE_GRACE_SECONDS", 10))
+    # cache ผล "family ถูก revoke หรือยัง" ต่อ worker (วินาที) — revoke จาก worker อื่นมีผลช้าสุดเท่านี้
+    TOKEN_REVOCATION_CACHE_TTL = int(os.getenv("TOKEN_REVOCATION_CACHE_TTL", 30))
+
+    # ===============================
+    # PASSWORD HASHING (bounded pool)
+    # ===============================
+    # werkzeug method เช่น "scrypt:32768:8:1" หรือ "pbkdf2:sha256:600000"
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 16))
+    PASSWORD_HASH_TIMEOUT = int(os.getenv("PASSWORD_HASH_TIMEOUT", 10))  # วินาที
+    # thread สำหรับ hash ตอน import user ทีละมาก ๆ (0 = จำนวน CPU)
+    PASSWORD_BULK_WORKERS = int(os.getenv("PASSWORD_BULK_WORKERS", 0))
+
+    # ===============================
+    # USER MANAGEMENT (admin)
+    # ===============================
+    # GET /api/admin/users แบ่งหน้า
+    USERS_PAGE_SIZE = int(os.getenv("USERS_PAGE_SIZE", 50))
+    USERS_MAX_PAGE_SIZE = int(os.getenv("USERS_MAX_PAGE_SIZE", 500))
+    # จำนวนแถวสูงสุดต่อการ import หนึ่งครั้ง (POST /api/admin/users/import)
+    USER_IMPORT_MAX_ROWS = int(os.getenv("USER_IMPORT_MAX_ROWS", 5000))
+    # เวลา hash password ที่ยอมให้ import หนึ่งครั้งใช้ (วินาที, ต้องต่ำกว่า request timeout)
+    # → จำนวนแถวจริง = min(USER_IMPORT_MAX_ROWS, ที่ hash ทันในเวลานี้ด้วย method / worker ปัจจุบัน)
+    #   เช่น scrypt ~0.11s/hash บน 1 vCPU → ~180 แถวต่อครั้ง; มากกว่านั้น client แบ่งส่งหลายครั้ง
+    USER_IMPORT_HASH_BUDGET = float(os.getenv("USER_IMPORT_HASH_BUDGET", 20))
+
+    # ===============================
+    # LOGIN RATE LIMIT (sliding window)
+    # ===============================
+    RATELIMIT_BACKEND = os.getenv("RATELIMIT_BACKEND", "memory")
+    # login ผิดต่อ IP (นับเฉพาะที่ล้มเหลว → login สำเร็จพร้อมกันทั้งออฟฟิศหลัง NAT ไม่โดน 429)
+    LOGIN_LIMIT_PER_IP = int(os.getenv("LOGIN_LIMIT_PER_IP", 30))
+    LOGIN_LIMIT_IP_WINDOW = int(os.getenv("LOGIN_LIMIT_IP_WINDOW", 60))
+    # login ผิดต่อ username (login สำเร็จจะ reset)
+    LOGIN_FAILURES_PER_USER = int(os.getenv("LOGIN_FAILURES_PER_USER", 5))
+    LOGIN_FAILURE_WINDOW = int(os.getenv("LOGIN_FAILURE_WINDOW", 300))
+    # จำนวน reverse proxy (nginx ฯลฯ) หน้า app ที่เชื่อ X-Forwarded-For ได้
+    # 0 = ใช้ remote_addr ตรง ๆ (ห้ามตั้งถ้า client ยิงถึง app ได้โดยไม่ผ่าน proxy)
+    TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", 0))
 
     # ===============================
     # SMTP EMAIL CONFIG (Forgot Password)
@@ -33,6 +100,167 @@ class Config:
     SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
     SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "1").lower() in ("1", "true", "yes")
 
+    # ===============================
+    # MESSENGER CAPACITY (slot occupancy index)
+    # ===============================
+    # อายุ cache จำนวนงานต่อ slot ในหน่วยความจำ (วินาที)
+    SLOT_INDEX_TTL = int(os.getenv("SLOT_INDEX_TTL", 30))
+    # จำนวนวันสูงสุดที่ขอดู availability ได้ในครั้งเดียว
+    SLOT_AVAILABILITY_MAX_DAYS = int(os.getenv("SLOT_AVAILABILITY_MAX_DAYS", 62))
+
+    # ===============================
+    # MESSENGERS (ตาราง messengers)
+    # ===============================
+    # ชื่อที่ใช้เมื่อ admin กด SUCCESS โดยไม่ได้เลือก messenger
+    MESSENGER_DEFAULT_NAME = os.getenv("MESSENGER_DEFAULT_NAME", "ขวัญเมือง")
+    # จำนวนแถวต่อหน้าของ /api/admin/messengers/<id>/bookings
+    MESSENGER_HISTORY_PAGE_SIZE = int(os.getenv("MESSENGER_HISTORY_PAGE_SIZE", 100))
+
+    # ===============================
+    # DISPATCH PLANNER
+    # ===============================
+    # รายชื่อ messenger ที่ว่าง (คั่นด้วย ,) ใช้เมื่อ request ไม่ได้ส่งมา
+    DISPATCH_MESSENGERS = [
+        m.strip() for m in os.getenv("DISPATCH_MESSENGERS", "ขวัญเมือง").split(",") if m.strip()
+    ]
+    # JSON ตารางระยะทางระหว่างอาคาร {"buildings": [...], "distances": [[...]]}
+    DISPATCH_DISTANCE_FILE = os.getenv("DISPATCH_DISTANCE_FILE", "")
+    DISPATCH_DEFAULT_DISTANCE = float(os.getenv("DISPATCH_DEFAULT_DISTANCE", 1.0))
+    # จุดเริ่ม/จบของทุกเที่ยว (ชื่ออาคารห้องสารบรรณ)
+    DISPATCH_DEPOT = os.getenv("DISPATCH_DEPOT", "")
+    DISPATCH_MAX_STOPS_PER_TRIP = int(os.getenv("DISPATCH_MAX_STOPS_PER_TRIP", 8))
+
+    # ===============================
+    # DISPATCH BOARD (in-memory, board.py)
+    # ===============================
+    # ช่วงวันที่ที่ถือไว้ใน memory: วันนี้ - PAST_DAYS .. วันนี้ + DAYS
+    DISPATCH_BOARD_PAST_DAYS = int(os.getenv("DISPATCH_BOARD_PAST_DAYS", 0))
+    DISPATCH_BOARD_DAYS = int(os.getenv("DISPATCH_BOARD_DAYS", 1))
+    # ดึงการเปลี่ยนแปลงจาก worker อื่นทุกกี่วินาที (0 = ปิด, รัน worker เดียว)
+    DISPATCH_BOARD_SYNC_INTERVAL = int(os.getenv("DISPATCH_BOARD_SYNC_INTERVAL", 5))
+
+    # ===============================
+    # REALTIME PUSH (SSE /api/events/stream)
+    # ===============================
+    # memory = ภายใน worker เดียว, postgres = NOTIFY/LISTEN ข้าม worker
+    EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")
+    EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "booking_events")
+    EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", 1000))  # สำหรับ resume
+    EVENTS_MAX_QUEUE = int(os.getenv("EVENTS_MAX_QUEUE", 1000))  # ต่อ client
+    EVENTS_KEEPALIVE = int(os.getenv("EVENTS_KEEPALIVE", 15))  # วินาที
+    # อายุ ticket ของ /api/events/stream (วินาที) — ใช้แค่ตอนเปิด stream
+    EVENTS_TICKET_TTL = int(os.getenv("EVENTS_TICKET_TTL", 30))
+
+    # ===============================
+    # INCREMENTAL SYNC (/changes?since=)
+    # ===============================
+    SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", 500))
+    # watermark จะไม่ขยับเกิน now - ค่านี้ (กันพลาดแถวที่ commit ช้า)
+    SYNC_SAFETY_SECONDS = int(os.getenv("SYNC_SAFETY_SECONDS", 5))
+
+    # ===============================
+    # PROFILING (/api/admin/perf)
+    # ===============================
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "1").lower() in ("1", "true", "yes")
+    PERF_WINDOW = int(os.getenv("PERF_WINDOW", 200))  # request ล่าสุดต่อ endpoint
+    # header "X-Profile: <PROFILE_TOKEN>" เปิด sampling profiler ให้ request นั้น
+    # (ว่าง = ปิดการเปิดผ่าน header)
+    PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))  # 0.0 - 1.0
+    PROFILE_INTERVAL_MS = int(os.getenv("PROFILE_INTERVAL_MS", 5))
+    PROFILE_DIR = os.getenv(
+        "PROFILE_DIR", os.path.join(os.path.dirname(__file__), "profiles")
+    )
+
+    # ===============================
+    # LOGGING / METRICS
+    # ===============================
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | text
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    LOG_REQUESTS = os.getenv("LOG_REQUESTS", "1").lower() in ("1", "true", "yes")
+    # ว่าง = /metrics เปิดให้ scrape ได้โดยไม่ต้องมี token
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+    # ===============================
+    # IDEMPOTENCY-KEY (POST /api/bookings)
+    # ===============================
+    IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", 24))
+    # request ซ้ำใน worker เดียวกันรอ request แรกได้นานเท่านี้ (วินาที)
+    # และเป็นอายุของ key ที่ยัง pending — เกินแล้วถือว่า request แรกตาย request ถัดไปยึดต่อได้
+    IDEMPOTENCY_WAIT_TIMEOUT = int(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", 10))
+
+    # ===============================
+    # BOOKING SLIP PDF PRE-RENDER
+    # ===============================
+    PDF_PRERENDER = os.getenv("PDF_PRERENDER", "1").lower() in ("1", "true", "yes")
+    PDF_PRERENDER_WORKERS = int(os.getenv("PDF_PRERENDER_WORKERS", 1))
+    PDF_PRERENDER_QUEUE = int(os.getenv("PDF_PRERENDER_QUEUE", 64))
+    # GET /pdf รอไฟล์ที่กำลัง render ได้นานเท่านี้ก่อน render เอง (วินาที)
+    PDF_PRERENDER_WAIT = float(os.getenv("PDF_PRERENDER_WAIT", 2))
+    PDF_STORE_BACKEND = os.getenv("PDF_STORE_BACKEND", "memory")  # memory | disk
+    PDF_STORE_MAX_BYTES = int(os.getenv("PDF_STORE_MAX_MB", 64)) * 1024 * 1024
+    PDF_STORE_DIR = os.getenv(
+        "PDF_STORE_DIR", os.path.join(os.path.dirname(__file__), "slip_cache")
+    )
+
+    # ===============================
+    # RESULT CACHE (report / stats)
+    # ===============================
+    # memory | sqlite | none | "package.module:Class"
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_TTL = int(os.getenv("CACHE_TTL", 60))  # วินาที
+    # ผลที่อ่านจาก read replica (อาจยังไม่เห็น write ล่าสุด) — 0 = ไม่ cache
+    CACHE_REPLICA_TTL = int(os.getenv("CACHE_REPLICA_TTL", 5))
+    CACHE_LOCK_TIMEOUT = int(os.getenv("CACHE_LOCK_TIMEOUT", 30))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 256))  # memory backend
+    CACHE_SQLITE_PATH = os.getenv(
+        "CACHE_SQLITE_PATH", os.path.join(os.path.dirname(__file__), "cache.sqlite3")
+    )
+
+    # ===============================
+    # ADMISSION CONTROL (export หนัก — ต่อ worker)
+    # ===============================
+    # report Excel / PDF: ความจุเป็น units, 1 unit ต่อ ROWS_PER_UNIT แถว (COUNT ก่อน export)
+    ADMISSION_EXPORT_UNITS = int(os.getenv("ADMISSION_EXPORT_UNITS", 4))
+    ADMISSION_EXPORT_ROWS_PER_UNIT = int(os.getenv("ADMISSION_EXPORT_ROWS_PER_UNIT", 20000))
+    ADMISSION_EXPORT_QUEUE = int(os.getenv("ADMISSION_EXPORT_QUEUE", 8))
+    ADMISSION_EXPORT_WAIT = float(os.getenv("ADMISSION_EXPORT_WAIT", 10))
+    # export เกินนี้ตอบ 400 ให้แคบช่วงวันที่ลง (0 = ไม่จำกัด)
+    ADMISSION_EXPORT_MAX_ROWS = int(os.getenv("ADMISSION_EXPORT_MAX_ROWS", 0))
+    # ใบจอง PDF ที่ต้อง render ใน request (ไม่มีไฟล์ prerender) — 1 unit ต่อใบ
+    ADMISSION_SLIP_UNITS = int(os.getenv("ADMISSION_SLIP_UNITS", 4))
+    ADMISSION_SLIP_QUEUE = int(os.getenv("ADMISSION_SLIP_QUEUE", 16))
+    ADMISSION_SLIP_WAIT = float(os.getenv("ADMISSION_SLIP_WAIT", 5))
+
+    # ===============================
+    # PARQUET EXPORT (BI)
+    # ===============================
+    # แถวต่อ record batch / row group (อ่าน DB + เขียนไฟล์ทีละก้อน)
+    EXPORT_PARQUET_BATCH_ROWS = int(os.getenv("EXPORT_PARQUET_BATCH_ROWS", 50000))
+    EXPORT_PARQUET_COMPRESSION = os.getenv("EXPORT_PARQUET_COMPRESSION", "zstd")
+
+    # ===============================
+    # RECURRING BOOKINGS (booking_series)
+    # ===============================
+    # ไม่ระบุ start_date / end_date → expand occurrence ย้อนหลัง / ล่วงหน้ากี่วัน
+    SERIES_DEFAULT_WINDOW_DAYS = int(os.getenv("SERIES_DEFAULT_WINDOW_DAYS", 31))
+    # ช่วงวันที่ยาวสุดที่ expand ได้ต่อ request (กัน series ไม่มีวันสิ้นสุด)
+    SERIES_MAX_WINDOW_DAYS = int(os.getenv("SERIES_MAX_WINDOW_DAYS", 400))
+
+    # ===============================
+    # ANALYTICS (/api/admin/stats/turnaround ฯลฯ)
+    # ===============================
+    # เป้า created_at → approved_at (ชั่วโมง) — override ต่อ request ด้วย ?sla_hours=
+    ANALYTICS_SLA_HOURS = float(os.getenv("ANALYTICS_SLA_HOURS", 24))
+
+    # ===============================
+    # ARCHIVE (flask archive-bookings)
+    # ===============================
+    # booking ที่ปิดแล้ว (SUCCESS / CANCEL) เก่ากว่ากี่เดือนถึงย้ายไป bookings_archive
+    ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", 13))
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 5000))
+
     # ===============================
     # Optional Security / Debug Control
     # ===============================
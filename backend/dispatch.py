@@ -0,0 +1,225 @@
+# dispatch.py
+"""
+Dispatch planner: จัดงานของวันหนึ่งให้ messenger แต่ละคน
+
+ขั้นตอน (ต่อ slot เช้า / บ่าย / ไม่ระบุเวลา)
+  1) รวม booking ที่อยู่ building + floor เดียวกันเป็น 1 จุดแวะ (stop)
+  2) เรียง stop แบบ nearest-neighbour จากจุดเริ่ม (depot) ด้วยตารางระยะทาง
+     ระหว่างอาคารที่คำนวณไว้ล่วงหน้า
+  3) ตัดเป็นเที่ยว (trip) ละไม่เกิน max_stops จุด แล้วปรับลำดับในเที่ยวด้วย 2-opt
+  4) แจกเที่ยวให้ messenger ที่ภาระ (ระยะทางรวม) น้อยที่สุดก่อน
+
+ไม่แตะ DB — รับ list ของ dict แล้วคืน plan เป็น dict (ใช้ได้ทั้งใน route และ benchmark)
+"""
+
+import heapq
+import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from capacity import SLOTS, slot_of
+
+# ต้นทุนการเปลี่ยนชั้นภายในอาคารเดียวกัน (หน่วยเดียวกับตารางระยะทาง)
+FLOOR_COST = 0.1
+
+
+# ---------------- Building distance matrix ---------------- #
+
+class DistanceMatrix:
+    """
+    ตารางระยะทางระหว่างอาคาร
+    อาคารที่ไม่อยู่ในตารางใช้ระยะ default กับทุกอาคารอื่น
+    """
+
+    def __init__(self, buildings=(), distances=(), default: float = 1.0):
+        self.buildings = list(buildings)
+        self.index = {name: i for i, name in enumerate(self.buildings)}
+        n = len(self.buildings)
+        self.matrix = np.asarray(distances, dtype=float).reshape(n, n)
+        self.default = float(default)
+
+    @classmethod
+    def from_file(cls, path: str, default: float = 1.0):
+        """
+        JSON: {"buildings": ["A", "B", ...], "distances": [[0, 2, ...], ...]}
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["buildings"], data["distances"], default)
+
+    def expand(self, names) -> np.ndarray:
+        """ตารางระยะทางเต็มระหว่าง names ทุกคู่ (ตามลำดับที่ส่งมา)"""
+        known = len(self.buildings)
+        unknown = OrderedDict()
+        idx = np.empty(len(names), dtype=np.int64)
+        for i, name in enumerate(names):
+            j = self.index.get(name)
+            if j is None:
+                j = unknown.setdefault(name, known + len(unknown))
+            idx[i] = j
+
+        size = known + len(unknown)
+        full = np.full((size, size), self.default)
+        full[:known, :known] = self.matrix
+        np.fill_diagonal(full, 0.0)
+        return full[idx[:, None], idx[None, :]]
+
+
+@lru_cache(maxsize=4)
+def load_distance_matrix(path: str, default: float = 1.0) -> DistanceMatrix:
+    if path and os.path.exists(path):
+        return DistanceMatrix.from_file(path, default)
+    return DistanceMatrix(default=default)
+
+
+# ---------------- Route helpers ---------------- #
+
+def nearest_neighbour_order(dist: np.ndarray) -> list:
+    """ลำดับ stop (index 1..n) เริ่มจาก depot (index 0)"""
+    n = dist.shape[0]
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    order = []
+    current = 0
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[current])
+        current = int(np.argmin(row))
+        visited[current] = True
+        order.append(current)
+    return order
+
+
+def trip_distance(dist: np.ndarray, trip) -> float:
+    path = [0] + list(trip) + [0]
+    return float(sum(dist[a, b] for a, b in zip(path, path[1:])))
+
+
+def two_opt(dist: np.ndarray, trip) -> list:
+    """ปรับลำดับในเที่ยว (depot → ... → depot) จนไม่มีการสลับที่ลดระยะได้"""
+    path = [0] + list(trip) + [0]
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(path) - 2):
+            for j in range(i + 1, len(path) - 1):
+                a, b, c, d = path[i - 1], path[i], path[j], path[j + 1]
+                if dist[a, c] + dist[b, d] < dist[a, b] + dist[c, d] - 1e-9:
+                    path[i:j + 1] = reversed(path[i:j + 1])
+                    improved = True
+    return path[1:-1]
+
+
+# ---------------- Planner ---------------- #
+
+def group_stops(jobs):
+    """
+    slot → OrderedDict[(building, floor)] → stop
+    stop = {"building", "floor", "departments", "booking_ids"}
+    """
+    by_slot = {slot: OrderedDict() for slot in SLOTS}
+    for job in jobs:
+        slot = job.get("slot") or slot_of(job.get("booking_time"))
+        key = (job.get("building") or "", job.get("floor") or "")
+        stop = by_slot[slot].get(key)
+        if stop is None:
+            stop = by_slot[slot][key] = {
+                "building": key[0],
+                "floor": key[1],
+                "departments": [],
+                "booking_ids": [],
+            }
+        if job.get("department") and job["department"] not in stop["departments"]:
+            stop["departments"].append(job["department"])
+        stop["booking_ids"].append(job["id"])
+    return by_slot
+
+
+def stop_distances(matrix: DistanceMatrix, depot: str, stops) -> np.ndarray:
+    """ระยะระหว่าง depot + stop ทุกคู่ (รวมค่าเปลี่ยนชั้นในอาคารเดียวกัน)"""
+    buildings = [depot] + [s["building"] for s in stops]
+    floors = np.array([""] + [s["floor"] for s in stops], dtype=object)
+    dist = matrix.expand(buildings)
+
+    same_building = np.array(buildings, dtype=object)
+    same_building = same_building[:, None] == same_building[None, :]
+    other_floor = floors[:, None] != floors[None, :]
+    return dist + FLOOR_COST * (same_building & other_floor)
+
+
+def plan_day(jobs, messengers, matrix: DistanceMatrix = None, depot: str = "", max_stops: int = 8):
+    """
+    jobs:       iterable ของ dict {id, building, floor, department, slot | booking_time}
+    messengers: รายชื่อ messenger ที่ว่าง
+    คืน dict:
+      {
+        "messengers": [{"name", "distance", "jobs", "trips": [...]}],
+        "assignments": {booking_id: messenger_name},
+        "total_trips", "total_distance"
+      }
+    """
+    if not messengers:
+        raise ValueError("at least one messenger is required")
+    matrix = matrix or DistanceMatrix()
+    max_stops = max(int(max_stops), 1)
+
+    plans = OrderedDict(
+        (name, {"name": name, "distance": 0.0, "jobs": 0, "trips": []})
+        for name in messengers
+    )
+    assignments = {}
+    total_trips = 0
+    total_distance = 0.0
+
+    for slot, stops_by_key in group_stops(jobs).items():
+        stops = list(stops_by_key.values())
+        if not stops:
+            continue
+
+        dist = stop_distances(matrix, depot, stops)
+        order = nearest_neighbour_order(dist)
+
+        trips = []
+        for i in range(0, len(order), max_stops):
+            trip = two_opt(dist, order[i:i + max_stops])
+            trips.append((trip_distance(dist, trip), trip))
+
+        # เที่ยวยาวก่อน → ให้คนที่ภาระน้อยที่สุดตอนนั้น (LPT)
+        trips.sort(key=lambda t: -t[0])
+        load = [(0.0, i, name) for i, name in enumerate(messengers)]
+        heapq.heapify(load)
+
+        for distance, trip in trips:
+            used, i, name = heapq.heappop(load)
+            trip_stops = [stops[k - 1] for k in trip]
+            job_count = sum(len(s["booking_ids"]) for s in trip_stops)
+
+            plan = plans[name]
+            plan["trips"].append(
+                {
+                    "slot": slot,
+                    "distance": round(distance, 3),
+                    "stops": trip_stops,
+                }
+            )
+            plan["distance"] += distance
+            plan["jobs"] += job_count
+            for s in trip_stops:
+                for booking_id in s["booking_ids"]:
+                    assignments[booking_id] = name
+
+            total_trips += 1
+            total_distance += distance
+            heapq.heappush(load, (used + distance, i, name))
+
+    for plan in plans.values():
+        plan["distance"] = round(plan["distance"], 3)
+
+    return {
+        "messengers": list(plans.values()),
+        "assignments": assignments,
+        "total_trips": total_trips,
+        "total_distance": round(total_distance, 3),
+    }
@@ -0,0 +1,142 @@
+# eventlog.py
+"""
+Booking event log (ตาราง booking_events) — append-only
+
+เขียนจาก mapper event ของ Booking ด้วย connection เดียวกับ INSERT / UPDATE / DELETE
+→ อยู่ใน transaction เดียวกับการเปลี่ยนสถานะเสมอ ไม่ว่าจะมาจาก route ไหน
+  (create_booking, update_status, materialize occurrence, dispatch apply ฯลฯ)
+
+- บันทึกเฉพาะตอนสร้าง / ลบ / status, messenger หรือผู้อนุมัติเปลี่ยน (แก้ข้อความอื่นไม่บันทึก)
+- encoding แบบ compact: kind / status เป็น small int, messenger / actor เป็น id ไม่มีข้อความซ้ำ
+- อ่าน:
+    ต่อ booking   → index (booking_id, id)
+    ช่วงเวลา      → index (occurred_at, id)
+    consumer ต่อเนื่อง → cursor = event id ล่าสุด (?after=)
+      ไม่คืน event ที่ใหม่กว่า now - SYNC_SAFETY_SECONDS (กันพลาด transaction ที่ยังไม่ commit)
+"""
+
+import datetime as dt
+
+from flask import current_app, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect
+
+from models import db, Booking, BookingEvent, Messenger
+
+KIND_CREATED = 1
+KIND_UPDATED = 2
+KIND_DELETED = 3
+KIND_NAMES = {KIND_CREATED: "created", KIND_UPDATED: "updated", KIND_DELETED: "deleted"}
+
+STATUS_OTHER = 0
+STATUS_CODES = {"PENDING": 1, "SUCCESS": 2, "CANCEL": 3}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+# field ที่เปลี่ยนแล้วต้องบันทึก event
+TRACKED_FIELDS = ("status", "messenger_id", "approved_by")
+
+_table = BookingEvent.__table__
+
+
+def status_code(status) -> int:
+    return STATUS_CODES.get(status, STATUS_OTHER)
+
+
+def _actor_id():
+    if not has_request_context():
+        return None
+    try:
+        return int(get_jwt_identity())
+    except Exception:
+        return None
+
+
+def _write(connection, target, kind, prev_status=None):
+    connection.execute(
+        _table.insert().values(
+            booking_id=target.id,
+            occurred_at=dt.datetime.utcnow(),
+            kind=kind,
+            status=status_code(target.status),
+            prev_status=prev_status,
+            messenger_id=target.messenger_id,
+            actor_id=_actor_id(),
+        )
+    )
+
+
+@event.listens_for(Booking, "after_insert")
+def _log_booking_created(mapper, connection, target):
+    _write(connection, target, KIND_CREATED)
+
+
+@event.listens_for(Booking, "after_update")
+def _log_booking_updated(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in TRACKED_FIELDS):
+        return
+    deleted = state.attrs.status.history.deleted
+    prev = status_code(deleted[0]) if deleted else None
+    _write(connection, target, KIND_UPDATED, prev_status=prev)
+
+
+@event.listens_for(Booking, "after_delete")
+def _log_booking_deleted(mapper, connection, target):
+    _write(connection, target, KIND_DELETED)
+
+
+# ---------------- read path ---------------- #
+
+def decode(rows):
+    """แถว booking_events → dict (แปลงรหัสกลับเป็นชื่อ, เติมชื่อ messenger ครั้งเดียวต่อหน้า)"""
+    messenger_ids = {r.messenger_id for r in rows if r.messenger_id is not None}
+    names = (
+        dict(db.session.query(Messenger.id, Messenger.name).filter(Messenger.id.in_(messenger_ids)).all())
+        if messenger_ids
+        else {}
+    )
+    return [
+        {
+            "id": r.id,
+            "booking_id": r.booking_id,
+            "occurred_at": r.occurred_at.isoformat(),
+            "kind": KIND_NAMES.get(r.kind, str(r.kind)),
+            "status": STATUS_NAMES.get(r.status),
+            "prev_status": STATUS_NAMES.get(r.prev_status) if r.prev_status is not None else None,
+            "messenger_id": r.messenger_id,
+            "messenger_name": names.get(r.messenger_id),
+            "actor_id": r.actor_id,
+        }
+        for r in rows
+    ]
+
+
+def booking_history(booking_id: int):
+    """event ทั้งหมดของ booking เดียว (เก่า → ใหม่)"""
+    return BookingEvent.query.filter(BookingEvent.booking_id == booking_id).order_by(BookingEvent.id).all()
+
+
+def fetch_events(after_id: int = 0, start: dt.datetime = None, end: dt.datetime = None, limit: int = None):
+    """
+    event ที่ id > after_id (เรียงตาม id) ภายในช่วง occurred_at [start, end)
+    คืน dict {events (แถวดิบ), cursor, has_more}
+    """
+    cfg = current_app.config
+    limit = min(limit or cfg["SYNC_PAGE_SIZE"], cfg["SYNC_PAGE_SIZE"])
+
+    # event ล่าสุดอาจมาจาก transaction ที่ id น้อยกว่ายัง commit ไม่เสร็จ → รอให้นิ่งก่อน
+    settled = dt.datetime.utcnow() - dt.timedelta(seconds=cfg["SYNC_SAFETY_SECONDS"])
+    end = min(end, settled) if end else settled
+
+    q = BookingEvent.query.filter(BookingEvent.id > after_id, BookingEvent.occurred_at < end)
+    if start is not None:
+        q = q.filter(BookingEvent.occurred_at >= start)
+    rows = q.order_by(BookingEvent.id).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "events": rows,
+        "cursor": rows[-1].id if rows else after_id,
+        "has_more": has_more,
+    }
@@ -0,0 +1,221 @@
+# idempotency.py
+"""
+Idempotency-Key สำหรับ POST ที่สร้างข้อมูล (เช่น create_booking)
+
+    POST /api/bookings
+    Idempotency-Key: 6f1c0e1a-...   (client สร้างใหม่ต่อการกดส่ง 1 ครั้ง ส่งซ้ำตอน retry)
+
+- ครั้งแรก: จอง key ในตาราง idempotency_keys (unique user_id + key) แล้วค่อยทำงานจริง
+  แถว pending (status_code = NULL) หมดอายุใน IDEMPOTENCY_WAIT_TIMEOUT วินาที
+  → process ตายก่อนเขียนผล = request ถัดไปยึด key ต่อได้ (ไม่ค้าง 409 ทั้ง TTL)
+  สำเร็จ (2xx) → เก็บ status + body ไว้ IDEMPOTENCY_TTL_HOURS ชั่วโมง
+    route เรียก record_response ก่อน commit → ผลอยู่ใน transaction เดียวกับข้อมูลที่สร้าง
+    (route ที่ไม่เรียก → บันทึกหลัง fn คืนค่า ใน transaction แยก)
+  ไม่สำเร็จ → ลบ key ทิ้ง ให้ส่งใหม่ด้วย key เดิมได้
+- ครั้งต่อไป: คืน response เดิม (header Idempotent-Replayed: true) ไม่ insert / render ซ้ำ
+- key เดิมแต่ body ต่าง → 422
+- request แรกยังไม่เสร็จ:
+    worker เดียวกัน → รอผลใน memory (ไม่ต้องชน unique index ใน DB)
+    worker อื่น     → 409 + Retry-After
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import Response, current_app, g, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# ลบ key หมดอายุอย่างมากทุกกี่วินาที (ต่อ worker)
+PURGE_INTERVAL = 600
+
+_table = IdempotencyKey.__table__
+
+# (user_id, key) → Event ของ request ที่กำลังทำใน worker นี้
+_inflight_lock = threading.Lock()
+_inflight = {}
+_last_purge = [0.0]
+
+
+def _replay(row):
+    response = Response(row.response_body, status=row.status_code, mimetype="application/json")
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _load(user_id, key):
+    return db.session.execute(
+        select(_table).where(_table.c.user_id == user_id, _table.c.key == key)
+    ).first()
+
+
+class IdempotencyKeyLost(Exception):
+    """แถว pending ของ request นี้ถูก request อื่นยึดไปแล้ว (เกิน IDEMPOTENCY_WAIT_TIMEOUT)"""
+
+
+def _claim(user_id, key, fingerprint, lease):
+    """insert แถว pending → id ของแถว ถ้าได้ key นี้ / None ถ้ามีอยู่แล้ว"""
+    try:
+        result = db.session.execute(
+            _table.insert().values(
+                user_id=user_id,
+                key=key,
+                fingerprint=fingerprint,
+                expires_at=datetime.utcnow() + lease,
+            )
+        )
+        db.session.commit()
+        return result.inserted_primary_key[0]
+    except IntegrityError:
+        db.session.rollback()
+        return None
+
+
+def _release(claim_id):
+    db.session.rollback()
+    db.session.execute(delete(_table).where(_table.c.id == claim_id))
+    db.session.commit()
+
+
+def _store(claim_id, response, status_code):
+    """เขียนผลลง key ของ request นี้ (ยังไม่ commit) — raise IdempotencyKeyLost ถ้าถูกยึดไปแล้ว"""
+    ttl = timedelta(hours=current_app.config.get("IDEMPOTENCY_TTL_HOURS", 24))
+    result = db.session.execute(
+        update(_table)
+        .where(_table.c.id == claim_id, _table.c.status_code.is_(None))
+        .values(
+            status_code=status_code,
+            response_body=response.get_data(),
+            expires_at=datetime.utcnow() + ttl,
+        )
+    )
+    if result.rowcount != 1:
+        raise IdempotencyKeyLost()
+
+
+def record_response(response, status_code: int):
+    """
+    เรียกใน route ก่อน db.session.commit() ของข้อมูลที่สร้าง (response = jsonify(...) ที่จะคืน)
+    → key กับข้อมูล commit พร้อมกัน — ไม่มี header Idempotency-Key = ไม่ทำอะไร
+    """
+    claim_id = g.get("_idempotency_claim")
+    if claim_id is None:
+        return
+    _store(claim_id, response, status_code)
+    g._idempotency_recorded = True
+
+
+def _purge_expired():
+    now = time.monotonic()
+    if now - _last_purge[0] < PURGE_INTERVAL:
+        return
+    _last_purge[0] = now
+    db.session.execute(delete(_table).where(_table.c.expires_at < datetime.utcnow()))
+    db.session.commit()
+
+
+def _existing_response(user_id, key, fingerprint):
+    """response สำหรับ key ที่มีอยู่แล้ว / None ถ้า key หมดอายุ (ลบแล้ว)"""
+    row = _load(user_id, key)
+    if row is None:
+        return None
+    if row.expires_at < datetime.utcnow():
+        # TTL ของผลหมด หรือ pending ค้างเกิน IDEMPOTENCY_WAIT_TIMEOUT (request แรกตายไปแล้ว)
+        _release(row.id)
+        return None
+    if row.fingerprint != fingerprint:
+        return jsonify({"message": f"{HEADER} was already used with a different request"}), 422
+    if row.status_code is None:
+        return _in_progress()
+    return _replay(row)
+
+
+def _in_progress():
+    response = jsonify({"message": "a request with this Idempotency-Key is in progress"})
+    response.headers["Retry-After"] = "1"
+    return response, 409
+
+
+def idempotent(fn):
+    """decorator ของ route POST (วางหลัง @jwt_required()) — ไม่มี header = ทำงานตามปกติ"""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return fn(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"message": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+        try:
+            user_id = int(get_jwt_identity())
+        except (TypeError, ValueError):
+            return jsonify({"message": "invalid token identity"}), 401
+
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+        wait_timeout = current_app.config.get("IDEMPOTENCY_WAIT_TIMEOUT", 10)
+        lease = timedelta(seconds=wait_timeout)
+
+        # fast path: ซ้ำใน worker เดียวกัน → รอ request แรกเสร็จแล้วตอบจากผลของมัน
+        inflight_key = (user_id, key)
+        with _inflight_lock:
+            done = _inflight.get(inflight_key)
+            if done is None:
+                _inflight[inflight_key] = threading.Event()
+        if done is not None:
+            done.wait(wait_timeout)
+            existing = _existing_response(user_id, key, fingerprint)
+            if existing is not None:
+                return existing
+            # request แรกล้มเหลว → ลองใหม่แบบปกติ
+            return wrapper(*args, **kwargs)
+
+        try:
+            _purge_expired()
+            claim_id = _claim(user_id, key, fingerprint, lease)
+            if claim_id is None:
+                existing = _existing_response(user_id, key, fingerprint)
+                if existing is not None:
+                    return existing
+                # key หมดอายุ / pending ค้าง และถูกลบแล้ว
+                claim_id = _claim(user_id, key, fingerprint, lease)
+                if claim_id is None:
+                    return _existing_response(user_id, key, fingerprint) or _in_progress()
+
+            g._idempotency_claim = claim_id
+            try:
+                response = make_response(fn(*args, **kwargs))
+            except IdempotencyKeyLost:
+                # record_response เจอว่า key ถูกยึดไปแล้ว → ข้อมูลของ request นี้ไม่ถูก commit
+                db.session.rollback()
+                return _in_progress()
+            except Exception:
+                _release(claim_id)
+                raise
+            finally:
+                g._idempotency_claim = None
+
+            if g.pop("_idempotency_recorded", False):
+                return response
+            if 200 <= response.status_code < 300:
+                try:
+                    _store(claim_id, response, response.status_code)
+                    db.session.commit()
+                except IdempotencyKeyLost:
+                    db.session.rollback()
+            else:
+                _release(claim_id)
+            return response
+        finally:
+            with _inflight_lock:
+                _inflight.pop(inflight_key).set()
+
+    return wrapper
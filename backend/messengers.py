@@ -0,0 +1,162 @@
+# messengers.py
+"""
+Messenger เป็น entity (ตาราง messengers) แทนข้อความอิสระใน bookings.messenger_name
+
+- booking อ้างอิงด้วย messenger_id (index messenger_id + booking_date)
+  → งานวันนี้ / ประวัติ / นับงานต่อ messenger ใช้ index ไม่ต้อง scan ข้อความทั้งตาราง
+- messenger_name ยังเก็บไว้ใน booking (สำเนาชื่อตอนรับงาน) ให้ report / frontend เดิม
+- ชื่อที่สะกดต่างกันแค่ช่องว่าง / zero-width / ตัวพิมพ์ ถือเป็นคนเดียวกัน (name_key)
+
+DB ที่มีอยู่แล้ว:
+    flask backfill-messengers [--dry-run]
+  เพิ่มคอลัมน์ messenger_id (ถ้ายังไม่มี) + สร้าง messengers จากชื่อเดิมที่ dedupe แล้ว
+  + เติม messenger_id ให้ bookings และ bookings_archive
+"""
+
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from flask import current_app
+from sqlalchemy import func, inspect, text, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Booking, BookingArchive, Messenger
+
+_invisible = re.compile("[\u200b\u200c\u200d\ufeff]")
+_spaces = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """ชื่อสำหรับแสดง: NFC, ตัด zero-width, ช่องว่างซ้ำเหลือช่องเดียว"""
+    name = _invisible.sub("", unicodedata.normalize("NFC", name or ""))
+    return _spaces.sub(" ", name).strip()
+
+
+def name_key(name: str) -> str:
+    """key สำหรับ dedupe: ไม่สนช่องว่าง / ตัวพิมพ์"""
+    return _spaces.sub("", normalize_name(name)).casefold()
+
+
+def default_messenger_name() -> str:
+    return current_app.config.get("MESSENGER_DEFAULT_NAME", "ขวัญเมือง")
+
+
+def resolve_messenger(name: str = None, messenger_id=None, create: bool = True):
+    """
+    messenger_id หรือชื่อ → Messenger (None ถ้าไม่พบ / ชื่อว่าง)
+    ชื่อที่ยังไม่มี → สร้างใหม่ (flush แล้ว ยังไม่ commit)
+    """
+    if messenger_id is not None:
+        return Messenger.query.get(messenger_id)
+
+    key = name_key(name)
+    if not key:
+        return None
+    messenger = Messenger.query.filter_by(name_key=key).first()
+    if messenger is not None or not create:
+        return messenger
+
+    messenger = Messenger(name=normalize_name(name), name_key=key)
+    try:
+        with db.session.begin_nested():
+            db.session.add(messenger)
+    except IntegrityError:
+        # request อื่นสร้างชื่อเดียวกันไปก่อน
+        messenger = Messenger.query.filter_by(name_key=key).first()
+    return messenger
+
+
+def assign(booking, messenger):
+    """ผูก booking กับ messenger (None = ถอดออก)"""
+    booking.messenger_id = messenger.id if messenger else None
+    booking.messenger_name = messenger.name if messenger else None
+
+
+def active_names():
+    return [
+        m.name
+        for m in Messenger.query.filter_by(is_active=True).order_by(Messenger.name).all()
+    ]
+
+
+# ---------------- backfill ---------------- #
+
+def ensure_messenger_columns(log=print):
+    """เพิ่ม messenger_id ให้ตารางเดิม (create_all ไม่แก้ตารางที่มีอยู่แล้ว)"""
+    inspector = inspect(db.engine)
+    for model in (Booking, BookingArchive):
+        table = model.__tablename__
+        if not inspector.has_table(table):
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table)}
+        if "messenger_id" not in columns:
+            with db.engine.begin() as conn:
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table} ADD COLUMN messenger_id INTEGER "
+                        "REFERENCES messengers (id)"
+                    )
+                )
+            log(f" - added {table}.messenger_id")
+        for index in model.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+
+def group_names(counts):
+    """
+    {ชื่อเดิม: จำนวน} → {name_key: (ชื่อที่ใช้, [ชื่อเดิมทุกแบบ])}
+    ชื่อที่ใช้ = แบบที่ถูกใช้บ่อยที่สุดในกลุ่ม (normalize แล้ว)
+    """
+    groups = defaultdict(Counter)
+    for raw, n in counts.items():
+        key = name_key(raw)
+        if key:
+            groups[key][raw] += n
+    return {
+        key: (normalize_name(variants.most_common(1)[0][0]), list(variants))
+        for key, variants in groups.items()
+    }
+
+
+def backfill_messengers(dry_run: bool = False, log=print) -> int:
+    """สร้าง messengers จากชื่อเดิม + เติม messenger_id → คืนจำนวน booking ที่อัปเดต"""
+    db.create_all()
+    ensure_messenger_columns(log)
+
+    counts = Counter()
+    for model in (Booking, BookingArchive):
+        rows = (
+            db.session.query(model.messenger_name, func.count())
+            .filter(model.messenger_name.isnot(None), model.messenger_id.is_(None))
+            .group_by(model.messenger_name)
+            .all()
+        )
+        for raw, n in rows:
+            counts[raw] += n
+
+    updated = 0
+    for key, (name, variants) in sorted(group_names(counts).items()):
+        log(f" - {name}: {', '.join(repr(v) for v in variants)}")
+        if dry_run:
+            continue
+
+        messenger = Messenger.query.filter_by(name_key=key).first()
+        if messenger is None:
+            messenger = Messenger(name=name, name_key=key)
+            db.session.add(messenger)
+            db.session.flush()
+
+        for model in (Booking, BookingArchive):
+            result = db.session.execute(
+                update(model.__table__)
+                .where(
+                    model.__table__.c.messenger_name.in_(variants),
+                    model.__table__.c.messenger_id.is_(None),
+                )
+                .values(messenger_id=messenger.id, messenger_name=messenger.name)
+            )
+            updated += result.rowcount
+        db.session.commit()
+
+    return updated
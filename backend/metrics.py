@@ -0,0 +1,212 @@
+# metrics.py
+"""
+Metrics แบบ Prometheus (text exposition format) — ไม่ต้องพึ่ง prometheus_client
+
+    GET /metrics   (ถ้าตั้ง METRICS_TOKEN ต้องส่ง Authorization: Bearer <token>)
+
+- http_requests_total{blueprint,endpoint,method,status}
+- http_request_duration_seconds{blueprint,endpoint}        (histogram)
+- export_duration_seconds{format} / export_size_bytes{format} (Excel / PDF / Parquet)
+- jwt_failures_total{reason}
+metric อื่นลงทะเบียนเพิ่มได้ผ่าน registry.counter / histogram / gauge
+ค่าเก็บต่อ process (หลาย worker → Prometheus รวมเองตาม instance)
+"""
+
+import bisect
+import threading
+import time
+from functools import wraps
+
+from flask import Response, g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [count ต่อ bucket (ไม่สะสม)..., +Inf], sum
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][i] += 1
+            entry[1] += value
+
+    def _render_value(self, key, value):
+        counts, total = value
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            labels = _labels(self.labelnames, key, [f'le="{le}"'])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests", ("blueprint", "endpoint", "method", "status")
+)
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("blueprint", "endpoint")
+)
+export_duration = registry.histogram(
+    "export_duration_seconds", "Report export build time", ("format",)
+)
+export_size = registry.histogram(
+    "export_size_bytes", "Report export size", ("format",), buckets=SIZE_BUCKETS
+)
+jwt_failures = registry.counter("jwt_failures_total", "JWT authentication failures", ("reason",))
+
+
+def track_export(fmt: str):
+    """decorator ของ route ที่คืนไฟล์ export (Excel / PDF)"""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            response = fn(*args, **kwargs)
+            if getattr(response, "status_code", 500) == 200:
+                export_duration.observe(time.perf_counter() - t0, format=fmt)
+                if response.content_length is not None:
+                    export_size.observe(response.content_length, format=fmt)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+class Metrics:
+    def init_app(self, app):
+        self.token = app.config.get("METRICS_TOKEN", "")
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.add_url_rule("/metrics", "metrics", self._expose)
+
+    def _before(self):
+        g._metrics_t0 = time.perf_counter()
+
+    def _after(self, response):
+        t0 = g.pop("_metrics_t0", None)
+        if t0 is None or request.endpoint == "metrics":
+            return response
+        blueprint = request.blueprint or ""
+        endpoint = request.endpoint or "unknown"
+        http_requests.inc(
+            blueprint=blueprint,
+            endpoint=endpoint,
+            method=request.method,
+            status=response.status_code,
+        )
+        http_duration.observe(time.perf_counter() - t0, blueprint=blueprint, endpoint=endpoint)
+        return response
+
+    def _expose(self):
+        if self.token and request.headers.get("Authorization") != f"Bearer {self.token}":
+            return Response("forbidden\n", status=403, mimetype="text/plain")
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+metrics = Metrics()
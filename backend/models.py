@@ -1,8 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, func
 
-db = SQLAlchemy()
+from passwords import hash_password, verify_password
+from replica import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class User(db.Model):
@@ -43,11 +46,13 @@ class User(db.Model):
 
     # ---------------- password helper ---------------- #
 
+    # hash บน pool จำกัดขนาด (ดู passwords.py) — อาจ raise PasswordHashBusy
+
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     # ---------------- serialize ---------------- #
 
@@ -69,6 +74,25 @@ class User(db.Model):
         return f"<User {self.username} ({self.role})>"
 
 
+# ค้นหา user ฝั่ง admin แบบ prefix ไม่สนตัวพิมพ์ (user_search_filter ใน routes/admin.py)
+# Postgres: text_pattern_ops → LIKE 'abc%' ใช้ index ได้ไม่ว่า collation ของ DB จะเป็นอะไร
+db.Index(
+    "ix_users_lower_username",
+    func.lower(User.username).label("lower_username"),
+    postgresql_ops={"lower_username": "text_pattern_ops"},
+)
+db.Index(
+    "ix_users_lower_full_name",
+    func.lower(User.full_name).label("lower_full_name"),
+    postgresql_ops={"lower_full_name": "text_pattern_ops"},
+)
+db.Index(
+    "ix_users_lower_email",
+    func.lower(User.email).label("lower_email"),
+    postgresql_ops={"lower_email": "text_pattern_ops"},
+)
+
+
 class Company(db.Model):
     __tablename__ = "companies"
 
@@ -89,8 +113,43 @@ class Company(db.Model):
         return f"<Company {self.name}>"
 
 
+class Messenger(db.Model):
+    """
+    Messenger ที่รับงาน — booking อ้างอิงด้วย messenger_id
+    name_key = ชื่อที่ normalize แล้ว (กันชื่อซ้ำที่สะกดต่างกันแค่ช่องว่าง / ตัวพิมพ์)
+    """
+
+    __tablename__ = "messengers"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    name_key = db.Column(db.String(255), unique=True, nullable=False)
+    phone = db.Column(db.String(50))
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    bookings = db.relationship("Booking", backref="messenger", lazy="dynamic")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "phone": self.phone,
+            "is_active": self.is_active,
+        }
+
+    def __repr__(self):
+        return f"<Messenger {self.name}>"
+
+
 class Booking(db.Model):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # ใช้กับ incremental sync (/changes?since=)
+        db.Index("ix_bookings_updated_at_id", "updated_at", "id"),
+        # งานต่อ messenger (วันนี้ / ประวัติ / นับ)
+        db.Index("ix_bookings_messenger_date", "messenger_id", "booking_date"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey("companies.id"), nullable=False)
@@ -115,7 +174,9 @@ class Booking(db.Model):
     approved_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
     approved_at = db.Column(db.DateTime, nullable=True)
 
-    # 🔹 ชื่อ Messenger (เก็บเป็น text ตรง ๆ)
+    # 🔹 Messenger ที่รับงาน (ดู messengers.py)
+    messenger_id = db.Column(db.Integer, db.ForeignKey("messengers.id"), nullable=True)
+    # ชื่อ Messenger ตอนรับงาน (สำเนาจาก messengers.name → report / frontend เดิมใช้ต่อได้)
     messenger_name = db.Column(db.String(255), nullable=True)
 
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -153,8 +214,271 @@ class Booking(db.Model):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             # 🔹 ส่งชื่อ messenger ออกไปให้ frontend ใช้
+            "messenger_id": self.messenger_id,
             "messenger_name": self.messenger_name,
         }
 
     def __repr__(self):
-        return f"<Booking #{self.id} {self.booking_date} {self.booking_time}>"
\ No newline at end of file
+        return f"<Booking #{self.id} {self.booking_date} {self.booking_time}>"
+
+class BookingArchive(db.Model):
+    """
+    booking ที่ปิดแล้ว (SUCCESS / CANCEL) และเก่ากว่า cutoff
+    ย้ายมาจาก bookings ด้วย `flask archive-bookings` (ดู archive.py)
+    คอลัมน์เหมือน Booking ทุกตัว (id เดิม) → ใช้ to_dict เดียวกันได้
+    """
+
+    __tablename__ = "bookings_archive"
+    __table_args__ = (
+        db.Index("ix_bookings_archive_date", "booking_date", "booking_time"),
+        db.Index("ix_bookings_archive_company_date", "company_id", "booking_date"),
+        db.Index("ix_bookings_archive_messenger_date", "messenger_id", "booking_date"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    company_id = db.Column(db.Integer, db.ForeignKey("companies.id"), nullable=False)
+    booking_date = db.Column(db.Date, nullable=False)
+    booking_time = db.Column(db.Time, nullable=False)
+
+    requester_name = db.Column(db.String(255), nullable=False)
+    job_type = db.Column(db.String(100), nullable=False)
+    detail = db.Column(db.Text, nullable=False)
+
+    department = db.Column(db.String(255), nullable=False)
+    building = db.Column(db.String(255), nullable=False)
+    floor = db.Column(db.String(50), nullable=False)
+
+    contact_name = db.Column(db.String(255), nullable=False)
+    contact_phone = db.Column(db.String(50), nullable=False)
+
+    status = db.Column(db.String(20), nullable=False)
+
+    created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    approved_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    approved_at = db.Column(db.DateTime, nullable=True)
+
+    messenger_id = db.Column(db.Integer, db.ForeignKey("messengers.id"), nullable=True)
+    messenger_name = db.Column(db.String(255), nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    company = db.relationship("Company")
+
+    to_dict = Booking.to_dict
+
+    def __repr__(self):
+        return f"<BookingArchive #{self.id} {self.booking_date} {self.booking_time}>"
+
+
+class BookingSeries(db.Model):
+    """
+    booking ที่จองซ้ำทุกสัปดาห์ (ดู series.py)
+    เก็บข้อความครั้งเดียวที่ series — occurrence ถูก expand ตอนอ่าน
+    weekdays = "0,1,2,3,4" (0 = จันทร์ ตาม date.weekday())
+    """
+
+    __tablename__ = "booking_series"
+    __table_args__ = (
+        db.Index("ix_booking_series_dates", "start_date", "end_date"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey("companies.id"), nullable=False)
+    booking_time = db.Column(db.Time, nullable=False)
+
+    requester_name = db.Column(db.String(255), nullable=False)
+    job_type = db.Column(db.String(100), nullable=False)
+    detail = db.Column(db.Text, nullable=False)
+
+    department = db.Column(db.String(255), nullable=False)
+    building = db.Column(db.String(255), nullable=False)
+    floor = db.Column(db.String(50), nullable=False)
+
+    contact_name = db.Column(db.String(255), nullable=False)
+    contact_phone = db.Column(db.String(50), nullable=False)
+
+    # rule
+    weekdays = db.Column(db.String(20), nullable=False, default="0,1,2,3,4")
+    interval_weeks = db.Column(db.Integer, nullable=False, default=1)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=True)  # None = ไม่มีกำหนดสิ้นสุด
+
+    created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    company = db.relationship("Company")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "company_id": self.company_id,
+            "company_name": self.company.name if self.company else None,
+            "booking_time": self.booking_time.strftime("%H:%M") if self.booking_time else None,
+            "requester_name": self.requester_name,
+            "job_type": self.job_type,
+            "detail": self.detail,
+            "department": self.department,
+            "building": self.building,
+            "floor": self.floor,
+            "contact_name": self.contact_name,
+            "contact_phone": self.contact_phone,
+            "weekdays": [int(d) for d in self.weekdays.split(",") if d],
+            "interval_weeks": self.interval_weeks,
+            "start_date": self.start_date.isoformat() if self.start_date else None,
+            "end_date": self.end_date.isoformat() if self.end_date else None,
+            "created_by": self.created_by,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    def __repr__(self):
+        return f"<BookingSeries #{self.id} {self.weekdays} from {self.start_date}>"
+
+
+class BookingSeriesException(db.Model):
+    """
+    วันที่ของ series ที่ไม่ต้อง expand แล้ว
+    booking_id = NULL → ข้ามวันนั้น, มีค่า → materialize เป็น Booking แล้ว
+    (ไม่ใส่ FK เพราะ booking อาจถูกย้ายไป bookings_archive)
+    """
+
+    __tablename__ = "booking_series_exceptions"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "series_id", "occurrence_date", name="uq_booking_series_exceptions_date"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    series_id = db.Column(db.Integer, db.ForeignKey("booking_series.id"), nullable=False)
+    occurrence_date = db.Column(db.Date, nullable=False)
+    booking_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class BookingTombstone(db.Model):
+    """
+    booking ที่ถูกลบ (ให้ client ที่ sync แบบ incremental ลบออกจาก cache)
+    บันทึกอัตโนมัติจาก event after_delete ของ Booking
+    """
+
+    __tablename__ = "booking_tombstones"
+
+    id = db.Column(db.Integer, primary_key=True)
+    booking_id = db.Column(db.Integer, nullable=False)
+    created_by = db.Column(db.Integer, nullable=True, index=True)
+    deleted_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, index=True
+    )
+
+
+@event.listens_for(Booking, "after_delete")
+def _record_booking_tombstone(mapper, connection, target):
+    # ใช้ connection เดียวกับ DELETE → อยู่ใน transaction เดียวกัน
+    connection.execute(
+        BookingTombstone.__table__.insert().values(
+            booking_id=target.id,
+            created_by=target.created_by,
+            deleted_at=datetime.utcnow(),
+        )
+    )
+
+
+class BookingEvent(db.Model):
+    """
+    log การเปลี่ยนแปลงของ booking แบบ append-only (เขียนใน transaction เดียวกัน ดู eventlog.py)
+    เก็บเป็นตัวเลขล้วน: kind / status เป็น small int, messenger / actor เป็น id
+    ไม่มี FK ไป bookings → อยู่ต่อได้แม้ booking ถูก archive / ลบ
+    """
+
+    __tablename__ = "booking_events"
+    __table_args__ = (
+        db.Index("ix_booking_events_occurred_at_id", "occurred_at", "id"),
+        db.Index("ix_booking_events_booking_id_id", "booking_id", "id"),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    booking_id = db.Column(db.Integer, nullable=False)
+    occurred_at = db.Column(db.DateTime, nullable=False)
+    kind = db.Column(db.SmallInteger, nullable=False)
+    status = db.Column(db.SmallInteger, nullable=False)
+    prev_status = db.Column(db.SmallInteger, nullable=True)
+    messenger_id = db.Column(db.Integer, nullable=True)
+    actor_id = db.Column(db.Integer, nullable=True)
+
+
+class RefreshToken(db.Model):
+    """
+    refresh token แบบหมุนเวียน (ดู tokens.py) — token ที่ client ถือคือ "<id>.<secret>"
+    เก็บแค่ sha256 ของ secret (32 bytes) + สถานะเป็น small int
+    family_id = id ของ token แรกหลัง login (ทุกรอบ rotate อยู่ family เดียวกัน)
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    id = db.Column(db.Integer, primary_key=True)
+    family_id = db.Column(db.Integer, nullable=True, index=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    token_hash = db.Column(db.LargeBinary(32), nullable=False)
+    status = db.Column(db.SmallInteger, nullable=False, default=0)  # 0 active, 1 rotated, 2 revoked
+    rotated_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class SlotCapacity(db.Model):
+    """
+    จำนวน messenger ที่รับงานได้ต่อช่วงเวลา (slot) ต่อวัน
+    - company_id / building / slot เป็น None = ใช้กับทุกค่า
+    - ถ้ามีหลาย rule ตรงกับ booking เดียวกัน ต้องผ่านทุก rule
+    """
+
+    __tablename__ = "slot_capacities"
+    __table_args__ = (
+        db.Index("ix_slot_capacities_scope", "company_id", "building", "slot"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey("companies.id"), nullable=True)
+    building = db.Column(db.String(255), nullable=True)
+    slot = db.Column(db.String(20), nullable=True)  # MORNING, AFTERNOON, ANY
+    capacity = db.Column(db.Integer, nullable=False)
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "company_id": self.company_id,
+            "building": self.building,
+            "slot": self.slot,
+            "capacity": self.capacity,
+            "is_active": self.is_active,
+        }
+
+    def __repr__(self):
+        return f"<SlotCapacity {self.company_id}/{self.building}/{self.slot} = {self.capacity}>"
+
+
+class IdempotencyKey(db.Model):
+    """
+    Idempotency-Key ของ POST ที่สร้างข้อมูล (ดู idempotency.py)
+    status_code = NULL → request แรกยังทำอยู่
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    # sha256 ของ body → key เดิมแต่ body ไม่ตรงกัน = ใช้ key ผิด
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
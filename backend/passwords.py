@@ -0,0 +1,105 @@
+# passwords.py
+"""
+Password hashing บน thread pool ที่จำกัดขนาด
+
+scrypt / pbkdf2 ของ hashlib ปล่อย GIL ระหว่างคำนวณ จึงรันใน thread ได้จริง
+pool นี้จำกัดจำนวน hash ที่ทำพร้อมกัน (PASSWORD_HASH_WORKERS) และคิวที่รอ
+(PASSWORD_HASH_MAX_PENDING) — เกินนั้น raise PasswordHashBusy ทันที (→ 503)
+แทนที่จะปล่อยให้ login storm กิน CPU ทุก worker
+
+bulk (import user ทีละหลายร้อยคน) ใช้ pool แยก (PASSWORD_BULK_WORKERS)
+→ import ใหญ่ไม่ไปแย่งคิวของ login และไม่โดน PasswordHashBusy กลางทาง
+hash_cost() วัดเวลา hash หนึ่งครั้งของ method ปัจจุบัน → userimport ใช้จำกัดขนาด import
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHashBusy(RuntimeError):
+    """pool เต็ม — ให้ client ลองใหม่ภายหลัง"""
+
+
+class HashPool:
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._timeout = None
+        self._bulk = None
+        self.bulk_workers = 1
+
+    def init_app(self, app):
+        cfg = app.config
+        workers = cfg.get("PASSWORD_HASH_WORKERS", 2)
+        pending = cfg.get("PASSWORD_HASH_MAX_PENDING", 16)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._slots = threading.BoundedSemaphore(workers + pending)
+        self._timeout = cfg.get("PASSWORD_HASH_TIMEOUT", 10)
+        self.bulk_workers = cfg.get("PASSWORD_BULK_WORKERS") or os.cpu_count() or 1
+        self._bulk = ThreadPoolExecutor(max_workers=self.bulk_workers, thread_name_prefix="pwhash-bulk")
+
+    def run(self, fn, *args, **kwargs):
+        if self._executor is None:
+            # ยังไม่ได้ init (เช่น script ที่ไม่ได้สร้าง app) → ทำ inline
+            return fn(*args, **kwargs)
+
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashBusy("password hashing is busy")
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self._timeout)
+        except FutureTimeout:
+            # คิวยาวเกิน PASSWORD_HASH_TIMEOUT → ตอบ 503 เหมือน pool เต็ม (งานใน pool ยังรันต่อจนจบ)
+            raise PasswordHashBusy("password hashing timed out") from None
+
+    def map(self, fn, items):
+        """fn(item) ของทุก item แบบขนานบน bulk pool → list ตามลำดับเดิม"""
+        if self._bulk is None:
+            return [fn(item) for item in items]
+        return list(self._bulk.map(fn, items))
+
+
+hash_pool = HashPool()
+
+
+def _method() -> str:
+    if has_app_context():
+        return current_app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+    return "scrypt"
+
+
+# method -> วินาทีต่อ hash (วัดครั้งแรกที่ใช้ แล้วจำไว้ต่อ worker)
+_costs = {}
+
+
+def hash_cost() -> float:
+    method = _method()
+    if method not in _costs:
+        t0 = time.perf_counter()
+        generate_password_hash("calibration-password", method=method)
+        _costs[method] = time.perf_counter() - t0
+    return _costs[method]
+
+
+def hash_password(password: str) -> str:
+    return hash_pool.run(generate_password_hash, password, method=_method())
+
+
+def hash_passwords(passwords) -> list:
+    """hash หลายรหัสพร้อมกัน (bulk import) — ผลเรียงตาม input"""
+    method = _method()
+    return hash_pool.map(lambda password: generate_password_hash(password, method=method), passwords)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    return hash_pool.run(check_password_hash, password_hash, password)
@@ -0,0 +1,198 @@
+# prerender.py
+"""
+Render ใบจอง PDF ล่วงหน้าหลังสร้าง booking
+
+BookingForm เรียก POST /api/bookings แล้ว GET /api/bookings/<id>/pdf ต่อทันที
+→ render ใน background ตั้งแต่ commit เสร็จ (signal booking_changed action="created")
+  GET /pdf: มีไฟล์แล้ว → ส่งเลย, กำลัง render → รอไม่เกิน PDF_PRERENDER_WAIT วินาที,
+            ไม่มี → render ใน request ตามเดิม
+
+ไฟล์ผูกกับ booking.updated_at → booking ถูกแก้ไขแล้ว (เช่นใส่ messenger) ไฟล์เก่าไม่ถูกใช้
+
+store เลือกผ่าน PDF_STORE_BACKEND:
+  "memory" → LRU ต่อ worker จำกัดขนาดรวม PDF_STORE_MAX_BYTES
+  "disk"   → ไฟล์ใน PDF_STORE_DIR (ใช้ร่วมกันทุก worker) จำกัดขนาดรวมเท่ากัน
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import registry
+from signals import booking_changed
+from slips import render_booking_slip, snapshot
+
+log = logging.getLogger("booking.prerender")
+
+slip_requests = registry.counter(
+    "booking_slip_requests_total", "Booking slip PDF requests by source", ("source",)
+)
+
+
+def version_of(booking) -> str:
+    return booking.updated_at.isoformat() if booking.updated_at else ""
+
+
+# ---------------- stores ---------------- #
+
+class MemoryArtifactStore:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # booking_id -> (version, bytes)
+        self._size = 0
+
+    def get(self, booking_id, version):
+        with self._lock:
+            entry = self._data.get(booking_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._data.move_to_end(booking_id)
+            return entry[1]
+
+    def put(self, booking_id, version, data: bytes):
+        with self._lock:
+            old = self._data.pop(booking_id, None)
+            if old is not None:
+                self._size -= len(old[1])
+            self._data[booking_id] = (version, data)
+            self._size += len(data)
+            while self._size > self.max_bytes and self._data:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class DiskArtifactStore:
+    # เช็คขนาดรวมทุก ๆ N ครั้งที่เขียน
+    TRIM_EVERY = 20
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, booking_id, version):
+        safe_version = version.replace(":", "").replace(".", "")
+        return os.path.join(self.directory, f"booking_{booking_id}_{safe_version}.pdf")
+
+    def get(self, booking_id, version):
+        try:
+            with open(self._path(booking_id, version), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, booking_id, version, data: bytes):
+        path = self._path(booking_id, version)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)  # atomic → worker อื่นไม่เห็นไฟล์ครึ่ง ๆ
+
+        self._writes += 1
+        if self._writes % self.TRIM_EVERY == 0:
+            self._trim()
+
+    def _trim(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pdf"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+# ---------------- extension ---------------- #
+
+class SlipPrerenderer:
+    def __init__(self):
+        self.enabled = False
+        self.store = None
+        self.wait = 2.0
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._pending = {}  # booking_id -> Future
+
+    def init_app(self, app):
+        cfg = app.config
+        self.enabled = cfg.get("PDF_PRERENDER", True)
+        if not self.enabled:
+            return
+        max_bytes = cfg.get("PDF_STORE_MAX_BYTES", 64 * 1024 * 1024)
+        if cfg.get("PDF_STORE_BACKEND", "memory") == "disk":
+            self.store = DiskArtifactStore(cfg["PDF_STORE_DIR"], max_bytes)
+        else:
+            self.store = MemoryArtifactStore(max_bytes)
+        self.wait = cfg.get("PDF_PRERENDER_WAIT", 2.0)
+        self._executor = ThreadPoolExecutor(
+            max_workers=cfg.get("PDF_PRERENDER_WORKERS", 1), thread_name_prefix="slip-render"
+        )
+        self._slots = threading.BoundedSemaphore(cfg.get("PDF_PRERENDER_QUEUE", 64))
+        booking_changed.connect(self._on_booking_changed, sender=app, weak=False)
+
+    def _on_booking_changed(self, sender, booking, action):
+        if action == "created":
+            self.submit(booking, booking.company.name if booking.company else "")
+
+    def submit(self, booking, company_name: str):
+        """เรียกหลัง commit — คิวเต็มก็ข้าม (GET /pdf จะ render เอง)"""
+        if not self._slots.acquire(blocking=False):
+            slip_requests.inc(source="dropped")
+            return
+        data = snapshot(booking)
+        version = version_of(booking)
+        future = self._executor.submit(self._render, data, company_name, version)
+        with self._lock:
+            self._pending[data.id] = future
+
+    def _render(self, data, company_name, version):
+        try:
+            self.store.put(data.id, version, render_booking_slip(data, company_name))
+        except Exception as e:
+            log.warning("booking slip prerender failed", extra={"booking_id": data.id, "error": str(e)})
+        finally:
+            with self._lock:
+                self._pending.pop(data.id, None)
+            self._slots.release()
+
+    def get(self, booking):
+        """PDF ที่ render ไว้แล้วของ booking (version ตรงกัน) หรือ None"""
+        if not self.enabled:
+            return None
+        version = version_of(booking)
+        data = self.store.get(booking.id, version)
+        if data is None:
+            with self._lock:
+                future = self._pending.get(booking.id)
+            if future is not None:
+                try:
+                    future.result(timeout=self.wait)
+                except Exception:
+                    pass
+                data = self.store.get(booking.id, version)
+                if data is not None:
+                    slip_requests.inc(source="waited")
+                    return data
+            slip_requests.inc(source="inline")
+            return None
+        slip_requests.inc(source="prerendered")
+        return data
+
+    def put(self, booking, data: bytes):
+        if self.enabled:
+            self.store.put(booking.id, version_of(booking), data)
+
+
+slip_prerenderer = SlipPrerenderer()
@@ -0,0 +1,229 @@
+# profiling.py
+"""
+Profiling ต่อ request
+
+1) timing breakdown (เปิดตลอด, ต้นทุนต่ำ)
+   - db        : เวลาใน cursor.execute (จาก SQLAlchemy engine event)
+   - serialize : ช่วงที่ route ครอบด้วย perf_phase("serialize")
+   - render    : ช่วงที่ route ครอบด้วย perf_phase("render") (Excel / PDF)
+   - send      : ตั้งแต่ handler คืน response จนส่งครบ (call_on_close)
+   - other     : ส่วนที่เหลือของ handler
+   เก็บ N request ล่าสุดต่อ endpoint → /api/admin/perf
+
+2) sampling profiler (opt-in)
+   - header X-Profile: <PROFILE_TOKEN> หรือสุ่มตาม PROFILE_SAMPLE_RATE
+   - thread แยกอ่าน stack ของ thread ที่รัน request ทุก PROFILE_INTERVAL_MS
+   - บันทึกเป็นไฟล์ collapsed stack (ใช้กับ flamegraph.pl / speedscope ได้)
+   request ที่ไม่ได้ถูก profile ไม่มี thread เพิ่ม
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.wsgi import ClosingIterator
+
+PHASES = ("db", "serialize", "render", "send", "other")
+
+
+# ---------------- phase timing ---------------- #
+
+def _perf():
+    if has_app_context():
+        return g.get("_perf")
+    return None
+
+
+@contextmanager
+def perf_phase(name: str):
+    """
+    with perf_phase("render"):
+        ...
+    เวลา DB ที่เกิดข้างใน (เช่น lazy load) ไม่นับซ้ำในเฟสนี้
+    """
+    perf = _perf()
+    if perf is None:
+        yield
+        return
+    db_before = perf["db"]
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0 - (perf["db"] - db_before)
+        perf[name] = perf.get(name, 0.0) + elapsed
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _perf() is not None:
+        conn.info.setdefault("_perf_t0", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    perf = _perf()
+    starts = conn.info.get("_perf_t0")
+    if perf is not None and starts:
+        perf["db"] += time.perf_counter() - starts.pop()
+
+
+# ---------------- sampling profiler ---------------- #
+
+class StackSampler(threading.Thread):
+    def __init__(self, target_ident: int, interval: float):
+        super().__init__(daemon=True, name="profiler")
+        self.target_ident = target_ident
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# ---------------- extension ---------------- #
+
+class RequestProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._window = 200
+        self._records = defaultdict(lambda: deque(maxlen=self._window))
+        self.sample_rate = 0.0
+        self.token = ""
+        self.interval = 0.005
+        self.profile_dir = None
+
+    def init_app(self, app):
+        cfg = app.config
+        if not cfg.get("PROFILING_ENABLED", True):
+            return
+        self._window = cfg.get("PERF_WINDOW", 200)
+        self.sample_rate = cfg.get("PROFILE_SAMPLE_RATE", 0.0)
+        self.token = cfg.get("PROFILE_TOKEN", "")
+        self.interval = cfg.get("PROFILE_INTERVAL_MS", 5) / 1000.0
+        self.profile_dir = cfg.get("PROFILE_DIR")
+
+        app.before_request(self._before)
+        app.after_request(self._after)
+        # exception ที่ไม่ถูกจัดการ (debug=True) → after_request ไม่ถูกเรียก แต่ teardown ถูกเรียกเสมอ
+        app.teardown_request(self._teardown)
+
+    def _wants_profile(self) -> bool:
+        if self.token and request.headers.get("X-Profile") == self.token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _before(self):
+        g._perf = {"db": 0.0, "start": time.perf_counter()}
+        if self._wants_profile():
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+            g._perf_sampler = sampler
+
+    def _after(self, response):
+        perf = g.pop("_perf", None)
+        if perf is None:
+            return response
+        handler_end = time.perf_counter()
+        endpoint = request.endpoint or "unknown"
+
+        sampler = g.pop("_perf_sampler", None)
+        if sampler is not None:
+            sampler.stop()
+            path = self._save_profile(endpoint, sampler.samples)
+            response.headers["X-Profile-File"] = os.path.basename(path)
+
+        record = {
+            "total": handler_end - perf["start"],
+            "db": perf["db"],
+            "serialize": perf.get("serialize", 0.0),
+            "render": perf.get("render", 0.0),
+        }
+        record["other"] = max(
+            record["total"] - record["db"] - record["serialize"] - record["render"], 0.0
+        )
+
+        def finish():
+            now = time.perf_counter()
+            record["send"] = now - handler_end
+            record["total"] = now - perf["start"]
+            with self._lock:
+                self._records[endpoint].append(record)
+
+        if response.direct_passthrough:
+            # send_file ส่ง file wrapper ตรง ๆ → callback ของ call_on_close ไม่ถูกเรียก
+            response.response = ClosingIterator(response.response, finish)
+        else:
+            response.call_on_close(finish)
+        return response
+
+    def _teardown(self, exc):
+        sampler = g.pop("_perf_sampler", None)
+        if sampler is not None:
+            # _after ไม่ได้หยุดให้ (request จบด้วย exception) → หยุด thread ทิ้ง ไม่บันทึก profile
+            sampler.stop()
+
+    def _save_profile(self, endpoint: str, samples: Counter) -> str:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = f"{endpoint.replace('.', '_')}-{time.strftime('%Y%m%d-%H%M%S')}-{random.randint(0, 9999):04d}.collapsed"
+        path = os.path.join(self.profile_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    # ---------------- report ---------------- #
+
+    def breakdown(self):
+        """ต่อ endpoint: จำนวน request + mean / p50 / p95 ของแต่ละเฟส (ms)"""
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._records.items()}
+
+        result = {}
+        for endpoint, records in sorted(snapshot.items()):
+            stats = {"count": len(records)}
+            for phase in ("total",) + PHASES:
+                values = sorted(r.get(phase, 0.0) for r in records)
+                stats[phase] = {
+                    "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                    "p50_ms": round(values[len(values) // 2] * 1000, 2),
+                    "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 2),
+                }
+            result[endpoint] = stats
+        return result
+
+    def list_profiles(self):
+        if not self.profile_dir or not os.path.isdir(self.profile_dir):
+            return []
+        names = sorted(
+            (n for n in os.listdir(self.profile_dir) if n.endswith(".collapsed")),
+            reverse=True,
+        )
+        return [
+            {"name": n, "size": os.path.getsize(os.path.join(self.profile_dir, n))}
+            for n in names
+        ]
+
+
+request_profiler = RequestProfiler()
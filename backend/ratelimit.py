@@ -0,0 +1,103 @@
+# ratelimit.py
+"""
+Sliding-window rate limiter (ใช้กับ login)
+
+นับแบบ sliding window counter: เก็บแค่ (เริ่ม window, นับ window ก่อน, นับ window นี้)
+ต่อ key แล้วประมาณจำนวนใน window ที่เลื่อนด้วยสัดส่วนเวลา → O(1) ต่อครั้ง
+
+store เปลี่ยนได้ผ่าน RATELIMIT_BACKEND:
+  "memory"              → MemoryRateLimitStore (ต่อ worker)
+  "package.module:Class" → class ที่มี method hit / count / reset เหมือนกัน
+"""
+
+import importlib
+import math
+import threading
+import time
+
+
+class MemoryRateLimitStore:
+    # ล้าง key ที่หมดอายุเมื่อจำนวน key เกินค่านี้
+    PRUNE_THRESHOLD = 10000
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._data = {}  # key -> [window_start, prev_count, curr_count, window]
+
+    def _roll(self, key, window, now):
+        entry = self._data.get(key)
+        start = now - (now % window)
+        if entry is None or entry[3] != window:
+            entry = self._data[key] = [start, 0, 0, window]
+        elif start != entry[0]:
+            # เลื่อน window: ถ้าห่างเกิน 1 window แปลว่า window ก่อนหน้าว่าง
+            entry[1] = entry[2] if start - entry[0] == window else 0
+            entry[2] = 0
+            entry[0] = start
+        return entry
+
+    @staticmethod
+    def _estimate(entry, now) -> float:
+        start, prev, curr, window = entry
+        weight = 1.0 - (now - start) / window
+        return prev * weight + curr
+
+    def count(self, key: str, window: int) -> float:
+        now = time.time()
+        with self._lock:
+            if key not in self._data:
+                return 0.0
+            return self._estimate(self._roll(key, window, now), now)
+
+    def hit(self, key: str, window: int) -> float:
+        now = time.time()
+        with self._lock:
+            if len(self._data) > self.PRUNE_THRESHOLD:
+                self._prune(now)
+            entry = self._roll(key, window, now)
+            entry[2] += 1
+            return self._estimate(entry, now)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def _prune(self, now):
+        stale = [k for k, e in self._data.items() if now - e[0] >= 2 * e[3]]
+        for k in stale:
+            del self._data[k]
+
+
+BACKENDS = {"memory": MemoryRateLimitStore}
+
+
+class RateLimiter:
+    def __init__(self):
+        self.store = MemoryRateLimitStore()
+
+    def init_app(self, app):
+        name = app.config.get("RATELIMIT_BACKEND", "memory")
+        if name in BACKENDS:
+            store_cls = BACKENDS[name]
+        else:
+            module_name, _, cls_name = name.partition(":")
+            store_cls = getattr(importlib.import_module(module_name), cls_name)
+        self.store = store_cls(app)
+
+    def retry_after(self, key: str, limit: int, window: int):
+        """คืนจำนวนวินาทีที่ต้องรอ ถ้าเกิน limit แล้ว, ไม่เกินคืน None"""
+        if limit <= 0:
+            return None
+        if self.store.count(key, window) < limit:
+            return None
+        now = time.time()
+        return max(1, math.ceil(window - (now % window)))
+
+    def hit(self, key: str, window: int) -> float:
+        return self.store.hit(key, window)
+
+    def reset(self, key: str):
+        self.store.reset(key)
+
+
+rate_limiter = RateLimiter()
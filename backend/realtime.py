@@ -0,0 +1,238 @@
+# realtime.py
+"""
+Pub/sub ของการเปลี่ยนแปลง booking สำหรับ Server-Sent Events
+
+- EventBroker เก็บ event ล่าสุดไว้ใน ring buffer (ให้ client resume ด้วย
+  Last-Event-ID ได้) และกระจายเข้า queue ของ subscriber แต่ละคน
+- backend "memory"   : ส่งตรงภายใน worker เดียว (ค่า default)
+- backend "postgres" : ส่งผ่าน NOTIFY/LISTEN ของ Postgres ให้ทุก worker เห็น
+  (แต่ละ worker มี thread LISTEN ของตัวเองแล้วป้อนเข้า broker ภายใน)
+- event id ออกโดย backend ตามลำดับที่ event ถูกส่งจริง → buffer เรียงตาม id เสมอ
+  (resume ด้วย id > Last-Event-ID และเช็ค reset ด้วย id แรกของ buffer จึงไม่ข้าม event)
+  postgres: sequence กลาง + advisory lock ถึง commit → id เรียงตามลำดับ commit = ลำดับ NOTIFY
+"""
+
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import text
+
+from models import db
+from signals import booking_changed
+
+log = logging.getLogger("booking.realtime")
+
+# NOTIFY payload จำกัด 8000 bytes
+NOTIFY_MAX_BYTES = 7900
+
+
+class Subscription:
+    def __init__(self, user_id: int, is_admin: bool, max_queue: int):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.closed = False
+
+    def accepts(self, event) -> bool:
+        return self.is_admin or event.get("user_id") == self.user_id
+
+
+class MemoryBackend:
+    def __init__(self, broker):
+        self.broker = broker
+        # ออก id + dispatch เป็นก้อนเดียว → thread อื่นแทรกระหว่างกลางไม่ได้
+        self._lock = threading.Lock()
+
+    def send(self, event):
+        with self._lock:
+            event["id"] = self.broker.next_id()
+            self.broker.dispatch(event)
+
+
+class PostgresNotifyBackend:
+    def __init__(self, broker, app, channel: str):
+        self.broker = broker
+        self.app = app
+        self.channel = channel
+        self.sequence = f"{channel}_ids"
+        self._started = False
+        self._sequence_ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._listen_forever, daemon=True).start()
+
+    def _payload(self, event) -> str:
+        payload = json.dumps(event, ensure_ascii=False, default=str)
+        if len(payload.encode("utf-8")) > NOTIFY_MAX_BYTES:
+            # ใหญ่เกิน → ส่งแค่ id ให้ client ไปโหลดใหม่เอง
+            slim = {k: v for k, v in event.items() if k != "booking"}
+            slim["truncated"] = True
+            payload = json.dumps(slim, ensure_ascii=False, default=str)
+        return payload
+
+    def send(self, event):
+        self._ensure_listener()
+        with db.engine.begin() as conn:
+            # ถือ lock ถึง commit → worker อื่นได้ id ถัดไปหลังจาก NOTIFY นี้ถูกส่งแล้วเท่านั้น
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:channel))"), {"channel": self.channel})
+            if not self._sequence_ready:
+                # เริ่มจาก microsecond timestamp → ต่อจาก id แบบเดิม (Last-Event-ID ของ client ไม่ย้อน)
+                start = time.time_ns() // 1000
+                conn.execute(text(f'CREATE SEQUENCE IF NOT EXISTS "{self.sequence}" START WITH {start}'))
+            event["id"] = conn.execute(text("SELECT nextval(:sequence)"), {"sequence": self.sequence}).scalar()
+            conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": self._payload(event)},
+            )
+        self._sequence_ready = True
+
+    def _listen_forever(self):
+        import psycopg2
+
+        dsn = self.app.config["SQLALCHEMY_DATABASE_URI"].replace(
+            "postgresql+psycopg2://", "postgresql://"
+        )
+        while True:
+            try:
+                conn = psycopg2.connect(dsn)
+                conn.set_isolation_level(0)  # autocommit
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self.channel}"')
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        note = conn.notifies.pop(0)
+                        self.broker.dispatch(json.loads(note.payload))
+            except Exception as e:
+                log.warning("realtime LISTEN error, reconnecting", extra={"error": str(e)})
+                time.sleep(2)
+
+
+class EventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffer = deque(maxlen=1000)
+        self._subscribers = set()
+        self._last_id = 0
+        self._max_queue = 1000
+        self.backend = MemoryBackend(self)
+
+    def init_app(self, app):
+        cfg = app.config
+        self._buffer = deque(maxlen=cfg.get("EVENTS_BUFFER_SIZE", 1000))
+        self._max_queue = cfg.get("EVENTS_MAX_QUEUE", 1000)
+
+        if cfg.get("EVENTS_BACKEND", "memory") == "postgres":
+            self.backend = PostgresNotifyBackend(
+                self, app, cfg.get("EVENTS_CHANNEL", "booking_events")
+            )
+        else:
+            self.backend = MemoryBackend(self)
+
+        booking_changed.connect(self._on_booking_changed, sender=app, weak=False)
+
+    # ---------------- publish ---------------- #
+
+    def next_id(self) -> int:
+        # memory backend: microsecond timestamp → restart แล้ว id ยังไม่ย้อนกลับ (ใช้เป็น Last-Event-ID)
+        with self._lock:
+            self._last_id = max(time.time_ns() // 1000, self._last_id + 1)
+            return self._last_id
+
+    def publish(self, event_type: str, user_id: int, payload: dict):
+        event = {
+            "id": None,  # ใส่โดย backend ตอนส่ง
+            "type": event_type,
+            "user_id": user_id,
+            **payload,
+        }
+        try:
+            self.backend.send(event)
+        except Exception as e:
+            # push ล้มเหลวไม่ควรทำให้ request ที่ commit แล้ว error
+            log.exception("realtime publish error")
+
+    def _on_booking_changed(self, sender, booking, action):
+        self.publish(
+            f"booking.{action}",
+            booking.created_by,
+            {"booking_id": booking.id, "booking": booking.to_dict()},
+        )
+
+    def dispatch(self, event):
+        with self._lock:
+            self._last_id = max(self._last_id, event["id"])
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+
+        for sub in subscribers:
+            if sub.closed or not sub.accepts(event):
+                continue
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                # client ช้าเกิน → ปิด stream ให้ reconnect ด้วย Last-Event-ID
+                sub.closed = True
+
+    # ---------------- subscribe ---------------- #
+
+    def subscribe(self, user_id: int, is_admin: bool, last_event_id: int = None):
+        """
+        คืน (subscription, replay, reset)
+        reset = True เมื่อ last_event_id เก่ากว่า buffer → client ควรโหลด list ใหม่ทั้งหมด
+        """
+        sub = Subscription(user_id, is_admin, self._max_queue)
+        with self._lock:
+            self._subscribers.add(sub)
+            buffered = list(self._buffer)
+
+        replay, reset = [], False
+        if last_event_id is not None:
+            # buffer ว่าง (worker เพิ่ง start) หรือ event เก่าสุดใหม่กว่าที่ client มี
+            # → ไม่รู้ว่าพลาดอะไรไปบ้าง
+            reset = not buffered or buffered[0]["id"] > last_event_id
+            replay = [e for e in buffered if e["id"] > last_event_id and sub.accepts(e)]
+        return sub, replay, reset
+
+    def unsubscribe(self, sub):
+        sub.closed = True
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def stream(self, sub, replay, reset, keepalive: int):
+        """generator ของข้อความ SSE"""
+        try:
+            yield "retry: 3000\n\n"
+            if reset:
+                yield format_sse({"id": self._last_id, "type": "reset"})
+            for event in replay:
+                yield format_sse(event)
+            while not sub.closed:
+                try:
+                    event = sub.queue.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            self.unsubscribe(sub)
+
+
+def format_sse(event) -> str:
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+event_broker = EventBroker()
@@ -0,0 +1,161 @@
+# replica.py
+"""
+ส่ง query อ่านอย่างเดียวของ report / export / stats ไป read replica
+
+    DATABASE_REPLICA_URL=postgresql://...@db-replica:5432/messenger_db
+
+- route ที่ครอบด้วย @replica_read จะอ่านจาก replica ถ้า
+    1) ตั้ง DATABASE_REPLICA_URL ไว้ (→ SQLALCHEMY_BINDS["replica"])
+    2) replica ตามทัน primary ไม่เกิน REPLICA_MAX_LAG_SECONDS
+       (เทียบ max(bookings.updated_at) ของสองฝั่ง เช็คทุก REPLICA_LAG_CHECK_INTERVAL วินาที)
+    3) user คนนั้นไม่ได้เขียนข้อมูลภายใน REPLICA_MAX_LAG_SECONDS ที่ผ่านมา
+       (read-after-write → อ่าน primary จนกว่า replica จะตามทัน)
+- flush / insert / update / delete ไป primary เสมอ
+- replica ต่อไม่ได้ → กลับไปใช้ primary จนกว่าจะเช็ครอบถัดไป
+"""
+
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, func, select
+from sqlalchemy.sql import Select
+
+from metrics import registry
+
+REPLICA_BIND = "replica"
+
+log = logging.getLogger("booking.replica")
+
+replica_lag = registry.gauge("db_replica_lag_seconds", "Read replica lag behind primary (-1 = unavailable)")
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and (clause is None or isinstance(clause, Select))
+            and has_app_context()
+            and g.get("_use_replica")
+        ):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_write(session, flush_context):
+    if has_app_context():
+        g._db_wrote = True
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.enabled = False
+        self.max_lag = 30.0
+        self.check_interval = 5.0
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._healthy = False
+        self._lag = None
+        self._sticky = {}  # user_id → monotonic time ที่ต้องอ่าน primary ถึง
+
+    def init_app(self, app):
+        self.enabled = REPLICA_BIND in (app.config.get("SQLALCHEMY_BINDS") or {})
+        self.max_lag = app.config.get("REPLICA_MAX_LAG_SECONDS", 30)
+        self.check_interval = app.config.get("REPLICA_LAG_CHECK_INTERVAL", 5)
+        if self.enabled:
+            app.after_request(self._after)
+
+    # ---------------- staleness ---------------- #
+
+    def _measure_lag(self, db):
+        from models import Booking
+
+        query = select(func.max(Booking.updated_at))
+        with db.engines[None].connect() as conn:
+            primary = conn.execute(query).scalar()
+        with db.engines[REPLICA_BIND].connect() as conn:
+            replica = conn.execute(query).scalar()
+
+        if primary is None or (replica is not None and replica >= primary):
+            return 0.0
+        if replica is None:
+            return float("inf")
+        return (primary - replica).total_seconds()
+
+    def replica_ok(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return self._healthy
+            # ให้ request อื่นใช้ผลเดิมระหว่างเช็ค
+            self._checked_at = now
+
+        db = current_app.extensions["sqlalchemy"]
+        try:
+            lag = self._measure_lag(db)
+        except Exception as e:
+            log.warning("replica unavailable", extra={"error": str(e)})
+            lag = None
+
+        healthy = lag is not None and lag <= self.max_lag
+        with self._lock:
+            if healthy != self._healthy:
+                log.info("replica routing changed", extra={"healthy": healthy, "lag_seconds": lag})
+            self._healthy, self._lag = healthy, lag
+        replica_lag.set(-1 if lag is None else min(lag, 1e9))
+        return healthy
+
+    # ---------------- read-after-write ---------------- #
+
+    def _after(self, response):
+        if not g.pop("_db_wrote", False):
+            return response
+        try:
+            user_id = get_jwt_identity()
+        except Exception:
+            user_id = None
+        if user_id is not None:
+            now = time.monotonic()
+            with self._lock:
+                self._sticky[user_id] = now + self.max_lag
+                if len(self._sticky) > 10000:
+                    self._sticky = {k: v for k, v in self._sticky.items() if v > now}
+        return response
+
+    def _sticky_primary(self) -> bool:
+        try:
+            user_id = get_jwt_identity()
+        except Exception:
+            return False
+        with self._lock:
+            until = self._sticky.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def use_replica(self) -> bool:
+        return self.enabled and not self._sticky_primary() and self.replica_ok()
+
+
+replica_router = ReplicaRouter()
+
+
+def replica_read(fn):
+    """ครอบ route ที่อ่านอย่างเดียว (วางหลัง @admin_required)"""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not replica_router.use_replica():
+            return fn(*args, **kwargs)
+        g._use_replica = True
+        g._read_replica = True  # ให้ cache.py รู้ว่าผลนี้อาจช้ากว่า primary
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            g._use_replica = False
+
+    return wrapper
@@ -1,12 +1,15 @@
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, Response, jsonify, request, send_file, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from contextlib import ExitStack
 from functools import wraps
 from io import BytesIO
 import datetime as dt
+import logging
 import os
+from collections import Counter
 
 import pandas as pd
-from sqlalchemy import func
+from sqlalchemy import func, or_
 
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.pdfgen import canvas
@@ -16,9 +19,29 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 
-from models import db, User, Booking, Company
+from models import db, User, Booking, BookingArchive, BookingSeries, Company, Messenger, SlotCapacity
+from archive import needs_archive, merge_newest_first
+from capacity import SLOTS, ACTIVE_STATUSES, slot_of, slot_index, reserve_lock, locked_full_rule
+from dispatch import plan_day, load_distance_matrix
+from board import dispatch_board
+from signals import notify_booking_changed
+from sync import fetch_changes
+from profiling import perf_phase, request_profiler
+from metrics import track_export
+from replica import replica_read
+from cache import cached_result, result_cache
+from admission import admit, admission, ExportTooLarge, too_large_response
+import analytics
+import columnar
+import series as booking_series
+import eventlog
+import tokens
+import userimport
+from routes.booking import slot_full_response
+from messengers import assign, active_names, default_messenger_name, resolve_messenger, normalize_name
 
 admin_bp = Blueprint("admin", __name__)
+log = logging.getLogger("booking.admin")
 
 # -------------------- Thai Font Register --------------------
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -27,9 +50,9 @@ THAI_FONT_PATH = os.path.join(FONT_DIR, "THSarabunNew.ttf")
 
 try:
     pdfmetrics.registerFont(TTFont("THSarabun", THAI_FONT_PATH))
-    print(f">>> Registered Thai font from {THAI_FONT_PATH}")
+    log.info("registered Thai font", extra={"path": THAI_FONT_PATH})
 except Exception as e:
-    print(">>> WARNING: Cannot register Thai font:", e)
+    log.warning("cannot register Thai font", extra={"path": THAI_FONT_PATH, "error": str(e)})
 
 
 # -------------------- Admin Only Middleware --------------------
@@ -54,6 +77,55 @@ def admin_required(fn):
 
 
 # -------------------- Dynamic Filtering Search Builder --------------------
+def parse_report_filters(args=None):
+    """args = mapping ของ query string (default request.args)"""
+    args = request.args if args is None else args
+    filters = {}
+
+    for key in ("start_date", "end_date"):
+        value = args.get(key)
+        if value:
+            try:
+                filters[key] = dt.date.fromisoformat(value)
+            except Exception:
+                pass
+
+    if args.get("status"):
+        filters["status"] = args.get("status")
+
+    company_id = args.get("company_id")
+    if company_id:
+        try:
+            filters["company_id"] = int(company_id)
+        except Exception:
+            pass
+
+    return filters
+
+
+def apply_report_filters(q, model, filters):
+    """ใช้ได้ทั้ง Query (session.query) และ select() — model = Booking หรือ BookingArchive"""
+    if "start_date" in filters:
+        q = q.filter(model.booking_date >= filters["start_date"])
+    if "end_date" in filters:
+        q = q.filter(model.booking_date <= filters["end_date"])
+    if "status" in filters:
+        q = q.filter(model.status == filters["status"])
+    if "company_id" in filters:
+        q = q.filter(model.company_id == filters["company_id"])
+
+    return q.order_by(model.booking_date.desc(), model.booking_time.desc())
+
+
+def filtered_query(model, filters):
+    """query (model, Company) — model = Booking หรือ BookingArchive (column เหมือนกัน)"""
+    q = (
+        db.session.query(model, Company)
+        .join(Company, model.company_id == Company.id)
+    )
+    return apply_report_filters(q, model, filters)
+
+
 def build_query_from_filters():
     """
     ใช้ร่วมกันทั้ง /report, /report/excel, /report/pdf
@@ -62,40 +134,39 @@ def build_query_from_filters():
       ?end_date=YYYY-MM-DD
       ?status=PENDING|SUCCESS|CANCEL
       ?company_id=1
+    ถ้าช่วงวันที่ย้อนไปถึงข้อมูลที่ archive แล้ว จะรวม bookings_archive ให้ด้วย
+    รวม occurrence ของ booking ซ้ำที่ยังไม่ materialize (ช่วงวันที่ตาม series.window)
     """
-    q = (
-        db.session.query(Booking, Company)
-        .join(Company, Booking.company_id == Company.id)
-    )
+    filters = parse_report_filters()
+    rows = filtered_query(Booking, filters).all()
 
-    start = request.args.get("start_date")
-    end = request.args.get("end_date")
-    status = request.args.get("status")
-    company_id = request.args.get("company_id")
+    if needs_archive(filters.get("start_date")):
+        rows = merge_newest_first(rows, filtered_query(BookingArchive, filters).all())
 
-    if start:
-        try:
-            q = q.filter(Booking.booking_date >= dt.date.fromisoformat(start))
-        except Exception:
-            pass
+    start, end = booking_series.window(filters.get("start_date"), filters.get("end_date"))
+    return merge_newest_first(rows, booking_series.expand(start, end, filters=filters))
 
-    if end:
-        try:
-            q = q.filter(Booking.booking_date <= dt.date.fromisoformat(end))
-        except Exception:
-            pass
 
-    if status:
-        q = q.filter(Booking.status == status)
+def estimate_report_rows():
+    """COUNT แถวที่ build_query_from_filters จะคืน (ใช้ประเมิน admission ของ export)"""
+    filters = parse_report_filters()
+    models = (Booking, BookingArchive) if needs_archive(filters.get("start_date")) else (Booking,)
+    total = 0
+    for model in models:
+        q = db.session.query(func.count(model.id))
+        total += apply_report_filters(q, model, filters).order_by(None).scalar()
+    return total
 
-    if company_id:
-        try:
-            q = q.filter(Booking.company_id == int(company_id))
-        except Exception:
-            pass
 
-    q = q.order_by(Booking.booking_date.desc(), Booking.booking_time.desc())
-    return q.all()
+def grouped_counts(column_of):
+    """นับ booking ต่อค่า column_of(model) รวม hot + archive (ถ้ามีข้อมูลใน archive)"""
+    counts = Counter()
+    models = (Booking, BookingArchive) if needs_archive() else (Booking,)
+    for model in models:
+        col = column_of(model)
+        for key, n in db.session.query(col, func.count()).group_by(col).all():
+            counts[key] += n
+    return counts
 
 
 def to_dict_list(rows):
@@ -132,25 +203,65 @@ def get_all_bookings():
         .order_by(Booking.booking_date.desc(), Booking.booking_time.desc())
         .all()
     )
-    return jsonify(to_dict_list(rows)), 200
+    # occurrence ของ booking ซ้ำ: ?start_date ?end_date (default วันนี้ ± N วัน)
+    filters = parse_report_filters()
+    start, end = booking_series.window(filters.get("start_date"), filters.get("end_date"))
+    rows = merge_newest_first(rows, booking_series.expand(start, end))
+    with perf_phase("serialize"):
+        data = to_dict_list(rows)
+    return jsonify(data), 200
+
+
+@admin_bp.route("/bookings/changes", methods=["GET"])
+@jwt_required()
+@admin_required
+def get_booking_changes():
+    """
+    GET /api/admin/bookings/changes?since=<watermark>&limit=500
+    เหมือน /bookings แต่คืนเฉพาะแถวที่เปลี่ยนหลัง watermark (+ id ที่ถูกลบ)
+    """
+    q = db.session.query(Booking, Company).join(Company, Booking.company_id == Company.id)
+    try:
+        changes = fetch_changes(
+            q, request.args.get("since"), request.args.get("limit", type=int)
+        )
+    except ValueError:
+        return jsonify({"message": "invalid since watermark"}), 400
+
+    return jsonify(
+        {
+            "bookings": to_dict_list(changes["rows"]),
+            "deleted": changes["deleted"],
+            "watermark": changes["watermark"],
+            "has_more": changes["has_more"],
+        }
+    ), 200
 
 
 # -------------------- 2) Generate JSON Report (หน้า Report) --------------------
 @admin_bp.route("/report", methods=["GET"])
 @jwt_required()
 @admin_required
+@cached_result("report")
+@replica_read
 def report():
     rows = build_query_from_filters()
-    return jsonify(to_dict_list(rows)), 200
+    with perf_phase("serialize"):
+        data = to_dict_list(rows)
+    return jsonify(data), 200
 
 
 # -------------------- 3) Excel Export --------------------
 @admin_bp.route("/report/excel", methods=["GET"])
 @jwt_required()
 @admin_required
+@track_export("excel")
+@replica_read
+@admit("export", estimate=estimate_report_rows)
 def report_excel():
     rows = build_query_from_filters()
-    data = to_dict_list(rows)
+    with perf_phase("serialize"):
+        data = to_dict_list(rows)
 
     # เลือกเฉพาะคอลัมน์ที่ต้องใช้ใน Excel
     records = []
@@ -171,11 +282,11 @@ def report_excel():
             }
         )
 
-    df = pd.DataFrame(records)
-
-    output = BytesIO()
-    df.to_excel(output, index=False, engine="openpyxl")
-    output.seek(0)
+    with perf_phase("render"):
+        df = pd.DataFrame(records)
+        output = BytesIO()
+        df.to_excel(output, index=False, engine="openpyxl")
+        output.seek(0)
 
     return send_file(
         output,
@@ -189,9 +300,13 @@ def report_excel():
 @admin_bp.route("/report/pdf", methods=["GET"])
 @jwt_required()
 @admin_required
+@track_export("pdf")
+@replica_read
+@admit("export", estimate=estimate_report_rows)
 def report_pdf():
     rows = build_query_from_filters()
-    data = to_dict_list(rows)
+    with perf_phase("serialize"):
+        data = to_dict_list(rows)
 
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
@@ -248,7 +363,8 @@ def report_pdf():
         )
     )
 
-    doc.build([table])
+    with perf_phase("render"):
+        doc.build([table])
     buffer.seek(0)
 
     return send_file(
@@ -259,13 +375,108 @@ def report_pdf():
     )
 
 
+# -------------------- 4.1) Parquet Export (BI) --------------------
+@admin_bp.route("/report/parquet", methods=["GET"])
+@jwt_required()
+@admin_required
+@replica_read
+def report_parquet():
+    """
+    GET /api/admin/report/parquet?start_date&end_date&status&company_id
+    GET /api/admin/report/parquet?since=<watermark>   (เฉพาะแถวที่เปลี่ยนหลัง watermark)
+    ไฟล์ถูกสร้างและส่งทีละ row group (ดู columnar.py)
+    """
+    try:
+        plan = columnar.ExportPlan(parse_report_filters(), request.args.get("since"))
+    except ValueError:
+        return jsonify({"message": "invalid since watermark"}), 400
+
+    # slot ของ admission ต้องอยู่จน stream จบ ไม่ใช่แค่จน route return
+    held = ExitStack()
+    try:
+        held.enter_context(admission.slot("export", plan.count()))
+    except ExportTooLarge as e:
+        return too_large_response("export", e)
+
+    try:
+        partitions = plan.open(current_app.config["EXPORT_PARQUET_BATCH_ROWS"])
+    except Exception:
+        held.close()
+        raise
+
+    headers = {"Content-Disposition": "attachment; filename=messenger_report.parquet"}
+    if plan.watermark:
+        headers["X-Watermark"] = plan.watermark
+    response = Response(
+        stream_with_context(columnar.stream_parquet(plan, partitions, on_close=held.close)),
+        mimetype=columnar.MIMETYPE,
+        headers=headers,
+    )
+    # client ตัดก่อน chunk แรก → generator ข้างในไม่เคยเริ่ม (finally ไม่รัน)
+    # close ของ response รันเสมอ — ExitStack.close ซ้ำได้ (ครั้งที่สองไม่ทำอะไร)
+    response.call_on_close(held.close)
+    return response
+
+
 # -------------------- 5) User CRUD --------------------
 @admin_bp.route("/users", methods=["GET"])
 @jwt_required()
 @admin_required
+@replica_read
 def list_users():
-    users = User.query.order_by(User.id).all()
-    return jsonify([u.to_dict() for u in users]), 200
+    """
+    GET /api/admin/users?q=&role=&is_active=&page=1&page_size=50
+    q = prefix ของ username / full_name / email (ไม่สนตัวพิมพ์, ใช้ index lower(...))
+    คืน {"users", "total", "page", "page_size"} เรียงตาม id
+    """
+    page_size = min(
+        request.args.get("page_size", type=int) or current_app.config["USERS_PAGE_SIZE"],
+        current_app.config["USERS_MAX_PAGE_SIZE"],
+    )
+    page = max(request.args.get("page", type=int) or 1, 1)
+
+    q = User.query
+    term = (request.args.get("q") or "").strip().lower()
+    if term:
+        q = q.filter(
+            or_(
+                user_search_filter(User.username, term),
+                user_search_filter(User.full_name, term),
+                user_search_filter(User.email, term),
+            )
+        )
+    if request.args.get("role"):
+        q = q.filter(User.role == request.args["role"].upper())
+    if request.args.get("is_active") in ("true", "false"):
+        q = q.filter(User.is_active.is_(request.args["is_active"] == "true"))
+
+    order = User.id
+    if term and db.engine.dialect.name != "postgresql":
+        # SQLite วางแผนจาก bound parameter โดยไม่รู้ว่าช่วง prefix แคบ → มักเลือกไล่ PK ตามลำดับ id
+        # (scan ทั้งตาราง) แทน index ค้นหา — "id + 0" ตัด PK ออกจากตัวเลือกของ ORDER BY
+        order = User.id + 0
+    total = q.order_by(None).count()
+    users = q.order_by(order).offset((page - 1) * page_size).limit(page_size).all()
+    return jsonify(
+        {
+            "users": [u.to_dict() for u in users],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+        }
+    ), 200
+
+
+def user_search_filter(column, prefix: str):
+    """lower(column) ขึ้นต้นด้วย prefix (prefix เป็นตัวเล็กแล้ว) ในรูปที่ index ของแต่ละ DB ใช้ได้"""
+    lowered = func.lower(column)
+    if db.engine.dialect.name == "postgresql":
+        # index สร้างด้วย text_pattern_ops → LIKE แบบ prefix ใช้ index ได้
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return lowered.like(escaped + "%", escape="\\")
+    # SQLite / อื่น ๆ: LIKE บน expression ไม่ใช้ index → ใช้ช่วง [prefix, prefix ถัดไป)
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return (lowered >= prefix) & (lowered < upper)
 
 
 @admin_bp.route("/users", methods=["POST"])
@@ -295,9 +506,42 @@ def create_user():
     u.set_password(password)
     db.session.add(u)
     db.session.commit()
+    result_cache.invalidate()  # total_users ใน /summary
     return jsonify({"id": u.id, "message": "created"}), 201
 
 
+@admin_bp.route("/users/import", methods=["POST"])
+@jwt_required()
+@admin_required
+def import_users():
+    """
+    POST /api/admin/users/import — สร้าง user ทีละมาก (ดู userimport.py)
+    JSON {"users": [...]} / list, ไฟล์ CSV (multipart "file") หรือ body text/csv
+    เกิน max_rows → 400 พร้อม "max_rows" ให้ client แบ่งส่ง
+    ตอบผลต่อแถว: {"created", "failed", "results": [...]}
+    """
+    if "file" in request.files:
+        rows = userimport.parse_csv(request.files["file"].read().decode("utf-8-sig"))
+    elif request.mimetype == "text/csv":
+        rows = userimport.parse_csv(request.get_data(as_text=True))
+    else:
+        data = request.get_json(silent=True)
+        rows = data.get("users") if isinstance(data, dict) else data
+
+    if not isinstance(rows, list) or not rows:
+        return jsonify({"message": "users (JSON list) or CSV file required"}), 400
+    # จำกัดตามเวลา hash (USER_IMPORT_HASH_BUDGET) → ไฟล์ใหญ่ client แบ่งส่งครั้งละ max_rows
+    max_rows = userimport.max_rows()
+    if len(rows) > max_rows:
+        return jsonify({"message": f"at most {max_rows} users per import", "max_rows": max_rows}), 400
+
+    results, created = userimport.import_users(rows)
+    if created:
+        result_cache.invalidate()  # total_users ใน /summary
+    log.info("users imported", extra={"rows": len(rows), "created_users": created})
+    return jsonify({"created": created, "failed": len(rows) - created, "results": results}), 200
+
+
 @admin_bp.route("/users/<int:id>", methods=["PUT"])
 @jwt_required()
 @admin_required
@@ -323,6 +567,8 @@ def update_user(id):
     u.phone = data.get("phone", u.phone)
 
     db.session.commit()
+    if not u.is_active:
+        tokens.revoke_user(u.id)
     return jsonify({"message": "updated"}), 200
 
 
@@ -335,6 +581,8 @@ def delete_user(id):
         return jsonify({"message": "not found"}), 404
     db.session.delete(u)
     db.session.commit()
+    tokens.revoke_user(id)
+    result_cache.invalidate()
     return jsonify({"message": "deleted"}), 200
 
 
@@ -361,6 +609,7 @@ def reset_password(user_id):
 
     user.set_password(new_password)
     db.session.commit()
+    tokens.revoke_user(user.id)
     return jsonify({"message": "password reset ok"}), 200
 
 
@@ -368,10 +617,12 @@ def reset_password(user_id):
 @admin_bp.route("/summary", methods=["GET"])
 @jwt_required()
 @admin_required
+@cached_result("summary")
+@replica_read
 def summary():
     return jsonify(
         {
-            "total_bookings": Booking.query.count(),
+            "total_bookings": sum(grouped_counts(lambda m: m.status).values()),
             "today_bookings": Booking.query.filter(
                 Booking.booking_date == dt.date.today()
             ).count(),
@@ -384,39 +635,39 @@ def summary():
 @admin_bp.route("/stats/daily-bookings", methods=["GET"])
 @jwt_required()
 @admin_required
+@cached_result("stats_daily_bookings")
+@replica_read
 def stats_daily_bookings():
-    rows = (
-        db.session.query(Booking.booking_date, func.count())
-        .group_by(Booking.booking_date)
-        .order_by(Booking.booking_date)
-        .all()
-    )
+    counts = grouped_counts(lambda m: m.booking_date)
     return jsonify(
-        [{"date": d.strftime("%Y-%m-%d"), "count": c} for d, c in rows]
+        [{"date": d.strftime("%Y-%m-%d"), "count": counts[d]} for d in sorted(counts)]
     ), 200
 
 
 @admin_bp.route("/stats/bookings-by-company", methods=["GET"])
 @jwt_required()
 @admin_required
+@cached_result("stats_bookings_by_company")
+@replica_read
 def company_stats():
-    rows = (
-        db.session.query(Company.name, func.count())
-        .join(Booking)
-        .group_by(Company.id)
-        .order_by(func.count().desc())
-        .all()
+    counts = grouped_counts(lambda m: m.company_id)
+    names = dict(
+        db.session.query(Company.id, Company.name).filter(Company.id.in_(list(counts))).all()
     )
-    return jsonify([{"company": n, "count": c} for n, c in rows]), 200
+    return jsonify(
+        [{"company": names.get(cid), "count": c} for cid, c in counts.most_common()]
+    ), 200
 
 
 @admin_bp.route("/stats/bookings-by-status", methods=["GET"])
 @jwt_required()
 @admin_required
+@cached_result("stats_bookings_by_status")
+@replica_read
 def status_stats():
-    rows = db.session.query(Booking.status, func.count()).group_by(Booking.status).all()
+    counts = grouped_counts(lambda m: m.status)
     return jsonify(
-        [{"id": s, "label": s, "value": c} for s, c in rows]
+        [{"id": s, "label": s, "value": c} for s, c in sorted(counts.items())]
     ), 200
 
 
@@ -430,10 +681,98 @@ def update_status(id):
         return jsonify({"message": "not found"}), 404
 
     data = request.get_json() or {}
+    messenger, error = status_messenger(data)
+    if error:
+        return jsonify({"message": error}), 400
+
+    # เช็คความจุ + commit ใน lock เดียวกัน (เหมือน create_booking)
+    with reserve_lock:
+        if apply_status_update(b, data, messenger):
+            db.session.rollback()
+            return slot_full_response(b.booking_date, slot_of(b.booking_time))
+        db.session.commit()
+    notify_booking_changed(b, "updated")
+    return jsonify({"message": "updated"}), 200
+
+
+@admin_bp.route("/series/<int:series_id>/occurrences/<occurrence_date>/status", methods=["PATCH"])
+@jwt_required()
+@admin_required
+def update_occurrence_status(series_id, occurrence_date):
+    """
+    เปลี่ยนสถานะ occurrence ของ booking ซ้ำ (body เดียวกับ /bookings/<id>/status)
+    occurrence ยังไม่มีแถว → materialize เป็น Booking ก่อน แล้วค่อยเปลี่ยนสถานะ
+    """
+    s = BookingSeries.query.get(series_id)
+    if not s:
+        return jsonify({"message": "series not found"}), 404
+    try:
+        day = dt.date.fromisoformat(occurrence_date)
+    except ValueError:
+        return jsonify({"message": "occurrence date must be YYYY-MM-DD"}), 400
+    if not booking_series.is_occurrence(s, day):
+        return jsonify({"message": "not an occurrence of this series"}), 404
+
+    # validate ก่อน materialize → body ผิดไม่ทิ้งแถว booking ไว้
+    data = request.get_json() or {}
+    messenger, error = status_messenger(data)
+    if error:
+        return jsonify({"message": error}), 400
+
+    b, created = booking_series.materialize(s, day)
+    if b is None:
+        return jsonify({"message": "occurrence was skipped or archived"}), 409
+
+    with reserve_lock:
+        if apply_status_update(b, data, messenger):
+            db.session.rollback()
+            return slot_full_response(day, slot_of(s.booking_time))
+        db.session.commit()
+    notify_booking_changed(b, "created" if created else "updated")
+    return jsonify({"message": "updated", "booking": b.to_dict(), "booking_id": b.id}), 200
+
+
+def status_messenger(data):
+    """
+    Messenger ของ body status = SUCCESS → (messenger, error)
+    รองรับ messenger_id และชื่อ (messenger_name / approved_by_name) จาก frontend
+    messenger_id ที่ส่งมาแต่ไม่มีอยู่จริง → error (ไม่ assign เป็น None เงียบ ๆ)
+    """
+    if data.get("status") != "SUCCESS":
+        return None, None
+
+    # หา / สร้าง Messenger ก่อนแก้ booking → การเปลี่ยนทั้งหมด flush ครั้งเดียว (event เดียว)
+    # default MESSENGER_DEFAULT_NAME ถ้าไม่ส่งมา
+    messenger_id = data.get("messenger_id")
+    if messenger_id:
+        try:
+            messenger_id = int(messenger_id)
+        except (TypeError, ValueError):
+            return None, "messenger_id must be an integer"
+        messenger = resolve_messenger(messenger_id=messenger_id)
+        if messenger is None:
+            return None, "messenger not found"
+        return messenger, None
+    name = data.get("messenger_name") or data.get("approved_by_name")
+    return resolve_messenger(name or default_messenger_name()), None
+
+
+def apply_status_update(b, data, messenger=None):
+    """
+    set status / ผู้อนุมัติ / messenger (จาก status_messenger) ตาม body (ยังไม่ commit)
+    คืน rule ที่เต็มแล้ว (ไม่แก้อะไร) หรือ None — ต้องเรียกภายใต้ reserve_lock แล้ว commit ต่อทันที
+    """
     status = data.get("status")
 
-    # รองรับทั้ง messenger_name และ approved_by_name จาก frontend
-    messenger = data.get("messenger_name") or data.get("approved_by_name")
+    if status and status != b.status:
+        if status in ACTIVE_STATUSES and b.status not in ACTIVE_STATUSES:
+            # เช่น CANCEL → PENDING / SUCCESS กลับมาใช้ slot อีกครั้ง → ต้องผ่าน rule ความจุเหมือนตอนจอง
+            # (เช็คก่อนเปลี่ยน status → booking นี้ยังไม่ถูกนับ)
+            full = locked_full_rule(b.company_id, b.building, b.booking_date, slot_of(b.booking_time))
+            if full:
+                return full
+        # สถานะเปลี่ยน (เช่น CANCEL) → จำนวนงานใน slot ของวันนั้นเปลี่ยน
+        slot_index.invalidate(b.booking_date)
 
     if status:
         b.status = status
@@ -445,9 +784,482 @@ def update_status(id):
         except Exception:
             pass
         b.approved_at = dt.datetime.utcnow()
+        assign(b, messenger)
+    return None
+
+
+# -------------------- 9) Messenger Capacity per Slot --------------------
+def apply_capacity_fields(rule, data):
+    """
+    validate + set field ของ SlotCapacity จาก body
+    คืนข้อความ error (str) หรือ None ถ้าผ่าน
+    """
+    if "capacity" in data:
+        try:
+            capacity = int(data["capacity"])
+        except (TypeError, ValueError):
+            return "capacity must be an integer"
+        if capacity < 0:
+            return "capacity must not be negative"
+        rule.capacity = capacity
+
+    if "slot" in data:
+        slot = data["slot"] or None
+        if slot is not None and slot not in SLOTS:
+            return f"slot must be one of {', '.join(SLOTS)}"
+        rule.slot = slot
+
+    if "company_id" in data:
+        company_id = data["company_id"] or None
+        if company_id is not None and not Company.query.get(company_id):
+            return "company not found"
+        rule.company_id = company_id
+
+    if "building" in data:
+        rule.building = data["building"] or None
+
+    if "is_active" in data:
+        rule.is_active = bool(data["is_active"])
+
+    return None
+
+
+@admin_bp.route("/capacities", methods=["GET"])
+@jwt_required()
+@admin_required
+def list_capacities():
+    rules = SlotCapacity.query.order_by(SlotCapacity.id).all()
+    return jsonify([r.to_dict() for r in rules]), 200
+
+
+@admin_bp.route("/capacities", methods=["POST"])
+@jwt_required()
+@admin_required
+def create_capacity():
+    data = request.get_json() or {}
+    if data.get("capacity") is None:
+        return jsonify({"message": "capacity is required"}), 400
+
+    rule = SlotCapacity(is_active=True)
+    error = apply_capacity_fields(rule, data)
+    if error:
+        return jsonify({"message": error}), 400
+
+    db.session.add(rule)
+    db.session.commit()
+    return jsonify(rule.to_dict()), 201
+
+
+@admin_bp.route("/capacities/<int:id>", methods=["PUT"])
+@jwt_required()
+@admin_required
+def update_capacity(id):
+    rule = SlotCapacity.query.get(id)
+    if not rule:
+        return jsonify({"message": "not found"}), 404
+
+    error = apply_capacity_fields(rule, request.get_json() or {})
+    if error:
+        db.session.rollback()
+        return jsonify({"message": error}), 400
+
+    db.session.commit()
+    return jsonify(rule.to_dict()), 200
+
+
+@admin_bp.route("/capacities/<int:id>", methods=["DELETE"])
+@jwt_required()
+@admin_required
+def delete_capacity(id):
+    rule = SlotCapacity.query.get(id)
+    if not rule:
+        return jsonify({"message": "not found"}), 404
+    db.session.delete(rule)
+    db.session.commit()
+    return jsonify({"message": "deleted"}), 200
+
+
+# -------------------- 10) Dispatch Planner --------------------
+@admin_bp.route("/dispatch/plan", methods=["POST"])
+@jwt_required()
+@admin_required
+def dispatch_plan():
+    """
+    POST /api/admin/dispatch/plan
+    Body:
+    {
+      "date": "YYYY-MM-DD",
+      "messengers": ["ขวัญเมือง", ...],   (optional, default จาก Config)
+      "max_stops": 8,                    (optional)
+      "apply": false                     (true = บันทึก messenger_name ลง booking)
+    }
+    """
+    data = request.get_json() or {}
+    try:
+        day = dt.date.fromisoformat(data.get("date") or "")
+    except (TypeError, ValueError):
+        return jsonify({"message": "date is required (YYYY-MM-DD)"}), 400
+
+    cfg = current_app.config
+    messengers = data.get("messengers") or active_names() or cfg["DISPATCH_MESSENGERS"]
+    max_stops = data.get("max_stops") or cfg["DISPATCH_MAX_STOPS_PER_TRIP"]
+
+    bookings = (
+        Booking.query.filter(
+            Booking.booking_date == day,
+            Booking.status.in_(ACTIVE_STATUSES),
+        )
+        .order_by(Booking.id)
+        .all()
+    )
+    # occurrence ของ booking ซ้ำที่ยังไม่ materialize ก็ต้องมีคนไปส่ง (id = "s<series>-<date>")
+    occurrences = [occ for occ, _ in booking_series.expand(day, day)]
+    jobs = [
+        {
+            "id": b.id,
+            "building": b.building,
+            "floor": b.floor,
+            "department": b.department,
+            "slot": slot_of(b.booking_time),
+        }
+        for b in [*bookings, *occurrences]
+    ]
+
+    try:
+        plan = plan_day(
+            jobs,
+            messengers,
+            matrix=load_distance_matrix(
+                cfg["DISPATCH_DISTANCE_FILE"], cfg["DISPATCH_DEFAULT_DISTANCE"]
+            ),
+            depot=cfg["DISPATCH_DEPOT"],
+            max_stops=max_stops,
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+
+    if data.get("apply"):
+        assignments = plan["assignments"]
+        by_name = {name: resolve_messenger(name) for name in set(assignments.values())}
+        targets = [(b, assignments[b.id], "updated") for b in bookings if b.id in assignments]
+        # occurrence ที่ได้งาน → materialize เป็น Booking ก่อน (ข้าม / archive ไปแล้ว = ไม่มีแถว)
+        for occ in occurrences:
+            if occ.id in assignments:
+                b, created = booking_series.materialize(occ.series, day)
+                if b is not None:
+                    targets.append((b, assignments[occ.id], "created" if created else "updated"))
+        # แจ้งเฉพาะ booking ที่ messenger เปลี่ยนจริง (หรือเพิ่ง materialize)
+        changed = []
+        for b, name, event in targets:
+            messenger = by_name[name]
+            if event == "created" or b.messenger_id != (messenger.id if messenger else None):
+                changed.append((b, event))
+            assign(b, messenger)
+        db.session.commit()
+        for b, event in changed:
+            notify_booking_changed(b, event)
+
+    # key ของ JSON เป็น string อยู่แล้ว — แปลงก่อนเพื่อให้ id ตัวเลขกับ occurrence เรียง (sort_keys) ด้วยกันได้
+    plan["assignments"] = {str(k): v for k, v in plan["assignments"].items()}
+    plan["date"] = day.isoformat()
+    plan["applied"] = bool(data.get("apply"))
+    return jsonify(plan), 200
+
+
+# -------------------- 10.1) Dispatch Board (วันนี้ / พรุ่งนี้ จาก memory) --------------------
+@admin_bp.route("/dispatch/board", methods=["GET"])
+@jwt_required()
+@admin_required
+def dispatch_board_view():
+    """
+    GET /api/admin/dispatch/board?date=YYYY-MM-DD&status=PENDING
+    งานของวันนั้นแยกตาม slot (MORNING / AFTERNOON / ANY) + จำนวนต่อสถานะ
+    ตอบจาก dispatch_board ใน memory — วันที่นอก window ใช้ /bookings?start_date&end_date แทน
+    """
+    try:
+        day = dt.date.fromisoformat(request.args["date"]) if request.args.get("date") else dt.date.today()
+    except ValueError:
+        return jsonify({"message": "date must be YYYY-MM-DD"}), 400
+
+    body = dispatch_board.board_json(day, request.args.get("status") or None)
+    if body is None:
+        start, end = dispatch_board.window()
+        return jsonify(
+            {
+                "message": "date is outside the dispatch board window",
+                "window": {"start": start.isoformat(), "end": end.isoformat()},
+            }
+        ), 404
+    return Response(body, mimetype="application/json")
+
+
+# -------------------- 11) Performance Breakdown / Profiles --------------------
+@admin_bp.route("/perf", methods=["GET"])
+@jwt_required()
+@admin_required
+def perf_breakdown():
+    """เวลาเฉลี่ย / p50 / p95 ต่อ endpoint แยกเฟส db, serialize, render, send, other"""
+    return jsonify(request_profiler.breakdown()), 200
+
+
+@admin_bp.route("/perf/profiles", methods=["GET"])
+@jwt_required()
+@admin_required
+def list_perf_profiles():
+    return jsonify(request_profiler.list_profiles()), 200
+
+
+@admin_bp.route("/perf/profiles/<name>", methods=["GET"])
+@jwt_required()
+@admin_required
+def download_perf_profile(name):
+    if name not in {p["name"] for p in request_profiler.list_profiles()}:
+        return jsonify({"message": "not found"}), 404
+    return send_file(
+        os.path.join(request_profiler.profile_dir, name),
+        as_attachment=True,
+        download_name=name,
+        mimetype="text/plain",
+    )
+
+
+# -------------------- 12) Analytics (turnaround / workload / department) --------------------
+# แต่ละ endpoint ดึงเฉพาะคอลัมน์ที่ใช้ (ตัวเลข epoch / status code) — Postgres ใช้ COPY → pyarrow
+# เวลาที่วัดได้ (bench/bench_analytics.py, 1M bookings, ไม่ผ่าน cache, Postgres 16, 1 vCPU):
+#   turnaround ~0.65s, messenger-workload ~0.95s, department ~1.05s (best)
+#   department ช้าสุดเพราะต้อง COPY ชื่อแผนกเป็น text; ลอง GROUP BY + percentile ใน SQL แล้วไม่เร็วกว่า (~1.15s)
+#   request ถัดไปที่ filter เดียวกันได้จาก result cache (cached_result)
+def analytics_frame(columns):
+    """filter เดียวกับ /report: ?start_date ?end_date ?status ?company_id — ดึงเฉพาะ columns"""
+    filters = parse_report_filters()
+    return analytics.load_frame(
+        filters, include_archive=needs_archive(filters.get("start_date")), columns=columns
+    )
+
+
+def sla_hours():
+    # ?sla_hours=0 ใช้ได้ (ทุกงานเกิน SLA) → เช็ค None ไม่ใช่ falsy
+    value = request.args.get("sla_hours", type=float)
+    return current_app.config["ANALYTICS_SLA_HOURS"] if value is None else value
+
+
+@admin_bp.route("/stats/turnaround", methods=["GET"])
+@jwt_required()
+@admin_required
+@cached_result("stats_turnaround")
+@replica_read
+def stats_turnaround():
+    df = analytics_frame(("turnaround",))
+    return jsonify(analytics.turnaround_stats(df, sla_hours())), 200
+
+
+@admin_bp.route("/stats/messenger-workload", methods=["GET"])
+@jwt_required()
+@admin_required
+@cached_result("stats_messenger_workload")
+@replica_read
+def stats_messenger_workload():
+    df = analytics_frame(("turnaround", "status", "messenger_id"))
+    return jsonify(analytics.messenger_workload(df, sla_hours())), 200
+
+
+@admin_bp.route("/stats/department-volume", methods=["GET"])
+@jwt_required()
+@admin_required
+@cached_result("stats_department_volume")
+@replica_read
+def stats_department_volume():
+    df = analytics_frame(("turnaround", "status", "department"))
+    return jsonify(analytics.department_volume(df)), 200
+
+
+# -------------------- 13) Messengers (งานต่อ messenger ผ่าน index messenger_id) --------------------
+@admin_bp.route("/messengers", methods=["GET"])
+@jwt_required()
+@admin_required
+def list_messengers():
+    messengers = Messenger.query.order_by(Messenger.name).all()
+    return jsonify([m.to_dict() for m in messengers]), 200
+
+
+@admin_bp.route("/messengers", methods=["POST"])
+@jwt_required()
+@admin_required
+def create_messenger():
+    data = request.get_json() or {}
+    name = normalize_name(data.get("name"))
+    if not name:
+        return jsonify({"message": "name is required"}), 400
+    if resolve_messenger(name, create=False):
+        return jsonify({"message": "messenger already exists"}), 400
+
+    m = resolve_messenger(name)
+    m.phone = data.get("phone")
+    m.is_active = data.get("is_active", True)
+    db.session.commit()
+    return jsonify(m.to_dict()), 201
+
 
-        # ชื่อ Messenger (default "ขวัญเมือง" ถ้าไม่ส่งมา)
-        b.messenger_name = messenger or "ขวัญเมือง"
+@admin_bp.route("/messengers/<int:id>", methods=["PUT"])
+@jwt_required()
+@admin_required
+def update_messenger(id):
+    m = Messenger.query.get(id)
+    if not m:
+        return jsonify({"message": "not found"}), 404
 
+    data = request.get_json() or {}
+    m.phone = data.get("phone", m.phone)
+    m.is_active = data.get("is_active", m.is_active)
     db.session.commit()
-    return jsonify({"message": "updated"}), 200
\ No newline at end of file
+    return jsonify(m.to_dict()), 200
+
+
+def messenger_bookings(messenger_id, filters):
+    """(Booking, Company) ของ messenger — ใช้ index (messenger_id, booking_date)"""
+    q = (
+        db.session.query(Booking, Company)
+        .join(Company, Booking.company_id == Company.id)
+        .filter(Booking.messenger_id == messenger_id)
+    )
+    return apply_report_filters(q, Booking, filters)
+
+
+@admin_bp.route("/messengers/<int:id>/today", methods=["GET"])
+@jwt_required()
+@admin_required
+def messenger_today(id):
+    if not Messenger.query.get(id):
+        return jsonify({"message": "not found"}), 404
+    today = dt.date.today()
+    rows = messenger_bookings(id, {"start_date": today, "end_date": today}).all()
+    return jsonify(to_dict_list(rows)), 200
+
+
+@admin_bp.route("/messengers/<int:id>/bookings", methods=["GET"])
+@jwt_required()
+@admin_required
+@replica_read
+def messenger_history(id):
+    """
+    GET /api/admin/messengers/<id>/bookings?start_date&end_date&status&limit&offset
+    ประวัติงานของ messenger (ใหม่ → เก่า) รวม archive ถ้าช่วงวันที่ย้อนไปถึง
+    """
+    if not Messenger.query.get(id):
+        return jsonify({"message": "not found"}), 404
+
+    filters = parse_report_filters()
+    limit = min(
+        request.args.get("limit", type=int) or current_app.config["MESSENGER_HISTORY_PAGE_SIZE"],
+        1000,
+    )
+    offset = max(request.args.get("offset", type=int) or 0, 0)
+
+    rows = messenger_bookings(id, filters).limit(offset + limit + 1).all()
+    if needs_archive(filters.get("start_date")):
+        archived = (
+            apply_report_filters(
+                db.session.query(BookingArchive, Company)
+                .join(Company, BookingArchive.company_id == Company.id)
+                .filter(BookingArchive.messenger_id == id),
+                BookingArchive,
+                filters,
+            )
+            .limit(offset + limit + 1)
+            .all()
+        )
+        rows = merge_newest_first(rows, archived)
+    page = rows[offset : offset + limit]
+    return jsonify(
+        {
+            "bookings": to_dict_list(page),
+            "limit": limit,
+            "offset": offset,
+            "has_more": len(rows) > offset + limit,
+        }
+    ), 200
+
+
+@admin_bp.route("/messengers/counts", methods=["GET"])
+@jwt_required()
+@admin_required
+@cached_result("messenger_counts")
+@replica_read
+def messenger_counts():
+    """จำนวนงานต่อ messenger ต่อสถานะ (filter เดียวกับ /report)"""
+    filters = parse_report_filters()
+    counts = {}
+    models = (Booking, BookingArchive) if needs_archive(filters.get("start_date")) else (Booking,)
+    for model in models:
+        q = db.session.query(model.messenger_id, model.status, func.count()).filter(
+            model.messenger_id.isnot(None)
+        )
+        if "start_date" in filters:
+            q = q.filter(model.booking_date >= filters["start_date"])
+        if "end_date" in filters:
+            q = q.filter(model.booking_date <= filters["end_date"])
+        if "company_id" in filters:
+            q = q.filter(model.company_id == filters["company_id"])
+        for messenger_id, status, n in q.group_by(model.messenger_id, model.status).all():
+            by_status = counts.setdefault(messenger_id, Counter())
+            by_status[status] += n
+
+    names = dict(
+        db.session.query(Messenger.id, Messenger.name).filter(Messenger.id.in_(list(counts))).all()
+    )
+    return jsonify(
+        sorted(
+            (
+                {
+                    "messenger_id": mid,
+                    "messenger_name": names.get(mid),
+                    "total": sum(by_status.values()),
+                    "by_status": dict(sorted(by_status.items())),
+                }
+                for mid, by_status in counts.items()
+            ),
+            key=lambda row: -row["total"],
+        )
+    ), 200
+
+
+# -------------------- 14) Booking Event Log (audit / consumer ต่อเนื่อง) --------------------
+def parse_event_time(value):
+    """ISO datetime (มี timezone ได้) → UTC naive เหมือน occurred_at"""
+    parsed = dt.datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@admin_bp.route("/booking-events", methods=["GET"])
+@jwt_required()
+@admin_required
+def list_booking_events():
+    """
+    GET /api/admin/booking-events?after=<cursor>&start=<ISO>&end=<ISO>&limit=500
+    event เรียงตาม id — ส่ง cursor ที่ได้กลับมาเป็น ?after= รอบถัดไป
+    """
+    try:
+        after_id = int(request.args.get("after") or 0)
+        start = parse_event_time(request.args["start"]) if request.args.get("start") else None
+        end = parse_event_time(request.args["end"]) if request.args.get("end") else None
+    except ValueError:
+        return jsonify({"message": "after must be an integer, start / end ISO datetimes"}), 400
+
+    page = eventlog.fetch_events(after_id, start, end, request.args.get("limit", type=int))
+    return jsonify(
+        {
+            "events": eventlog.decode(page["events"]),
+            "cursor": page["cursor"],
+            "has_more": page["has_more"],
+        }
+    ), 200
+
+
+@admin_bp.route("/bookings/<int:id>/events", methods=["GET"])
+@jwt_required()
+@admin_required
+def booking_events(id):
+    """ประวัติการเปลี่ยนสถานะของ booking (ใช้ได้แม้ booking ถูก archive / ลบแล้ว)"""
+    return jsonify(eventlog.decode(eventlog.booking_history(id))), 200
@@ -1,11 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import (
-    create_access_token,
     get_jwt_identity,
     jwt_required,
 )
+from sqlalchemy import func
+
 from models import db, User
+from ratelimit import rate_limiter
+import tokens
 
+import logging
 import os
 import secrets
 import string
@@ -13,6 +17,7 @@ import smtplib
 from email.mime.text import MIMEText
 
 auth_bp = Blueprint("auth", __name__)
+log = logging.getLogger("booking.auth")
 
 
 # ---------------------------------------------------------------------
@@ -55,26 +60,46 @@ def send_email(to_email: str, subject: str, body: str):
 
 
 # ---------------------------------------------------------------------
-# 🔐 LOGIN — Authenticate user and return token + profile
+# 🔐 LOGIN — Authenticate user and return tokens + profile
+#   access_token อายุสั้น (JWT_EXPIRES_MIN) + refresh_token สำหรับ /auth/refresh
 # ---------------------------------------------------------------------
 @auth_bp.route("/login", methods=["POST"])
 def login():
-    data = request.get_json() or {}
+    data = request.get_json(silent=True)
+    data = data if isinstance(data, dict) else {}
     username = data.get("username")
     password = data.get("password")
 
-    if not username or not password:
+    # ตัวเลข / list / object → 400 (ไม่ใช่ 500 ตอน .lower() หรือ hash)
+    if not isinstance(username, str) or not isinstance(password, str) or not username or not password:
         return jsonify({"message": "Username and Password required"}), 400
 
+    # ---- rate limit: ตัดทิ้งก่อนเสียเวลา query / hash ---- #
+    cfg = current_app.config
+    ip_key = f"login:ipfail:{request.remote_addr}"
+    user_key = f"login:fail:{username.lower()}"
+
+    wait = rate_limiter.retry_after(
+        ip_key, cfg["LOGIN_LIMIT_PER_IP"], cfg["LOGIN_LIMIT_IP_WINDOW"]
+    ) or rate_limiter.retry_after(
+        user_key, cfg["LOGIN_FAILURES_PER_USER"], cfg["LOGIN_FAILURE_WINDOW"]
+    )
+    if wait:
+        return jsonify({"message": "Too many login attempts, please try again later"}), 429, {
+            "Retry-After": str(wait)
+        }
+
     user = User.query.filter_by(username=username, is_active=True).first()
     if not user or not user.check_password(password):
+        rate_limiter.hit(ip_key, cfg["LOGIN_LIMIT_IP_WINDOW"])
+        rate_limiter.hit(user_key, cfg["LOGIN_FAILURE_WINDOW"])
         return jsonify({"message": "Invalid username or password"}), 401
 
-    access_token = create_access_token(identity=str(user.id))
+    rate_limiter.reset(user_key)
 
     return jsonify(
         {
-            "access_token": access_token,
+            **tokens.issue(user),
             "user": {
                 "id": user.id,
                 "username": user.username,
@@ -88,6 +113,33 @@ def login():
     ), 200
 
 
+# ---------------------------------------------------------------------
+# 🔄 REFRESH — แลก refresh token → access + refresh token ใหม่ (ไม่ต้อง hash password)
+#   POST /auth/refresh   Body: { "refresh_token": "..." }
+#   401 = ต้อง login ใหม่, 409 = tab อื่น refresh ไปแล้ว (อ่าน token ล่าสุดแล้วลองใหม่)
+# ---------------------------------------------------------------------
+@auth_bp.route("/refresh", methods=["POST"])
+def refresh():
+    data = request.get_json() or {}
+    try:
+        return jsonify(tokens.rotate(data.get("refresh_token"))), 200
+    except tokens.TokenError as e:
+        if e.status == 401:
+            log.info("refresh rejected", extra={"reason": e.message})
+        return jsonify({"message": e.message}), e.status
+
+
+# ---------------------------------------------------------------------
+# 🚪 LOGOUT — revoke refresh token (และ access token ทุกตัวใน family เดียวกัน)
+#   POST /auth/logout   Body: { "refresh_token": "..." }
+# ---------------------------------------------------------------------
+@auth_bp.route("/logout", methods=["POST"])
+def logout():
+    data = request.get_json() or {}
+    tokens.revoke_raw(data.get("refresh_token"))
+    return jsonify({"message": "Logged out"}), 200
+
+
 # ---------------------------------------------------------------------
 # 👤 PROFILE — GET & UPDATE USER INFO
 #   GET  /auth/me   → get user profile
@@ -172,6 +224,8 @@ def change_password():
 
     user.set_password(new_password)
     db.session.commit()
+    # session อื่นของ user (รวมถึงอันนี้) ต้อง login ด้วยรหัสใหม่
+    tokens.revoke_user(user.id)
 
     return jsonify({"message": "Password updated successfully"}), 200
 
@@ -190,10 +244,15 @@ def forgot_password():
     if not username or not email:
         return jsonify({"message": "Username and Email are required"}), 400
 
-    user = User.query.filter_by(username=username, is_active=True).first()
+    # เทียบ email แบบไม่สนตัวพิมพ์ใน SQL (lower(email) มี index ix_users_lower_email)
+    user = User.query.filter(
+        User.username == username,
+        User.is_active.is_(True),
+        func.lower(User.email) == email.strip().lower(),
+    ).first()
 
     # For security, do not reveal whether user/email exists
-    if not user or not user.email or user.email.lower() != email.lower():
+    if not user:
         # Always return 200 with generic message
         return jsonify(
             {
@@ -205,6 +264,7 @@ def forgot_password():
     temp_password = generate_temp_password(10)
     user.set_password(temp_password)
     db.session.commit()
+    tokens.revoke_user(user.id)
 
     # Prepare email content
     subject = "Your temporary password"
@@ -220,7 +280,7 @@ def forgot_password():
     try:
         send_email(user.email, subject, body)
     except Exception as e:
-        print(">>> Error sending reset email:", e)
+        log.exception("error sending reset email", extra={"user_id": user.id})
         # You can decide whether to expose this error or not; here we keep it generic
         return jsonify(
             {
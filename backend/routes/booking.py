@@ -1,16 +1,38 @@
 # routes/booking.py
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from io import BytesIO
-import os
-
-from models import db, Booking, Company, User
+import logging
+
+from models import db, Booking, BookingArchive, BookingSeries, Company, User
+from archive import needs_archive, merge_newest_first
+from signals import notify_booking_changed
+from sync import fetch_changes
+from profiling import perf_phase
+from metrics import track_export
+from idempotency import idempotent, record_response
+from prerender import slip_prerenderer
+from cache import result_cache
+from admission import admission
+from board import dispatch_board
+from slips import render_booking_slip
+import series as booking_series
+from capacity import (
+    SLOTS,
+    slot_of,
+    slot_index,
+    reserve_lock,
+    locked_full_day,
+    locked_full_rule,
+    availability,
+)
 
 # ---------------- Blueprint ---------------- #
 
 booking_bp = Blueprint("booking", __name__)
+log = logging.getLogger("booking.booking")
 
 # ---------------- Helper: parse date/time ---------------- #
 
@@ -33,6 +55,33 @@ def parse_time(time_str: str):
     raise ValueError(f"Invalid time format: {time_str}")
 
 
+def current_user_id():
+    """user id จาก JWT หรือ None ถ้า identity ไม่ถูกต้อง"""
+    try:
+        return int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return None
+
+
+def optional_date_arg(name):
+    """?name=YYYY-MM-DD → date / None (ValueError ถ้ารูปแบบผิด)"""
+    value = request.args.get(name)
+    return parse_date(value) if value else None
+
+
+# field ที่ต้องส่งมาตอนสร้าง booking / booking ซ้ำ
+REQUIRED_FIELDS = [
+    "company_id",
+    "requester_name",
+    "job_type",
+    "detail",
+    "department",
+    # building / floor ไม่บังคับแล้ว
+    "contact_name",
+    "contact_phone",
+]
+
+
 # ---------------- Companies list ---------------- #
 
 @booking_bp.route("/companies", methods=["GET"])
@@ -46,10 +95,55 @@ def list_companies():
     return jsonify([c.to_dict() for c in companies])
 
 
+# ---------------- Slot availability (ปฏิทินรายเดือน) ---------------- #
+
+def slot_full_response(booking_date, slot):
+    return jsonify(
+        {
+            "message": "slot is full",
+            "booking_date": booking_date.isoformat(),
+            "slot": slot,
+        }
+    ), 409
+
+
+@booking_bp.route("/availability", methods=["GET"])
+@jwt_required()
+def slot_availability():
+    """
+    GET /api/bookings/availability?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+        &company_id=1&building=...
+    คืนความจุคงเหลือของทุก slot ในช่วงวันที่ ในครั้งเดียว
+    """
+    try:
+        start = parse_date(request.args.get("start_date", ""))
+        end = parse_date(request.args.get("end_date", ""))
+    except ValueError:
+        return jsonify({"message": "start_date and end_date are required (YYYY-MM-DD)"}), 400
+
+    if end < start:
+        return jsonify({"message": "end_date must not be before start_date"}), 400
+
+    max_days = current_app.config.get("SLOT_AVAILABILITY_MAX_DAYS", 62)
+    if (end - start).days + 1 > max_days:
+        return jsonify({"message": f"date range must not exceed {max_days} days"}), 400
+
+    company_id = request.args.get("company_id", type=int)
+    building = request.args.get("building") or ""
+
+    return jsonify(
+        {
+            "slots": list(SLOTS),
+            "days": availability(start, end, company_id, building),
+        }
+    ), 200
+
+
 # ---------------- Create booking ---------------- #
 
 @booking_bp.route("", methods=["POST"])
 @jwt_required()
+@idempotent
 def create_booking():
     identity = get_jwt_identity()
     try:
@@ -63,19 +157,7 @@ def create_booking():
 
     data = request.get_json() or {}
 
-    required_fields = [
-        "company_id",
-        "booking_date",
-        "booking_time",
-        "requester_name",
-        "job_type",
-        "detail",
-        "department",
-        # building / floor ไม่บังคับแล้ว
-        "contact_name",
-        "contact_phone",
-    ]
-    for f in required_fields:
+    for f in ["booking_date", "booking_time"] + REQUIRED_FIELDS:
         if not data.get(f):
             return jsonify({"message": f"{f} is required"}), 400
 
@@ -88,15 +170,19 @@ def create_booking():
     except ValueError as e:
         return jsonify({"message": str(e)}), 400
 
+    booking_date_obj = parse_date(data["booking_date"])
+    building = data.get("building") or ""
+    slot = slot_of(booking_time_obj)
+
     booking = Booking(
         company_id=company.id,
-        booking_date=parse_date(data["booking_date"]),
+        booking_date=booking_date_obj,
         booking_time=booking_time_obj,
         requester_name=data["requester_name"],
         job_type=data["job_type"],
         detail=data["detail"],
         department=data["department"],
-        building=data.get("building") or "",
+        building=building,
         floor=data.get("floor") or "",
         contact_name=data["contact_name"],
         contact_phone=data["contact_phone"],
@@ -104,16 +190,29 @@ def create_booking():
         created_by=user.id,
         # messenger_name จะถูกเซ็ตทีหลังตอน admin กด Completed
     )
-    db.session.add(booking)
-    db.session.commit()
 
-    return jsonify(
-        {
-            "message": "created",
-            "booking": booking.to_dict(),
-            "booking_id": booking.id,
-        }
-    ), 201
+    # เช็คจริง + insert + commit ใน lock เดียวกัน (rule ถูก FOR UPDATE ไว้)
+    with reserve_lock:
+        if locked_full_rule(company.id, building, booking_date_obj, slot):
+            db.session.rollback()
+            return slot_full_response(booking_date_obj, slot)
+        db.session.add(booking)
+        db.session.flush()
+        response = jsonify(
+            {
+                "message": "created",
+                "booking": booking.to_dict(),
+                "booking_id": booking.id,
+            }
+        )
+        # ผลของ Idempotency-Key commit พร้อม booking (retry ได้ booking_id เดิมเสมอ)
+        record_response(response, 201)
+        db.session.commit()
+
+    slot_index.add(booking_date_obj, slot, company.id, building)
+    notify_booking_changed(booking, "created")
+
+    return response, 201
 
 
 # ---------------- My bookings (ของ user นั้น) ---------------- #
@@ -127,34 +226,215 @@ def my_bookings():
     except (TypeError, ValueError):
         return jsonify({"message": "invalid token identity"}), 401
 
+    try:
+        start, end = booking_series.window(
+            optional_date_arg("start_date"), optional_date_arg("end_date")
+        )
+    except ValueError:
+        return jsonify({"message": "start_date / end_date must be YYYY-MM-DD"}), 400
+
     bookings = (
         Booking.query.filter_by(created_by=user_id)
         .order_by(Booking.booking_date.desc(), Booking.booking_time.desc())
         .all()
     )
-    return jsonify([b.to_dict() for b in bookings])
+    rows = [(b, None) for b in bookings]
+    # รวม booking เก่าที่ถูกย้ายไป bookings_archive แล้ว (?include_archive=0 → เฉพาะตาราง hot)
+    if request.args.get("include_archive") not in ("0", "false") and needs_archive():
+        archived = (
+            BookingArchive.query.filter_by(created_by=user_id)
+            .order_by(BookingArchive.booking_date.desc(), BookingArchive.booking_time.desc())
+            .all()
+        )
+        rows = merge_newest_first(rows, [(b, None) for b in archived])
+    # occurrence ของ booking ซ้ำในช่วง ?start_date ?end_date (default วันนี้ ± N วัน)
+    rows = merge_newest_first(rows, booking_series.expand(start, end, created_by=user_id))
+    with perf_phase("serialize"):
+        data = [b.to_dict() for b, _ in rows]
+    return jsonify(data)
+
+
+@booking_bp.route("/my/changes", methods=["GET"])
+@jwt_required()
+def my_booking_changes():
+    """
+    GET /api/bookings/my/changes?since=<watermark>&limit=500
+    คืนเฉพาะ booking ของ user ที่สร้าง/แก้ไขหลัง watermark + id ที่ถูกลบ
+    """
+    identity = get_jwt_identity()
+    try:
+        user_id = int(identity)
+    except (TypeError, ValueError):
+        return jsonify({"message": "invalid token identity"}), 401
 
+    try:
+        changes = fetch_changes(
+            Booking.query.filter_by(created_by=user_id),
+            request.args.get("since"),
+            request.args.get("limit", type=int),
+            tombstone_user_id=user_id,
+        )
+    except ValueError:
+        return jsonify({"message": "invalid since watermark"}), 400
+
+    return jsonify(
+        {
+            "bookings": [b.to_dict() for b in changes["rows"]],
+            "deleted": changes["deleted"],
+            "watermark": changes["watermark"],
+            "has_more": changes["has_more"],
+        }
+    )
 
-# ---------------- PDF export (ใบจองตามฟอร์มตัวอย่าง) ---------------- #
 
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+# ---------------- Recurring bookings (booking ซ้ำทุกสัปดาห์) ---------------- #
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-FONT_DIR = os.path.join(BASE_DIR, "fonts")
-THAI_FONT_PATH = os.path.join(FONT_DIR, "THSarabunNew.ttf")
+def own_series(series_id, user_id):
+    s = BookingSeries.query.get(series_id)
+    return s if s is not None and s.created_by == user_id else None
 
-try:
-    pdfmetrics.registerFont(TTFont("THSarabun", THAI_FONT_PATH))
-    print(f">>> Registered THSarabun from {THAI_FONT_PATH}")
-except Exception as e:
-    print(">>> WARNING: cannot register THSarabun:", e)
 
+@booking_bp.route("/series", methods=["POST"])
+@jwt_required()
+def create_series():
+    """
+    POST /api/bookings/series
+    Body: field เดียวกับ create_booking (ยกเว้น booking_date) +
+    {
+      "start_date": "YYYY-MM-DD",
+      "end_date": "YYYY-MM-DD",        (optional, ไม่ใส่ = ไม่มีกำหนด)
+      "weekdays": [0, 1, 2, 3, 4],     (optional, 0 = จันทร์, default จันทร์-ศุกร์)
+      "interval_weeks": 1              (optional)
+    }
+    ไม่สร้างแถว booking ล่วงหน้า — occurrence ถูก expand ตอนอ่าน (ดู series.py)
+    """
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({"message": "invalid token identity"}), 401
+
+    data = request.get_json() or {}
+    for f in ["start_date", "booking_time"] + REQUIRED_FIELDS:
+        if not data.get(f):
+            return jsonify({"message": f"{f} is required"}), 400
+
+    company = Company.query.get(data["company_id"])
+    if not company:
+        return jsonify({"message": "company not found"}), 404
+
+    try:
+        booking_time_obj = parse_time(data["booking_time"])
+        start_date = parse_date(data["start_date"])
+        end_date = parse_date(data["end_date"]) if data.get("end_date") else None
+        weekdays = booking_series.parse_weekdays(data.get("weekdays"))
+        interval_weeks = int(data.get("interval_weeks") or 1)
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+
+    if end_date is not None and end_date < start_date:
+        return jsonify({"message": "end_date must not be before start_date"}), 400
+    if interval_weeks < 1:
+        return jsonify({"message": "interval_weeks must be at least 1"}), 400
+
+    building = data.get("building") or ""
+    slot = slot_of(booking_time_obj)
+
+    s = BookingSeries(
+        company_id=company.id,
+        booking_time=booking_time_obj,
+        requester_name=data["requester_name"],
+        job_type=data["job_type"],
+        detail=data["detail"],
+        department=data["department"],
+        building=building,
+        floor=data.get("floor") or "",
+        contact_name=data["contact_name"],
+        contact_phone=data["contact_phone"],
+        weekdays=weekdays,
+        interval_weeks=interval_weeks,
+        start_date=start_date,
+        end_date=end_date,
+        created_by=user_id,
+    )
+
+    # occurrence ทุกวัน (ตั้งแต่วันนี้ ถึง end_date หรือ SERIES_MAX_WINDOW_DAYS ถ้าไม่มีกำหนด)
+    # ต้องผ่าน rule ความจุเหมือน create_booking — เช็ค + insert + commit ใน lock เดียวกัน
+    first = max(start_date, date.today())
+    last = first + timedelta(days=current_app.config.get("SERIES_MAX_WINDOW_DAYS", 400))
+    if end_date is not None:
+        last = min(last, end_date)
+    # expand series / นับ booking ครั้งเดียวทั้งช่วง (ไม่ใช่ทีละวัน) เพื่อไม่ให้ถือ lock นาน
+    with reserve_lock:
+        full = locked_full_day(company.id, building, booking_series.occurrence_dates(s, first, last), slot)
+        if full:
+            db.session.rollback()
+            return slot_full_response(full[0], slot)
+        db.session.add(s)
+        db.session.commit()
+    booking_series_changed()
+
+    return jsonify({"message": "created", "series": s.to_dict()}), 201
+
+
+@booking_bp.route("/series", methods=["GET"])
+@jwt_required()
+def my_series():
+    user_id = current_user_id()
+    if user_id is None:
+        return jsonify({"message": "invalid token identity"}), 401
+
+    rows = BookingSeries.query.filter_by(created_by=user_id).order_by(BookingSeries.id).all()
+    return jsonify([s.to_dict() for s in rows])
+
+
+@booking_bp.route("/series/<int:series_id>", methods=["DELETE"])
+@jwt_required()
+def end_series(series_id):
+    """หยุด series ตั้งแต่วันนี้ (occurrence ที่ผ่านมาแล้ว / materialize แล้วยังอยู่)"""
+    s = own_series(series_id, current_user_id())
+    if s is None:
+        return jsonify({"message": "series not found"}), 404
+
+    yesterday = date.today() - timedelta(days=1)
+    if s.end_date is None or s.end_date > yesterday:
+        s.end_date = yesterday
+    db.session.commit()
+    booking_series_changed()
+    return jsonify({"message": "ended", "series": s.to_dict()}), 200
+
+
+@booking_bp.route("/series/<int:series_id>/occurrences/<occurrence_date>", methods=["DELETE"])
+@jwt_required()
+def skip_series_occurrence(series_id, occurrence_date):
+    """ข้าม occurrence วันเดียว (เช่นวันหยุด) โดยไม่กระทบวันอื่น"""
+    s = own_series(series_id, current_user_id())
+    if s is None:
+        return jsonify({"message": "series not found"}), 404
+    try:
+        day = parse_date(occurrence_date)
+    except ValueError:
+        return jsonify({"message": "occurrence date must be YYYY-MM-DD"}), 400
+    if not booking_series.is_occurrence(s, day):
+        return jsonify({"message": "not an occurrence of this series"}), 404
+
+    if not booking_series.skip_occurrence(s, day):
+        return jsonify({"message": "occurrence already skipped or materialized"}), 409
+    db.session.commit()
+    booking_series_changed(day)
+    return jsonify({"message": "skipped"}), 200
+
+
+def booking_series_changed(day=None):
+    """series เปลี่ยน → จำนวนงานต่อ slot / occurrence บน board / report ที่ cache ไว้ใช้ไม่ได้แล้ว"""
+    slot_index.invalidate(day)
+    dispatch_board.invalidate_occurrences(day)
+    result_cache.invalidate()
+
+
+# ---------------- PDF export (ใบจองตามฟอร์มตัวอย่าง) ---------------- #
 
 @booking_bp.route("/<int:booking_id>/pdf", methods=["GET"])
 @jwt_required()
+@track_export("booking_pdf")
 def generate_booking_pdf(booking_id):
     # join booking + company
     row = (
@@ -163,194 +443,59 @@ def generate_booking_pdf(booking_id):
         .filter(Booking.id == booking_id)
         .first()
     )
+    if not row and needs_archive():
+        row = (
+            db.session.query(BookingArchive, Company)
+            .join(Company, BookingArchive.company_id == Company.id)
+            .filter(BookingArchive.id == booking_id)
+            .first()
+        )
     if not row:
         return jsonify({"message": "booking not found"}), 404
 
     booking, company = row
 
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # ---------------- พื้นฐาน layout ----------------
-    left = 40
-    right = width - 40
-    top = height - 40
-    table_width = right - left
-    row_height = 24
-    label_col_width = 90
-
-    font_name = "THSarabun"
-    font_size = 16
-    c.setFont(font_name, font_size)
-
-    # ความกว้างฝั่ง value (ใช้ truncate/wrap)
-    value_max_width = table_width - label_col_width - 16
-
-    # ---------- helper: ตัดข้อความให้ไม่เกินความกว้าง cell ---------- #
-    def shorten_to_width(text, max_width: float) -> str:
-        if not text:
-            return ""
-        s = str(text)
-        if c.stringWidth(s, font_name, font_size) <= max_width:
-            return s
-        while s and c.stringWidth(s + "...", font_name, font_size) > max_width:
-            s = s[:-1]
-        return (s + "...") if s else "..."
-
-    # ---------- helper: wrap ข้อความหลายบรรทัด (ใช้กับรายละเอียด/หน่วยงาน) ---------- #
-    def wrap_text(text):
-        lines = []
-        for raw_line in (text or "").split("\n"):
-            words = raw_line.split(" ")
-            current = ""
-            for w in words:
-                test = (current + " " + w).strip()
-                if c.stringWidth(test, font_name, font_size) <= value_max_width:
-                    current = test
-                else:
-                    if current:
-                        lines.append(current)
-                    current = w
-            if current:
-                lines.append(current)
-        return lines
-
-    # ---------- helper: format เวลา + ช่วงเช้า/บ่าย ---------- #
-    def format_booking_time(t) -> str:
-        if not t:
-            return ""
-        raw = t.strftime("%H:%M:%S")  # ใช้เช็กช่วงเวลา
-        base = t.strftime("%H:%M")    # ใช้แสดงผล (ไม่เอาวินาที)
-        period = ""
-        if raw == "11:59:59":
-            period = "ช่วงเช้า"
-        elif raw == "16:29:59":
-            period = "ช่วงบ่าย"
-        elif raw == "00:00:00":
-            period = "ไม่ระบุเวลา"
-        return f"{period}"
-
-    # =================== 1) กล่องบน ===================
-    top_box_rows = 6  # เดิม 5 เพิ่มแถว Messenger
-    top_box_height = top_box_rows * row_height
-
-    c.rect(left, top - top_box_height, table_width, top_box_height)
-    c.line(left + label_col_width, top, left + label_col_width, top - top_box_height)
-    for i in range(1, top_box_rows):
-        y = top - i * row_height
-        c.line(left, y, right, y)
-
-    labels_top = ["บริษัท", "วันที่", "เวลา", "ชื่อผู้แจ้ง", "ประเภท", "Messenger"]
-    values_top = [
-        company.name or "",
-        booking.booking_date.strftime("%d/%m/%Y") if booking.booking_date else "",
-        format_booking_time(booking.booking_time),
-        booking.requester_name or "",
-        booking.job_type or "",
-        booking.messenger_name or "",
-    ]
-
-    y = top - row_height + 7
-    for label, value in zip(labels_top, values_top):
-        c.drawString(left + 5, y, label)
-        display_value = shorten_to_width(value, value_max_width)
-        c.drawString(left + label_col_width + 8, y, display_value)
-        y -= row_height
-
-    # =================== 2) กล่องกลาง: รายละเอียด ===================
-    detail_top = top - top_box_height - 40
-
-    first_row_height = row_height
-    body_height = 230
-    detail_height = first_row_height + body_height
-
-    c.rect(left, detail_top - detail_height, table_width, detail_height)
-    c.line(
-        left + label_col_width,
-        detail_top,
-        left + label_col_width,
-        detail_top - detail_height,
-    )
-
-    label_y = detail_top - first_row_height + 7
-    c.drawString(left + 5, label_y, "รายละเอียด")
+    # render ไว้แล้วหลังสร้าง booking (prerender.py) → ไม่ต้อง render ซ้ำ
+    pdf = slip_prerenderer.get(booking)
+    if pdf is None:
+        # render ใน request → จำกัดจำนวนที่ทำพร้อมกัน (เต็ม → 429)
+        with admission.slot("slip"):
+            pdf = render_booking_slip(booking, company.name)
+        slip_prerenderer.put(booking, pdf)
+    buffer = BytesIO(pdf)
 
-    detail_text = booking.detail or ""
-    wrapped_lines = wrap_text(detail_text)
-
-    text_obj = c.beginText()
-    text_obj.setFont(font_name, font_size)
-    text_obj.setTextOrigin(left + label_col_width + 8, label_y)
-
-    max_body_bottom = detail_top - detail_height + 10
-    for line in wrapped_lines:
-        if text_obj.getY() < max_body_bottom:
-            break
-        text_obj.textLine(line)
-
-    c.drawText(text_obj)
+    return send_file(
+        buffer,
+        as_attachment=True,
+        download_name=f"booking_{booking_id}.pdf",
+        mimetype="application/pdf",
+    )
 
-    # =================== 3) กล่องล่าง ===================
-    bottom_top = detail_top - detail_height - 40
-    bottom_rows = 5
-    bottom_height = bottom_rows * row_height
 
-    c.rect(left, bottom_top - bottom_height, table_width, bottom_height)
-    c.line(
-        left + label_col_width,
-        bottom_top,
-        left + label_col_width,
-        bottom_top - bottom_height,
+@booking_bp.route("/series/<int:series_id>/occurrences/<occurrence_date>/pdf", methods=["GET"])
+@jwt_required()
+@track_export("booking_pdf")
+def generate_occurrence_pdf(series_id, occurrence_date):
+    """ใบจองของ occurrence ที่ยังไม่ materialize (แถว virtual ใน /admin/bookings)"""
+    try:
+        day = parse_date(occurrence_date)
+    except ValueError:
+        return jsonify({"message": "occurrence date must be YYYY-MM-DD"}), 400
+    # skip / materialize แล้ว → ไม่อยู่ใน expand (แถวจริงใช้ /<booking_id>/pdf)
+    occ = next(
+        (occ for occ, _ in booking_series.expand(day, day) if occ.series.id == series_id),
+        None,
     )
-    for i in range(1, bottom_rows):
-        y = bottom_top - i * row_height
-        c.line(left, y, right, y)
-
-    labels_bottom = ["หน่วยงาน", "อาคาร", "ชั้น", "ชื่อผู้ติดต่อ", "เบอร์โทร"]
-    values_bottom = [
-        booking.department or "",
-        booking.building or "",
-        booking.floor or "",
-        booking.contact_name or "",
-        booking.contact_phone or "",
-    ]
-
-    y = bottom_top - row_height + 7
-
-    for label, value in zip(labels_bottom, values_bottom):
-        c.drawString(left + 5, y, label)
-
-        if label == "หน่วยงาน":
-            lines = wrap_text(value)[:2]  # จำกัด 2 บรรทัด
-            text = c.beginText()
-            text.setFont(font_name, font_size)
-            text.setTextOrigin(left + label_col_width + 8, y)
-            for ln in lines:
-                text.textLine(ln)
-            c.drawText(text)
-        else:
-            display_value = shorten_to_width(value, value_max_width)
-            c.drawString(left + label_col_width + 8, y, display_value)
-
-        y -= row_height
-
-    # =================== 4) ส่วนลายเซ็น ===================
-    sign_y = bottom_top - bottom_height - 50
-
-    c.drawString(70, sign_y + 25, "ผู้รับ ________________________________")
-    c.drawString(100, sign_y, "วันที่ _____ / _____ / ________")
-
-    c.drawString(350, sign_y + 25, "ผู้ส่ง ________________________________")
-    c.drawString(380, sign_y, "วันที่ _____ / _____ / ________")
-
-    c.showPage()
-    c.save()
-    buffer.seek(0)
+    if occ is None:
+        return jsonify({"message": "occurrence not found"}), 404
+
+    # ไม่มี id / version ถาวร → ไม่เก็บใน slip_prerenderer
+    with admission.slot("slip"):
+        pdf = render_booking_slip(occ, occ.company.name)
 
     return send_file(
-        buffer,
+        BytesIO(pdf),
         as_attachment=True,
-        download_name=f"booking_{booking_id}.pdf",
+        download_name=f"booking_{occ.id}.pdf",
         mimetype="application/pdf",
     )
\ No newline at end of file
@@ -0,0 +1,82 @@
+# routes/events.py
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from models import db, User
+from realtime import event_broker
+import tokens
+
+events_bp = Blueprint("events", __name__)
+
+
+def _ticket_serializer():
+    return URLSafeTimedSerializer(current_app.config["JWT_SECRET_KEY"], salt="events-stream")
+
+
+# ---------------- SSE: booking changes ---------------- #
+
+@events_bp.route("/ticket", methods=["POST"])
+@jwt_required()
+def stream_ticket():
+    """
+    POST /api/events/ticket → {"ticket", "expires_in"}
+    EventSource ส่ง header ไม่ได้ → ขอ ticket อายุสั้น (EVENTS_TICKET_TTL) ด้วย access token
+    แล้วเปิด /stream?ticket=<ticket> แทนการใส่ JWT ใน URL (ไม่หลุดไปอยู่ใน log ของ proxy)
+    """
+    try:
+        user_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return jsonify({"message": "invalid token identity"}), 401
+
+    ticket = _ticket_serializer().dumps({"sub": user_id, "fam": get_jwt().get("fam")})
+    return jsonify({"ticket": ticket, "expires_in": current_app.config["EVENTS_TICKET_TTL"]}), 200
+
+
+@events_bp.route("/stream", methods=["GET"])
+def stream():
+    """
+    GET /api/events/stream?ticket=<จาก POST /ticket>
+    - USER  : เห็นเฉพาะ booking ที่ตัวเองสร้าง
+    - ADMIN : เห็นทุก booking
+    resume ได้ด้วย header Last-Event-ID (EventSource ส่งให้เองตอน reconnect)
+    หรือ ?last_event_id=
+    ticket หมดอายุ → 401 (client ขอ ticket ใหม่แล้วเชื่อมต่อพร้อม ?last_event_id=)
+    """
+    try:
+        claims = _ticket_serializer().loads(
+            request.args.get("ticket") or "", max_age=current_app.config["EVENTS_TICKET_TTL"]
+        )
+    except BadSignature:  # รวม SignatureExpired
+        return jsonify({"message": "invalid or expired stream ticket"}), 401
+
+    if claims.get("fam") is not None and tokens.is_family_revoked(claims["fam"]):
+        return jsonify({"message": "token has been revoked"}), 401
+
+    user = db.session.get(User, claims.get("sub"))
+    if not user or not user.is_active:
+        return jsonify({"message": "user not found"}), 404
+    user_id, is_admin = user.id, user.role == "ADMIN"
+
+    # stream เปิดค้างได้นาน → คืน connection ของ request ให้ pool ก่อน
+    # (generator ข้างล่างไม่แตะ db)
+    db.session.remove()
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    sub, replay, reset = event_broker.subscribe(user_id, is_admin, last_event_id)
+    keepalive = current_app.config.get("EVENTS_KEEPALIVE", 15)
+
+    return Response(
+        stream_with_context(event_broker.stream(sub, replay, reset, keepalive)),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # กัน nginx buffer
+        },
+    )
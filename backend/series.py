@@ -0,0 +1,237 @@
+# series.py
+"""
+Booking ที่จองซ้ำ (recurring series) — expand occurrence แบบ lazy
+
+    rule: ทุกวันใน weekdays (0 = จันทร์) ทุก ๆ interval_weeks สัปดาห์
+          ตั้งแต่ start_date ถึง end_date (None = ไม่มีกำหนด)
+
+- ข้อความทั้งหมด (detail, department, contact_*) เก็บที่ series แถวเดียว
+- occurrence ถูก expand ตอนอ่าน เฉพาะช่วงวันที่ที่ขอ → ไม่มี insert ล่วงหน้าทุกคืน
+  (ยังไม่ materialize = สถานะ PENDING)
+- occurrence กลายเป็นแถว Booking จริงเมื่อสถานะเปลี่ยนเท่านั้น (materialize)
+- booking_series_exceptions เก็บวันที่ที่ไม่ expand แล้ว
+    booking_id = NULL → ผู้จองข้ามวันนั้น
+    booking_id = <id> → materialize แล้ว (แถวอยู่ใน bookings / bookings_archive)
+"""
+
+import datetime as dt
+
+from flask import current_app
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Booking, BookingSeries, BookingSeriesException
+
+VIRTUAL_STATUS = "PENDING"
+DEFAULT_WEEKDAYS = "0,1,2,3,4"
+
+# field ที่ copy จาก series ไป booking ตอน materialize
+COPIED_FIELDS = (
+    "company_id",
+    "booking_time",
+    "requester_name",
+    "job_type",
+    "detail",
+    "department",
+    "building",
+    "floor",
+    "contact_name",
+    "contact_phone",
+    "created_by",
+)
+
+
+def parse_weekdays(value) -> str:
+    """[0, 1, 2] / "0,1,2" → "0,1,2" (ValueError ถ้าไม่ถูกต้อง)"""
+    if value is None:
+        return DEFAULT_WEEKDAYS
+    if isinstance(value, str):
+        value = [v for v in value.split(",") if v.strip()]
+    days = sorted({int(v) for v in value})
+    if not days or days[0] < 0 or days[-1] > 6:
+        raise ValueError("weekdays must be a non-empty list of 0 (Mon) .. 6 (Sun)")
+    return ",".join(str(d) for d in days)
+
+
+def occurrence_dates(series, start: dt.date = None, end: dt.date = None):
+    """วันที่ของ occurrence ใน [start, end] ตาม rule (ยังไม่หัก exception)"""
+    lo = max(start, series.start_date) if start else series.start_date
+    hi = min(end, series.end_date) if end and series.end_date else (end or series.end_date)
+    if hi is None or hi < lo:
+        return []
+
+    weekdays = {int(d) for d in series.weekdays.split(",") if d}
+    interval = max(series.interval_weeks or 1, 1)
+    # สัปดาห์ที่ 0 = สัปดาห์ (จันทร์-อาทิตย์) ที่มี start_date
+    week0 = series.start_date - dt.timedelta(days=series.start_date.weekday())
+
+    days = []
+    day = lo
+    while day <= hi:
+        if day.weekday() in weekdays and ((day - week0).days // 7) % interval == 0:
+            days.append(day)
+        day += dt.timedelta(days=1)
+    return days
+
+
+class Occurrence:
+    """occurrence ที่ยังไม่ materialize — attribute ชื่อเดียวกับ Booking → ใช้ to_dict เดียวกัน"""
+
+    status = VIRTUAL_STATUS
+    approved_by = None
+    approved_at = None
+    messenger_id = None
+    messenger_name = None
+
+    def __init__(self, series, day: dt.date):
+        self.series = series
+        self.booking_date = day
+        for name in COPIED_FIELDS:
+            setattr(self, name, getattr(series, name))
+        self.company = series.company
+        self.created_at = series.created_at
+        self.updated_at = series.updated_at
+
+    @property
+    def id(self):
+        return f"s{self.series.id}-{self.booking_date.isoformat()}"
+
+    def to_dict(self):
+        data = Booking.to_dict(self)
+        data["series_id"] = self.series.id
+        data["occurrence_date"] = self.booking_date.isoformat()
+        data["virtual"] = True
+        return data
+
+
+# ---------------- read path ---------------- #
+
+def series_in_window(start: dt.date = None, end: dt.date = None, created_by=None, company_id=None):
+    q = BookingSeries.query
+    if end is not None:
+        q = q.filter(BookingSeries.start_date <= end)
+    if start is not None:
+        q = q.filter(or_(BookingSeries.end_date.is_(None), BookingSeries.end_date >= start))
+    if created_by is not None:
+        q = q.filter(BookingSeries.created_by == created_by)
+    if company_id is not None:
+        q = q.filter(BookingSeries.company_id == company_id)
+    return q.all()
+
+
+def _exceptions(series_ids, start, end):
+    """{(series_id, date)} ที่ไม่ต้อง expand ในช่วงนี้"""
+    if not series_ids:
+        return set()
+    q = db.session.query(
+        BookingSeriesException.series_id, BookingSeriesException.occurrence_date
+    ).filter(BookingSeriesException.series_id.in_(series_ids))
+    if start is not None:
+        q = q.filter(BookingSeriesException.occurrence_date >= start)
+    if end is not None:
+        q = q.filter(BookingSeriesException.occurrence_date <= end)
+    return set(q.all())
+
+
+def expand(start: dt.date, end: dt.date, created_by=None, filters=None):
+    """
+    occurrence ที่ยังไม่ materialize ใน [start, end] → list ของ (Occurrence, Company)
+    เรียง booking_date, booking_time desc (ใช้ merge_newest_first ต่อได้)
+    ช่วงวันที่มาจาก window() เสมอ (series ที่ไม่มี end_date ต้องมีขอบเขต)
+    filters = dict แบบ parse_report_filters (ใช้ status / company_id)
+    """
+    filters = filters or {}
+    if filters.get("status", VIRTUAL_STATUS) != VIRTUAL_STATUS:
+        return []
+
+    all_series = series_in_window(start, end, created_by, filters.get("company_id"))
+    skipped = _exceptions([s.id for s in all_series], start, end)
+
+    rows = [
+        (occ, occ.company)
+        for s in all_series
+        for occ in (Occurrence(s, d) for d in occurrence_dates(s, start, end))
+        if (s.id, occ.booking_date) not in skipped
+    ]
+    rows.sort(key=lambda row: (row[0].booking_date, row[0].booking_time), reverse=True)
+    return rows
+
+
+def occurrence_counts(start: dt.date, end: dt.date):
+    """{(date, booking_time, company_id, building): จำนวน} ของ occurrence ที่ยังไม่ materialize"""
+    counts = {}
+    for occ, _ in expand(start, end):
+        key = (occ.booking_date, occ.booking_time, occ.company_id, occ.building or "")
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def window(start: dt.date = None, end: dt.date = None):
+    """
+    ช่วงวันที่ที่จะ expand: ไม่ระบุ → วันนี้ ± SERIES_DEFAULT_WINDOW_DAYS
+    ยาวเกิน SERIES_MAX_WINDOW_DAYS → ตัดฝั่ง start ให้เหลือเท่าที่กำหนด
+    """
+    cfg = current_app.config
+    today = dt.date.today()
+    default = dt.timedelta(days=cfg.get("SERIES_DEFAULT_WINDOW_DAYS", 31))
+    end = end or today + default
+    start = start or min(today - default, end)
+    longest = dt.timedelta(days=cfg.get("SERIES_MAX_WINDOW_DAYS", 400))
+    if end - start > longest:
+        start = end - longest
+    return start, end
+
+
+# ---------------- write path ---------------- #
+
+def is_occurrence(series, day: dt.date) -> bool:
+    return bool(occurrence_dates(series, day, day))
+
+
+def skip_occurrence(series, day: dt.date) -> bool:
+    """ข้าม occurrence วันนั้น (ยังไม่ commit) → False ถ้ามี exception อยู่แล้ว"""
+    exists = BookingSeriesException.query.filter_by(
+        series_id=series.id, occurrence_date=day
+    ).first()
+    if exists:
+        return False
+    db.session.add(BookingSeriesException(series_id=series.id, occurrence_date=day))
+    return True
+
+
+def _materialized(series, day: dt.date):
+    existing = BookingSeriesException.query.filter_by(
+        series_id=series.id, occurrence_date=day
+    ).first()
+    if existing is None:
+        return None
+    return Booking.query.get(existing.booking_id) if existing.booking_id else False
+
+
+def materialize(series, day: dt.date):
+    """
+    occurrence → แถว Booking (commit แล้ว, สถานะ PENDING) → (booking, created)
+    materialize ไปแล้ว (หรือชนกับ request อื่น) → คืนแถวเดิม, created = False
+    ข้ามวันนั้นไปแล้ว / booking ถูก archive แล้ว → (None, False)
+    """
+    existing = _materialized(series, day)
+    if existing is not None:
+        return existing or None, False
+
+    booking = Booking(
+        booking_date=day,
+        status=VIRTUAL_STATUS,
+        **{name: getattr(series, name) for name in COPIED_FIELDS},
+    )
+    db.session.add(booking)
+    try:
+        db.session.flush()
+        db.session.add(
+            BookingSeriesException(series_id=series.id, occurrence_date=day, booking_id=booking.id)
+        )
+        db.session.commit()
+    except IntegrityError:
+        # request อื่น materialize วันเดียวกันไปก่อน (unique series_id + occurrence_date)
+        db.session.rollback()
+        return _materialized(series, day) or None, False
+    return booking, True
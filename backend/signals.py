@@ -0,0 +1,22 @@
+# signals.py
+"""
+Hook หลังเขียน booking ลง DB (ส่งหลัง commit แล้วเท่านั้น)
+
+    booking_changed.send(app, booking=<Booking>, action="created" | "updated")
+
+ผู้ฟัง (realtime push, cache ฯลฯ) ต่อเข้ากับ signal นี้ใน init_app ของตัวเอง
+route ไม่ต้องรู้ว่ามีใครฟังอยู่บ้าง
+"""
+
+from blinker import Namespace
+from flask import current_app
+
+_signals = Namespace()
+
+booking_changed = _signals.signal("booking-changed")
+
+
+def notify_booking_changed(booking, action: str):
+    booking_changed.send(
+        current_app._get_current_object(), booking=booking, action=action
+    )
@@ -0,0 +1,235 @@
+# slips.py
+"""
+ใบจอง (booking slip) PDF ตามฟอร์มตัวอย่าง
+
+render_booking_slip ใช้ attribute ของ booking อย่างเดียว (ไม่แตะ session)
+→ เรียกจาก thread อื่นได้ ถ้าส่ง snapshot ของ booking เข้ามา (ดู prerender.py)
+"""
+
+import logging
+import os
+from io import BytesIO
+from types import SimpleNamespace
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from profiling import perf_phase
+
+log = logging.getLogger("booking.slips")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_DIR = os.path.join(BASE_DIR, "fonts")
+THAI_FONT_PATH = os.path.join(FONT_DIR, "THSarabunNew.ttf")
+
+try:
+    pdfmetrics.registerFont(TTFont("THSarabun", THAI_FONT_PATH))
+    log.info("registered THSarabun", extra={"path": THAI_FONT_PATH})
+except Exception as e:
+    log.warning("cannot register THSarabun", extra={"path": THAI_FONT_PATH, "error": str(e)})
+
+SLIP_FIELDS = (
+    "id",
+    "booking_date",
+    "booking_time",
+    "requester_name",
+    "job_type",
+    "messenger_name",
+    "detail",
+    "department",
+    "building",
+    "floor",
+    "contact_name",
+    "contact_phone",
+    "updated_at",
+)
+
+
+def snapshot(booking):
+    """ค่าที่ใช้ render (ไม่ผูกกับ session) — ส่งข้าม thread ได้"""
+    return SimpleNamespace(**{name: getattr(booking, name) for name in SLIP_FIELDS})
+
+
+def render_booking_slip(booking, company_name: str) -> bytes:
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    # ---------------- พื้นฐาน layout ----------------
+    left = 40
+    right = width - 40
+    top = height - 40
+    table_width = right - left
+    row_height = 24
+    label_col_width = 90
+
+    font_name = "THSarabun"
+    font_size = 16
+    c.setFont(font_name, font_size)
+
+    # ความกว้างฝั่ง value (ใช้ truncate/wrap)
+    value_max_width = table_width - label_col_width - 16
+
+    # ---------- helper: ตัดข้อความให้ไม่เกินความกว้าง cell ---------- #
+    def shorten_to_width(text, max_width: float) -> str:
+        if not text:
+            return ""
+        s = str(text)
+        if c.stringWidth(s, font_name, font_size) <= max_width:
+            return s
+        while s and c.stringWidth(s + "...", font_name, font_size) > max_width:
+            s = s[:-1]
+        return (s + "...") if s else "..."
+
+    # ---------- helper: wrap ข้อความหลายบรรทัด (ใช้กับรายละเอียด/หน่วยงาน) ---------- #
+    def wrap_text(text):
+        lines = []
+        for raw_line in (text or "").split("\n"):
+            words = raw_line.split(" ")
+            current = ""
+            for w in words:
+                test = (current + " " + w).strip()
+                if c.stringWidth(test, font_name, font_size) <= value_max_width:
+                    current = test
+                else:
+                    if current:
+                        lines.append(current)
+                    current = w
+            if current:
+                lines.append(current)
+        return lines
+
+    # ---------- helper: format เวลา + ช่วงเช้า/บ่าย ---------- #
+    def format_booking_time(t) -> str:
+        if not t:
+            return ""
+        raw = t.strftime("%H:%M:%S")  # ใช้เช็กช่วงเวลา
+        base = t.strftime("%H:%M")    # ใช้แสดงผล (ไม่เอาวินาที)
+        period = ""
+        if raw == "11:59:59":
+            period = "ช่วงเช้า"
+        elif raw == "16:29:59":
+            period = "ช่วงบ่าย"
+        elif raw == "00:00:00":
+            period = "ไม่ระบุเวลา"
+        return f"{period}"
+
+    # =================== 1) กล่องบน ===================
+    top_box_rows = 6  # เดิม 5 เพิ่มแถว Messenger
+    top_box_height = top_box_rows * row_height
+
+    c.rect(left, top - top_box_height, table_width, top_box_height)
+    c.line(left + label_col_width, top, left + label_col_width, top - top_box_height)
+    for i in range(1, top_box_rows):
+        y = top - i * row_height
+        c.line(left, y, right, y)
+
+    labels_top = ["บริษัท", "วันที่", "เวลา", "ชื่อผู้แจ้ง", "ประเภท", "Messenger"]
+    values_top = [
+        company_name or "",
+        booking.booking_date.strftime("%d/%m/%Y") if booking.booking_date else "",
+        format_booking_time(booking.booking_time),
+        booking.requester_name or "",
+        booking.job_type or "",
+        booking.messenger_name or "",
+    ]
+
+    y = top - row_height + 7
+    for label, value in zip(labels_top, values_top):
+        c.drawString(left + 5, y, label)
+        display_value = shorten_to_width(value, value_max_width)
+        c.drawString(left + label_col_width + 8, y, display_value)
+        y -= row_height
+
+    # =================== 2) กล่องกลาง: รายละเอียด ===================
+    detail_top = top - top_box_height - 40
+
+    first_row_height = row_height
+    body_height = 230
+    detail_height = first_row_height + body_height
+
+    c.rect(left, detail_top - detail_height, table_width, detail_height)
+    c.line(
+        left + label_col_width,
+        detail_top,
+        left + label_col_width,
+        detail_top - detail_height,
+    )
+
+    label_y = detail_top - first_row_height + 7
+    c.drawString(left + 5, label_y, "รายละเอียด")
+
+    detail_text = booking.detail or ""
+    wrapped_lines = wrap_text(detail_text)
+
+    text_obj = c.beginText()
+    text_obj.setFont(font_name, font_size)
+    text_obj.setTextOrigin(left + label_col_width + 8, label_y)
+
+    max_body_bottom = detail_top - detail_height + 10
+    for line in wrapped_lines:
+        if text_obj.getY() < max_body_bottom:
+            break
+        text_obj.textLine(line)
+
+    c.drawText(text_obj)
+
+    # =================== 3) กล่องล่าง ===================
+    bottom_top = detail_top - detail_height - 40
+    bottom_rows = 5
+    bottom_height = bottom_rows * row_height
+
+    c.rect(left, bottom_top - bottom_height, table_width, bottom_height)
+    c.line(
+        left + label_col_width,
+        bottom_top,
+        left + label_col_width,
+        bottom_top - bottom_height,
+    )
+    for i in range(1, bottom_rows):
+        y = bottom_top - i * row_height
+        c.line(left, y, right, y)
+
+    labels_bottom = ["หน่วยงาน", "อาคาร", "ชั้น", "ชื่อผู้ติดต่อ", "เบอร์โทร"]
+    values_bottom = [
+        booking.department or "",
+        booking.building or "",
+        booking.floor or "",
+        booking.contact_name or "",
+        booking.contact_phone or "",
+    ]
+
+    y = bottom_top - row_height + 7
+
+    for label, value in zip(labels_bottom, values_bottom):
+        c.drawString(left + 5, y, label)
+
+        if label == "หน่วยงาน":
+            lines = wrap_text(value)[:2]  # จำกัด 2 บรรทัด
+            text = c.beginText()
+            text.setFont(font_name, font_size)
+            text.setTextOrigin(left + label_col_width + 8, y)
+            for ln in lines:
+                text.textLine(ln)
+            c.drawText(text)
+        else:
+            display_value = shorten_to_width(value, value_max_width)
+            c.drawString(left + label_col_width + 8, y, display_value)
+
+        y -= row_height
+
+    # =================== 4) ส่วนลายเซ็น ===================
+    sign_y = bottom_top - bottom_height - 50
+
+    c.drawString(70, sign_y + 25, "ผู้รับ ________________________________")
+    c.drawString(100, sign_y, "วันที่ _____ / _____ / ________")
+
+    c.drawString(350, sign_y + 25, "ผู้ส่ง ________________________________")
+    c.drawString(380, sign_y, "วันที่ _____ / _____ / ________")
+
+    with perf_phase("render"):
+        c.showPage()
+        c.save()
+    return buffer.getvalue()
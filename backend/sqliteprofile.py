@@ -0,0 +1,166 @@
+# sqliteprofile.py
+"""
+SQLite แบบ tuned สำหรับสาขาที่รันเครื่องเดียว (DATABASE_URL=sqlite:///...)
+
+    SQLITE_PROFILE=default (ค่าเริ่มต้น = ค่าเดิมของ SQLite / pysqlite)  |  tuned = opt-in
+
+    trade-off (bench/bench_sqlite_profile.py): อ่าน 47 → 196 req/s, เขียน 931 → 772 req/s
+    → tuned คุ้มเมื่อโหลดส่วนใหญ่เป็นการอ่าน ถ้าเขียนหนัก (จองพร้อมกันเยอะ) ใช้ default
+
+- pragma ตอนเปิด connection (event "connect" ของทุก engine ที่เป็นไฟล์ SQLite):
+    journal_mode=WAL        → อ่านไม่ block เขียน / เขียนไม่ block อ่าน
+    synchronous=NORMAL      → fsync ตอน checkpoint แทนทุก commit (WAL ยังไม่เสียข้อมูลเมื่อ app crash)
+    busy_timeout, cache_size, mmap_size, temp_store=MEMORY, wal_autocheckpoint, journal_size_limit
+- แยก pool อ่าน / เขียน: เพิ่ม bind "replica" ชี้ไฟล์เดียวกันแบบ read-only (mode=ro)
+  → route @replica_read (report / export / stats) ใช้ pool ของตัวเอง ไม่แย่ง connection กับ
+    create_booking / update_status (ดู replica.py — lag = 0 เสมอเพราะเป็นไฟล์เดียวกัน)
+- background thread ต่อ process (เริ่มตอน request แรก):
+    PRAGMA wal_checkpoint(PASSIVE) ทุก SQLITE_CHECKPOINT_INTERVAL วินาที (ไม่รอ / ไม่ block ใคร)
+    PRAGMA optimize ทุก SQLITE_OPTIMIZE_INTERVAL วินาที
+
+    configure(app)   ก่อน db.init_app (เพิ่ม bind + ขนาด pool)
+    init_app(app)    หลัง db.init_app (ติด pragma ให้ engine)
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from metrics import registry
+from replica import REPLICA_BIND
+
+log = logging.getLogger("booking.sqlite")
+
+wal_frames = registry.gauge("sqlite_wal_frames", "Frames in the SQLite WAL after the last checkpoint")
+checkpoint_busy = registry.counter(
+    "sqlite_checkpoint_busy_total", "Background checkpoints that could not finish (active readers)"
+)
+
+
+def is_sqlite_file(uri: str) -> bool:
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def read_only_uri(uri: str) -> str:
+    """sqlite:///path.db → sqlite:///file:path.db?mode=ro&uri=true (Flask-SQLAlchemy แปลง path เหมือนกัน)"""
+    url = make_url(uri)
+    database = url.database
+    if not database.startswith("file:"):
+        database = "file:" + database
+    return str(url.set(database=database).update_query_dict({"mode": "ro", "uri": "true"}))
+
+
+def pragma_statements(cfg, read_only: bool = False):
+    """cfg = mapping ที่มี .get (app.config หรือ Config.__dict__)"""
+    statements = [
+        f"PRAGMA busy_timeout={int(cfg.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        # ค่าลบ = KiB
+        f"PRAGMA cache_size=-{int(cfg.get('SQLITE_CACHE_SIZE_KB', 65536))}",
+        f"PRAGMA mmap_size={int(cfg.get('SQLITE_MMAP_SIZE_MB', 256)) * 1024 * 1024}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if not read_only:
+        statements = [
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+            f"PRAGMA wal_autocheckpoint={int(cfg.get('SQLITE_WAL_AUTOCHECKPOINT', 1000))}",
+            f"PRAGMA journal_size_limit={int(cfg.get('SQLITE_JOURNAL_SIZE_LIMIT_MB', 64)) * 1024 * 1024}",
+        ] + statements
+    return statements
+
+
+def install_pragmas(engine, cfg, read_only: bool = False):
+    statements = pragma_statements(cfg, read_only)
+
+    @event.listens_for(engine, "connect")
+    def _apply(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+class SQLiteProfile:
+    def __init__(self):
+        self.enabled = False
+        self.app = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    def configure(self, app):
+        cfg = app.config
+        uri = cfg.get("SQLALCHEMY_DATABASE_URI", "")
+        self.enabled = cfg.get("SQLITE_PROFILE", "default") == "tuned" and is_sqlite_file(uri)
+        if not self.enabled:
+            return
+
+        options = dict(cfg.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+        options.setdefault("pool_size", cfg.get("SQLITE_WRITE_POOL_SIZE", 5))
+        cfg["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+        binds = dict(cfg.get("SQLALCHEMY_BINDS") or {})
+        if cfg.get("SQLITE_READ_POOL_SIZE", 10) > 0 and REPLICA_BIND not in binds:
+            binds[REPLICA_BIND] = {
+                "url": read_only_uri(uri),
+                "pool_size": cfg.get("SQLITE_READ_POOL_SIZE", 10),
+            }
+            cfg["SQLALCHEMY_BINDS"] = binds
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        self.app = app
+        db = app.extensions["sqlalchemy"]
+        with app.app_context():
+            for key, engine in db.engines.items():
+                if engine.dialect.name == "sqlite":
+                    install_pragmas(engine, app.config, read_only=key == REPLICA_BIND)
+        app.before_request(self._ensure_maintenance)
+
+    # ---------------- background checkpoint / optimize ---------------- #
+
+    def _ensure_maintenance(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._maintain_forever, name="sqlite-maintenance", daemon=True).start()
+
+    def _maintain_forever(self):
+        cfg = self.app.config
+        interval = max(cfg.get("SQLITE_CHECKPOINT_INTERVAL", 60), 1)
+        optimize_every = cfg.get("SQLITE_OPTIMIZE_INTERVAL", 3600)
+        last_optimize = time.monotonic()
+        while True:
+            time.sleep(interval)
+            optimize = optimize_every > 0 and time.monotonic() - last_optimize >= optimize_every
+            try:
+                self.maintain(optimize)
+            except Exception as e:
+                log.warning("sqlite maintenance failed", extra={"error": str(e)})
+            if optimize:
+                last_optimize = time.monotonic()
+
+    def maintain(self, optimize: bool = False):
+        """checkpoint แบบ PASSIVE (+ optimize) ครั้งเดียว → (busy, log frames, checkpointed frames)"""
+        db = self.app.extensions["sqlalchemy"]
+        with self.app.app_context():
+            with db.engine.connect() as conn:
+                busy, frames, checkpointed = conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)").one()
+                if optimize:
+                    conn.exec_driver_sql("PRAGMA optimize")
+        wal_frames.set(max(frames - checkpointed, 0))
+        if busy or checkpointed < frames:
+            checkpoint_busy.inc()
+        return busy, frames, checkpointed
+
+
+sqlite_profile = SQLiteProfile()
@@ -0,0 +1,109 @@
+# sync.py
+"""
+Incremental sync ของ bookings ด้วย watermark บน updated_at
+
+watermark = "<updated_at ISO>_<booking id>" (ส่งกลับมาเป็น ?since= รอบถัดไป)
+- เรียงด้วย (updated_at, id) → แบ่งหน้าได้แม้หลายแถวมี updated_at เท่ากัน
+- watermark ไม่ขยับเกิน now - SYNC_SAFETY_SECONDS เพื่อไม่พลาดแถวจาก
+  transaction ที่ยัง commit ไม่เสร็จ (client อาจได้แถวซ้ำ → merge ด้วย id)
+- booking ที่ถูกลบส่งกลับใน "deleted" จากตาราง booking_tombstones
+  ไม่เกิน limit ต่อหน้า (+ tombstone ที่ deleted_at เท่ากับตัวสุดท้าย) — เหลือ → has_more
+  และ watermark หยุดที่ deleted_at ของตัวสุดท้าย (แถวที่ส่งไปแล้วอาจถูกส่งซ้ำ)
+"""
+
+import datetime as dt
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from models import Booking, BookingTombstone
+
+EPOCH = dt.datetime(1970, 1, 1)
+
+
+def parse_watermark(value: str):
+    """
+    รับได้ทั้ง ISO timestamp ล้วน ๆ หรือ watermark ที่ server เคยส่งให้
+    คืน (datetime, after_id) — ค่าว่าง = ตั้งแต่ต้น
+    """
+    if not value:
+        return EPOCH, 0
+    ts, _, after_id = value.partition("_")
+    parsed = dt.datetime.fromisoformat(ts)
+    if parsed.tzinfo is not None:
+        # updated_at เก็บเป็น UTC แบบ naive
+        parsed = parsed.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return parsed, int(after_id or 0)
+
+
+def format_watermark(ts: dt.datetime, after_id: int) -> str:
+    return f"{ts.isoformat()}_{after_id}"
+
+
+def fetch_changes(query, since: str, limit: int = None, tombstone_user_id: int = None):
+    """
+    query: query ที่มี Booking อยู่ (อาจ join Company มาด้วย) + filter ตามสิทธิ์แล้ว
+    คืน dict {rows, deleted, watermark, has_more}
+    raise ValueError ถ้า since ผิดรูปแบบ
+    """
+    cfg = current_app.config
+    limit = min(limit or cfg["SYNC_PAGE_SIZE"], cfg["SYNC_PAGE_SIZE"])
+    since_ts, after_id = parse_watermark(since)
+
+    rows = (
+        query.filter(
+            or_(
+                Booking.updated_at > since_ts,
+                and_(Booking.updated_at == since_ts, Booking.id > after_id),
+            )
+        )
+        .order_by(Booking.updated_at, Booking.id)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    tombstones = BookingTombstone.query.filter(BookingTombstone.deleted_at > since_ts)
+    if tombstone_user_id is not None:
+        tombstones = tombstones.filter(BookingTombstone.created_by == tombstone_user_id)
+    page = (
+        tombstones.order_by(BookingTombstone.deleted_at, BookingTombstone.id)
+        .limit(limit + 1)
+        .all()
+    )
+    tomb_ts = None
+    if len(page) > limit:
+        # ตัดที่ deleted_at ของตัวที่ limit แต่เอาตัวที่เวลาเท่ากันมาให้ครบ
+        # → รอบหน้า (deleted_at > tomb_ts) ไม่พลาด และ watermark ขยับได้เสมอ
+        tomb_ts = page[limit - 1].deleted_at
+        page = tombstones.filter(BookingTombstone.deleted_at <= tomb_ts).all()
+    deleted = sorted({t.booking_id for t in page})
+
+    mark_ts, mark_id = since_ts, after_id
+    if rows:
+        last = rows[-1] if isinstance(rows[-1], Booking) else rows[-1][0]
+        mark_ts, mark_id = last.updated_at, last.id
+
+    # อย่าให้ watermark ล้ำหน้าแถวที่อาจยัง commit ไม่เสร็จ
+    safe_ts = dt.datetime.utcnow() - dt.timedelta(seconds=cfg["SYNC_SAFETY_SECONDS"])
+    if not has_more and mark_ts > safe_ts:
+        if safe_ts > since_ts:
+            mark_ts, mark_id = safe_ts, 0
+        else:
+            mark_ts, mark_id = since_ts, after_id
+
+    if tomb_ts is not None:
+        # tombstone ยังเหลือ: watermark ไม่เกิน tomb_ts (แถวหลังจากนั้นจะมาอีกรอบ — merge ด้วย id)
+        # แถวหมดแล้ว → ขยับไปที่ tomb_ts เพื่อให้หน้าถัดไปเริ่มที่ tombstone ที่เหลือ
+        if mark_ts > tomb_ts or (not has_more and tomb_ts <= safe_ts):
+            mark_ts, mark_id = tomb_ts, 0
+        # ยังอยู่ในช่วง safety (watermark ขยับไม่ได้) → ไม่บอกให้ client ดึงต่อทันที
+        has_more = has_more or (mark_ts, mark_id) != (since_ts, after_id)
+
+    return {
+        "rows": rows,
+        "deleted": deleted,
+        "watermark": format_watermark(mark_ts, mark_id),
+        "has_more": has_more,
+    }
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# module ของ backend import กันแบบ top-level (รันจาก backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,54 @@
+from bench.bench_dispatch import make_fixture
+from dispatch import DistanceMatrix, plan_day
+
+# A = depot, B / C ห่าง depot 1 แต่ห่างกันเอง 10
+MATRIX = DistanceMatrix(["A", "B", "C"], [[0, 1, 1], [1, 0, 10], [1, 10, 0]])
+JOBS = [
+    {"id": 1, "building": "B", "floor": "1", "department": "บัญชี", "slot": "MORNING"},
+    {"id": 2, "building": "B", "floor": "1", "department": "บุคคล", "slot": "MORNING"},
+    {"id": 3, "building": "C", "floor": "2", "department": "ขาย", "slot": "MORNING"},
+]
+
+
+def test_one_stop_per_trip_spreads_trips_across_messengers():
+    plan = plan_day(JOBS, ["m1", "m2"], MATRIX, depot="A", max_stops=1)
+
+    # job 1 + 2 อยู่ชั้นเดียวกัน → stop เดียวกัน → messenger เดียวกัน
+    assert plan["assignments"] == {1: "m1", 2: "m1", 3: "m2"}
+    assert plan["total_trips"] == 2
+    assert plan["total_distance"] == 4.0
+    m1, m2 = plan["messengers"]
+    assert (m1["jobs"], m1["distance"]) == (2, 2.0)
+    assert m1["trips"][0]["stops"][0]["departments"] == ["บัญชี", "บุคคล"]
+    assert (m2["jobs"], m2["distance"]) == (1, 2.0)
+
+
+def test_single_trip_goes_to_first_messenger():
+    plan = plan_day(JOBS, ["m1", "m2"], MATRIX, depot="A", max_stops=8)
+
+    assert plan["assignments"] == {1: "m1", 2: "m1", 3: "m1"}
+    assert plan["total_trips"] == 1
+    # A → B → C → A
+    assert plan["total_distance"] == 12.0
+    assert plan["messengers"][1]["trips"] == []
+
+
+def test_next_slot_goes_to_least_loaded_messenger():
+    jobs = JOBS + [{"id": 4, "building": "B", "floor": "3", "department": "ไอที", "slot": "AFTERNOON"}]
+    plan = plan_day(jobs, ["m1", "m2"], MATRIX, depot="A", max_stops=8)
+
+    # load คิดต่อ slot → เที่ยวบ่ายเริ่มจาก messenger คนแรกอีกครั้ง
+    assert plan["assignments"][4] == "m1"
+    assert [t["slot"] for t in plan["messengers"][0]["trips"]] == ["MORNING", "AFTERNOON"]
+
+
+def test_fixture_plan_is_deterministic_and_complete():
+    jobs, matrix, depot = make_fixture(jobs=300)
+    messengers = ["m1", "m2", "m3"]
+    first = plan_day(jobs, messengers, matrix, depot=depot, max_stops=8)
+    second = plan_day(jobs, messengers, matrix, depot=depot, max_stops=8)
+
+    assert first == second
+    assert sorted(first["assignments"]) == [job["id"] for job in jobs]
+    assert sum(m["jobs"] for m in first["messengers"]) == len(jobs)
+    assert all(len(trip["stops"]) <= 8 for m in first["messengers"] for trip in m["trips"])
@@ -0,0 +1,242 @@
+# tokens.py
+"""
+Access token อายุสั้น + refresh token แบบหมุนเวียน (rotating)
+
+    POST /api/auth/login    → access_token + refresh_token   (verify password ครั้งเดียว)
+    POST /api/auth/refresh  → access_token + refresh_token ใหม่ (ไม่ hash password)
+    POST /api/auth/logout   → revoke ทั้ง family
+
+- refresh token = "<id>.<secret>" → หาแถวด้วย primary key แล้วเทียบ sha256(secret)
+- ใช้ได้ครั้งเดียว: rotate แล้วแถวเดิมเป็น rotated
+  token ที่ rotate ไปแล้วถูกใช้ซ้ำ (เกิน REFRESH_REUSE_GRACE_SECONDS) = ถูกขโมย
+  → revoke ทั้ง family (ทุก token ที่มาจาก login ครั้งนั้น)
+- access token มี claim "fam" (family ของ refresh token)
+  ทุก request เช็คว่า family ถูก revoke หรือยังผ่าน cache ใน process
+  (TOKEN_REVOCATION_CACHE_TTL วินาที) → ไม่ต้อง query DB ทุก request
+"""
+
+import datetime as dt
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask_jwt_extended import create_access_token
+from sqlalchemy import delete, select, update
+
+from metrics import registry
+from models import db, RefreshToken
+
+ACTIVE, ROTATED, REVOKED = 0, 1, 2
+# ลบ token หมดอายุอย่างมากทุกกี่วินาที (ต่อ worker)
+PURGE_INTERVAL = 600
+
+_table = RefreshToken.__table__
+
+refresh_results = registry.counter(
+    "auth_refresh_total", "Refresh token exchanges by result", ("result",)
+)
+
+
+class TokenError(Exception):
+    def __init__(self, message: str, status: int = 401):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _digest(secret: str) -> bytes:
+    return hashlib.sha256(secret.encode()).digest()
+
+
+# ---------------- revocation cache ---------------- #
+
+class RevocationCache:
+    """family_id → revoked? (เก็บทั้งผลบวกและลบ หมดอายุตาม ttl)"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.ttl = 60
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # family_id -> (checked_at, revoked)
+
+    def get(self, family_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(family_id)
+            if entry is None or now - entry[0] > self.ttl:
+                return None
+            return entry[1]
+
+    def set(self, family_id, revoked: bool):
+        with self._lock:
+            self._data[family_id] = (time.monotonic(), revoked)
+            self._data.move_to_end(family_id)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+revocations = RevocationCache()
+_last_purge = [0.0]
+
+
+def init_app(app):
+    revocations.ttl = app.config.get("TOKEN_REVOCATION_CACHE_TTL", 60)
+
+
+def is_family_revoked(family_id) -> bool:
+    cached = revocations.get(family_id)
+    if cached is not None:
+        return cached
+    revoked = (
+        db.session.execute(
+            select(_table.c.id)
+            .where(_table.c.family_id == family_id, _table.c.status != REVOKED)
+            .limit(1)
+        ).first()
+        is None
+    )
+    revocations.set(family_id, revoked)
+    return revoked
+
+
+def is_access_token_revoked(jwt_payload) -> bool:
+    """token_in_blocklist_loader — token ที่ไม่มี fam (ออกก่อนมีระบบนี้) ผ่านไปจนหมดอายุ"""
+    family_id = jwt_payload.get("fam")
+    return family_id is not None and is_family_revoked(family_id)
+
+
+# ---------------- issue / rotate / revoke ---------------- #
+
+def _new_refresh(user_id: int, family_id=None):
+    """insert แถวใหม่ (ยังไม่ commit) → (token ดิบ, family_id)"""
+    cfg = current_app.config
+    secret = secrets.token_urlsafe(32)
+    row = RefreshToken(
+        family_id=family_id,
+        user_id=user_id,
+        token_hash=_digest(secret),
+        status=ACTIVE,
+        expires_at=dt.datetime.utcnow() + dt.timedelta(days=cfg.get("REFRESH_TOKEN_DAYS", 14)),
+    )
+    db.session.add(row)
+    db.session.flush()
+    if family_id is None:
+        row.family_id = row.id
+    return f"{row.id}.{secret}", row.family_id
+
+
+def _response(user_id: int, family_id: int, refresh: str):
+    return {
+        "access_token": create_access_token(
+            identity=str(user_id), additional_claims={"fam": family_id}
+        ),
+        "refresh_token": refresh,
+        "expires_in": int(current_app.config["JWT_ACCESS_TOKEN_EXPIRES"].total_seconds()),
+    }
+
+
+def issue(user) -> dict:
+    """หลัง login สำเร็จ → family ใหม่ (commit แล้ว)"""
+    _purge_expired()
+    refresh, family_id = _new_refresh(user.id)
+    db.session.commit()
+    revocations.set(family_id, False)
+    return _response(user.id, family_id, refresh)
+
+
+def _parse(raw: str):
+    token_id, _, secret = (raw or "").partition(".")
+    if not token_id.isdigit() or not secret:
+        raise TokenError("invalid refresh token")
+    return int(token_id), secret
+
+
+def rotate(raw: str) -> dict:
+    """แลก refresh token → คู่ใหม่ (raise TokenError)"""
+    token_id, secret = _parse(raw)
+    row = db.session.execute(select(_table).where(_table.c.id == token_id)).first()
+    if row is None or not hmac.compare_digest(row.token_hash, _digest(secret)):
+        refresh_results.inc(result="invalid")
+        raise TokenError("invalid refresh token")
+
+    now = dt.datetime.utcnow()
+    if row.status == REVOKED or revocations.get(row.family_id):
+        refresh_results.inc(result="revoked")
+        raise TokenError("refresh token revoked")
+    if row.expires_at < now:
+        refresh_results.inc(result="expired")
+        raise TokenError("refresh token expired")
+
+    if row.status == ROTATED:
+        grace = dt.timedelta(seconds=current_app.config.get("REFRESH_REUSE_GRACE_SECONDS", 10))
+        if row.rotated_at and now - row.rotated_at <= grace:
+            # อีก tab / request ที่ยิงพร้อมกัน rotate ไปก่อน → ให้ client อ่าน token ล่าสุดแล้วลองใหม่
+            refresh_results.inc(result="race")
+            raise TokenError("refresh token already rotated", status=409)
+        revoke_family(row.family_id)
+        refresh_results.inc(result="reuse")
+        raise TokenError("refresh token reuse detected")
+
+    # ใช้ได้ครั้งเดียว: ใครเปลี่ยน active → rotated ได้ก่อนคือผู้ชนะ
+    claimed = db.session.execute(
+        update(_table)
+        .where(_table.c.id == token_id, _table.c.status == ACTIVE)
+        .values(status=ROTATED, rotated_at=now)
+    ).rowcount
+    if claimed != 1:
+        db.session.rollback()
+        refresh_results.inc(result="race")
+        raise TokenError("refresh token already rotated", status=409)
+
+    refresh, _ = _new_refresh(row.user_id, row.family_id)
+    db.session.commit()
+    refresh_results.inc(result="ok")
+    return _response(row.user_id, row.family_id, refresh)
+
+
+def revoke_family(family_id: int):
+    db.session.execute(
+        update(_table).where(_table.c.family_id == family_id).values(status=REVOKED)
+    )
+    db.session.commit()
+    revocations.set(family_id, True)
+
+
+def revoke_raw(raw: str):
+    """logout: revoke family ของ token นี้ (token ไม่ถูกต้อง = ไม่ทำอะไร)"""
+    try:
+        token_id, secret = _parse(raw)
+    except TokenError:
+        return
+    row = db.session.execute(select(_table).where(_table.c.id == token_id)).first()
+    if row is not None and hmac.compare_digest(row.token_hash, _digest(secret)):
+        revoke_family(row.family_id)
+
+
+def revoke_user(user_id: int):
+    """เปลี่ยน / reset password, ลบ user → ทุก session ของ user หมดอายุ"""
+    families = db.session.execute(
+        select(_table.c.family_id)
+        .where(_table.c.user_id == user_id, _table.c.status != REVOKED)
+        .distinct()
+    ).scalars().all()
+    if not families:
+        return
+    db.session.execute(
+        update(_table).where(_table.c.user_id == user_id).values(status=REVOKED)
+    )
+    db.session.commit()
+    for family_id in families:
+        revocations.set(family_id, True)
+
+
+def _purge_expired():
+    now = time.monotonic()
+    if now - _last_purge[0] < PURGE_INTERVAL:
+        return
+    _last_purge[0] = now
+    db.session.execute(delete(_table).where(_table.c.expires_at < dt.datetime.utcnow()))
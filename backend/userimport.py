@@ -0,0 +1,147 @@
+# userimport.py
+"""
+Import user ทีละมาก ๆ (เปิดบริษัทใหม่ทีละหลายร้อยคน)
+
+    POST /api/admin/users/import
+      JSON: {"users": [{"username", "password", "full_name", ...}, ...]}  (หรือ list ตรง ๆ)
+      CSV : ไฟล์ (multipart field "file") หรือ body text/csv — แถวแรกเป็นชื่อคอลัมน์
+
+- ตรวจทุกแถวก่อน: ขาด username / password, role ผิด, username ซ้ำในไฟล์
+- username ที่มีอยู่แล้วใน DB: query เดียว (IN) ไม่ query ทีละแถว
+- hash password ของแถวที่ผ่านแบบขนาน (passwords.hash_passwords)
+- insert ด้วย statement เดียว (executemany / insertmanyvalues) + commit ครั้งเดียว
+- ขนาดต่อครั้งจำกัดด้วย max_rows(): hash ต้องเสร็จใน USER_IMPORT_HASH_BUDGET วินาที
+  (scrypt หลายพันแถวใน request เดียวใช้หลายนาที) → ไฟล์ใหญ่ให้ client แบ่งส่งเป็นก้อน
+ผลลัพธ์ต่อแถว: {"row", "username", "status": "created" | "error", "id" | "message"}
+"""
+
+import csv
+import io
+
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from models import db, User
+from passwords import hash_cost, hash_passwords, hash_pool
+
+ROLES = ("USER", "ADMIN")
+_true = ("1", "true", "yes", "y")
+
+
+def parse_csv(text: str):
+    reader = csv.DictReader(io.StringIO(text.lstrip("\ufeff")))
+    return [{(k or "").strip(): v for k, v in row.items()} for row in reader]
+
+
+def _flag(value, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in _true
+    return bool(value)
+
+
+def _text(raw, key) -> str:
+    """ค่าข้อความจาก JSON: ตัวเลข (เช่น username / password เป็นรหัสพนักงาน) → str"""
+    value = raw.get(key)
+    if value is None or isinstance(value, str):
+        return value or ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError(f"{key} must be a string")
+
+
+def _clean(raw) -> dict:
+    """dict จาก JSON / CSV → ค่าสำหรับ insert (raise ValueError ถ้าไม่ถูกต้อง)"""
+    if not isinstance(raw, dict):
+        raise ValueError("row must be an object")
+    username = _text(raw, "username").strip()
+    password = _text(raw, "password")
+    if not username or not password:
+        raise ValueError("username and password required")
+    role = (_text(raw, "role") or "USER").strip().upper()
+    if role not in ROLES:
+        raise ValueError(f"role must be one of {', '.join(ROLES)}")
+    return {
+        "username": username,
+        "password": password,
+        "full_name": _text(raw, "full_name") or None,
+        "email": _text(raw, "email") or None,
+        "phone": _text(raw, "phone") or None,
+        "role": role,
+        "is_active": _flag(raw.get("is_active"), True),
+        "is_approver": _flag(raw.get("is_approver"), False),
+    }
+
+
+def max_rows() -> int:
+    """จำนวนแถวที่ hash ทันใน USER_IMPORT_HASH_BUDGET (ไม่เกิน USER_IMPORT_MAX_ROWS, อย่างน้อย 1)"""
+    cfg = current_app.config
+    per_row = hash_cost() / hash_pool.bulk_workers
+    fits = int(cfg["USER_IMPORT_HASH_BUDGET"] / per_row) if per_row > 0 else cfg["USER_IMPORT_MAX_ROWS"]
+    return max(1, min(cfg["USER_IMPORT_MAX_ROWS"], fits))
+
+
+def _existing(usernames):
+    if not usernames:
+        return set()
+    return set(db.session.execute(select(User.username).where(User.username.in_(usernames))).scalars())
+
+
+def _error(i, username, message):
+    return {"row": i + 1, "username": username, "status": "error", "message": message}
+
+
+def import_users(rows):
+    """rows = list ของ dict → (results, จำนวนที่สร้าง)"""
+    results = [None] * len(rows)
+    pending = []  # (index, values)
+    seen = set()
+
+    for i, raw in enumerate(rows):
+        try:
+            values = _clean(raw)
+        except ValueError as e:
+            results[i] = _error(i, raw.get("username") if isinstance(raw, dict) else None, str(e))
+            continue
+        if values["username"] in seen:
+            results[i] = _error(i, values["username"], "duplicate username in import")
+            continue
+        seen.add(values["username"])
+        pending.append((i, values))
+
+    def drop_existing(pending):
+        taken = _existing([values["username"] for _, values in pending])
+        for i, values in pending:
+            if values["username"] in taken:
+                results[i] = _error(i, values["username"], "username already exists")
+        return [(i, values) for i, values in pending if values["username"] not in taken]
+
+    pending = drop_existing(pending)
+
+    hashes = hash_passwords([values.pop("password") for _, values in pending])
+    for (_, values), password_hash in zip(pending, hashes):
+        values["password_hash"] = password_hash
+
+    # อีก request สร้าง username เดียวกันระหว่าง hash → ตรวจซ้ำแล้ว insert ใหม่อีกครั้ง
+    ids = []
+    for attempt in range(2):
+        if not pending:
+            break
+        try:
+            ids = db.session.scalars(
+                insert(User).returning(User.id, sort_by_parameter_order=True),
+                [values for _, values in pending],
+            ).all()
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt:
+                raise
+            pending = drop_existing(pending)
+
+    for (i, values), user_id in zip(pending, ids):
+        results[i] = {"row": i + 1, "username": values["username"], "status": "created", "id": user_id}
+    return results, len(ids)
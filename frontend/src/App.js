@@ -17,6 +17,7 @@ import UserManagementPage from "./pages/UserManagementPage";
 import MessengerSchedulePage from "./pages/MessengerSchedulePage";
 import ReportPage from "./pages/ReportPage";
 import UserDashboardPage from "./pages/UserDashboardPage"; // ⭐ ใหม่ ต้องมีไฟล์นี้
+import { logoutRequest } from "./api/http";
 
 const { Header, Content } = Layout;
 
@@ -46,7 +47,7 @@ function App() {
   };
 
   const handleLogout = () => {
-    localStorage.removeItem("access_token");
+    logoutRequest();
     localStorage.removeItem("user");
     setUser(null);
     setMenuKey("login");
@@ -0,0 +1,83 @@
+// ================================
+// 📌 Booking change stream (SSE)
+// ================================
+import http, { API_BASE_URL } from "./http";
+
+// ================================
+// subscribe → คืนฟังก์ชันสำหรับ unsubscribe
+//   onBooking(booking) : booking ที่ถูกสร้าง/แก้ไข
+//   onReset()          : พลาด event ไป → ควรโหลด list ใหม่ทั้งหมด
+// ================================
+export function subscribeBookingEvents(onBooking, onReset) {
+  if (!localStorage.getItem("access_token") || !window.EventSource) return () => {};
+
+  let es = null;
+  let closed = false;
+  let lastEventId = null;
+
+  const handleBooking = (e) => {
+    lastEventId = e.lastEventId || lastEventId;
+    const event = JSON.parse(e.data);
+    if (event.booking) {
+      onBooking(event.booking);
+    } else if (onReset) {
+      onReset();
+    }
+  };
+
+  const connect = async () => {
+    if (closed || !localStorage.getItem("access_token")) return;
+
+    // EventSource ส่ง header ไม่ได้ → ขอ ticket อายุสั้นด้วย access token (http refresh ให้เองถ้าหมดอายุ)
+    // ไม่ใส่ JWT ใน URL เพราะ URL ไปอยู่ใน log ของ proxy
+    let ticket;
+    try {
+      ticket = (await http.post("/events/ticket")).data.ticket;
+    } catch (err) {
+      return;
+    }
+    if (closed) return;
+
+    const params = new URLSearchParams({ ticket });
+    if (lastEventId) params.set("last_event_id", lastEventId);
+    es = new EventSource(`${API_BASE_URL}/api/events/stream?${params}`);
+    es.addEventListener("booking.created", handleBooking);
+    es.addEventListener("booking.updated", handleBooking);
+    es.addEventListener("reset", (e) => {
+      lastEventId = e.lastEventId || lastEventId;
+      if (onReset) onReset();
+    });
+
+    // ticket ใช้ได้แค่ตอนเปิด → reconnect อัตโนมัติหลังหมดอายุได้ 401 แล้ว EventSource ปิดเอง
+    // → ขอ ticket ใหม่แล้วต่อจาก event ล่าสุด (?last_event_id=)
+    es.onerror = () => {
+      if (es.readyState !== EventSource.CLOSED) return;
+      setTimeout(connect, 1000);
+    };
+  };
+
+  connect();
+          if (onReset) onReset();
+        })
+        .catch(() => {});
+    };
+  };
+
+  connect();
+
+  return () => {
+    closed = true;
+    if (es) es.close();
+  };
+}
+
+// ================================
+// แทนที่ booking เดิม (id เดียวกัน) หรือเพิ่มไว้บนสุด
+// ================================
+export function mergeBooking(list, booking) {
+  const idx = list.findIndex((b) => b.id === booking.id);
+  if (idx === -1) return [booking, ...list];
+  const next = list.slice();
+  next[idx] = { ...list[idx], ...booking };
+  return next;
+}
@@ -3,7 +3,7 @@
 // ================================
 import axios from "axios";
 
-const API_BASE_URL =
+export const API_BASE_URL =
   process.env.REACT_APP_API_BASE_URL || "http://192.168.200.230:16000";
 
 console.log("📡 Connecting API:", API_BASE_URL + "/api");
@@ -19,6 +19,69 @@ const http = axios.create({
   timeout: 10000,
 });
 
+// ================================
+// Token storage
+//   access_token  : อายุสั้น ส่งทุก request
+//   refresh_token : ใช้ครั้งเดียว แลก access_token ใหม่ที่ /auth/refresh
+// ================================
+export function saveTokens(data) {
+  localStorage.setItem("access_token", data.access_token);
+  if (data.refresh_token) {
+    localStorage.setItem("refresh_token", data.refresh_token);
+  }
+}
+
+export function clearTokens() {
+  localStorage.removeItem("access_token");
+  localStorage.removeItem("refresh_token");
+}
+
+// logout ฝั่ง server (revoke refresh token) แล้วลบ token ในเครื่อง
+export function logoutRequest() {
+  const refreshToken = localStorage.getItem("refresh_token");
+  clearTokens();
+  if (!refreshToken) return Promise.resolve();
+  return axios
+    .post(API_BASE_URL + "/api/auth/logout", { refresh_token: refreshToken })
+    .catch(() => {});
+}
+
+// ================================
+// Refresh access token
+//   request ที่ได้ 401 พร้อมกันหลายตัว → refresh ครั้งเดียว (ใช้ promise ร่วมกัน)
+//   409 = tab อื่น refresh ไปก่อน → ใช้ token ล่าสุดใน localStorage
+// ================================
+let refreshing = null;
+
+async function doRefresh() {
+  const used = localStorage.getItem("refresh_token");
+  if (!used) throw new Error("no refresh token");
+  try {
+    const res = await axios.post(API_BASE_URL + "/api/auth/refresh", {
+      refresh_token: used,
+    });
+    saveTokens(res.data);
+    return res.data.access_token;
+  } catch (err) {
+    if (err.response?.status === 409) {
+      await new Promise((resolve) => setTimeout(resolve, 500));
+      if (localStorage.getItem("refresh_token") !== used) {
+        return localStorage.getItem("access_token");
+      }
+    }
+    throw err;
+  }
+}
+
+export function refreshAccessToken() {
+  if (!refreshing) {
+    refreshing = doRefresh().finally(() => {
+      refreshing = null;
+    });
+  }
+  return refreshing;
+}
+
 // ================================
 // Attach Token automatically
 // ================================
@@ -35,7 +98,7 @@ http.interceptors.request.use((config) => {
 // ================================
 http.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
     console.error("❌ AXIOS ERROR:", {
       url: error.config?.url,
       status: error.response?.status,
@@ -55,10 +118,22 @@ http.interceptors.response.use(
     const isAuthLogin = url.includes("/auth/login");
     const isForgot = url.includes("/auth/forgot-password");
 
+    // ✅ access token หมดอายุ → refresh แล้วส่ง request เดิมซ้ำ (ครั้งเดียว)
+    if (!isAuthLogin && !isForgot && status === 401 && !error.config._retried) {
+      try {
+        const token = await refreshAccessToken();
+        error.config._retried = true;
+        error.config.headers.Authorization = `Bearer ${token}`;
+        return http(error.config);
+      } catch (refreshError) {
+        console.warn("⚠ Refresh token rejected");
+      }
+    }
+
     // ✅ เคส token หมดอายุ/ไม่ถูกต้อง เฉพาะ API อื่น ๆ ที่ไม่ใช่ login/forgot
     if (!isAuthLogin && !isForgot && (status === 401 || status === 422)) {
       console.warn("⚠ Token expired or invalid → Force logout");
-      localStorage.removeItem("access_token");
+      clearTokens();
       if (window.location.pathname !== "/login") {
         window.location.href = "/login";
       }
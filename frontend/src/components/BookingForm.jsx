@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import {
   Form,
   Input,
@@ -17,12 +17,25 @@ import http from "../api/http";
 const { TextArea } = Input;
 const { Option } = Select;
 
+// ส่งซ้ำได้กี่ครั้งเมื่อเน็ตหลุด (ใช้ Idempotency-Key เดิม → server ไม่สร้างซ้ำ)
+const MAX_RETRIES = 2;
+
+function newIdempotencyKey() {
+  // crypto.randomUUID ใช้ได้เฉพาะ https / localhost
+  if (window.crypto?.randomUUID) return window.crypto.randomUUID();
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+const isNetworkError = (err) => !err.response;
+
 export default function BookingForm() {
   const [companies, setCompanies] = useState([]);
   const [timeMode, setTimeMode] = useState("morning"); // morning | afternoon | custom | none
   const [loadingCompanies, setLoadingCompanies] = useState(false);
   const [submitting, setSubmitting] = useState(false);
   const [form] = Form.useForm();
+  // key ต่อ 1 booking: ใช้ซ้ำตอน retry / กดส่งใหม่ด้วยข้อมูลเดิม
+  const idempotency = useRef({ key: null, payload: null });
 
   // Load Companies
   useEffect(() => {
@@ -72,7 +85,23 @@ export default function BookingForm() {
         contact_phone: values.contact_phone,
       };
 
-      const res = await http.post("/bookings", payload);
+      const payloadJson = JSON.stringify(payload);
+      if (idempotency.current.payload !== payloadJson) {
+        idempotency.current = { key: newIdempotencyKey(), payload: payloadJson };
+      }
+
+      let res;
+      for (let attempt = 0; ; attempt++) {
+        try {
+          res = await http.post("/bookings", payload, {
+            headers: { "Idempotency-Key": idempotency.current.key },
+          });
+          break;
+        } catch (err) {
+          if (!isNetworkError(err) || attempt >= MAX_RETRIES) throw err;
+        }
+      }
+      idempotency.current = { key: null, payload: null };
       const bookingId = res.data.booking_id;
 
       // Download PDF
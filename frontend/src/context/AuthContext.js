@@ -1,5 +1,5 @@
 import React, { createContext, useState, useEffect } from "react";
-import http from "../api/http";
+import http, { saveTokens, clearTokens, logoutRequest } from "../api/http";
 
 export const AuthContext = createContext(null);
 
@@ -13,19 +13,19 @@ export function AuthProvider({ children }) {
         .then((res) => setUser(res.data))
         .catch(() => {
           setUser(null);
-          localStorage.removeItem("access_token");
+          clearTokens();
         });
     }
   }, []);
 
   const login = async (username, password) => {
     const res = await http.post("/auth/login", { username, password });
-    localStorage.setItem("access_token", res.data.access_token);
+    saveTokens(res.data);
     setUser(res.data.user);
   };
 
   const logout = () => {
-    localStorage.removeItem("access_token");
+    logoutRequest();
     setUser(null);
   };
 
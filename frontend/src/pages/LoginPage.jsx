@@ -1,6 +1,6 @@
 import React, { useState } from "react";
 import { Form, Input, Button, Card, message, Modal, Typography } from "antd";
-import http from "../api/http";
+import http, { saveTokens } from "../api/http";
 
 const { Link } = Typography;
 
@@ -21,7 +21,7 @@ export default function LoginPage({ onLoginSuccess }) {
         password: values.password,
       });
 
-      localStorage.setItem("access_token", res.data.access_token);
+      saveTokens(res.data);
       localStorage.setItem("user", JSON.stringify(res.data.user));
 
       message.success("Login successful ✔");
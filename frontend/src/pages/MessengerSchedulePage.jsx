@@ -13,6 +13,7 @@ import {
 } from "antd";
 import { SearchOutlined, FilePdfOutlined } from "@ant-design/icons";
 import http from "../api/http";
+import { subscribeBookingEvents, mergeBooking } from "../api/events";
 
 export default function MessengerSchedulePage() {
   const [bookings, setBookings] = useState([]);
@@ -49,6 +50,18 @@ export default function MessengerSchedulePage() {
 
   useEffect(() => {
     fetchBookings();
+
+    // รับเฉพาะ booking ที่เปลี่ยน แทนการโหลด /admin/bookings ใหม่ทั้งหมด
+    return subscribeBookingEvents((b) => {
+      setBookings((list) =>
+        mergeBooking(list, { ...b, approved_by_name: b.messenger_name })
+      );
+      setMessengerMap((m) =>
+        m[b.id] && !b.messenger_name
+          ? m
+          : { ...m, [b.id]: b.messenger_name || "ขวัญเมือง" }
+      );
+    }, fetchBookings);
   }, []);
 
   // ---------------- helper: render booking time ----------------
@@ -65,7 +78,20 @@ export default function MessengerSchedulePage() {
   };
 
   // ---------------- update status (PENDING → SUCCESS / CANCEL) ----------------
-  const updateStatus = async (bookingId, status) => {
+  // แถว virtual = occurrence ของ booking ซ้ำที่ยังไม่มีแถวจริง (id เป็น "s<series>-<date>")
+  // → ใช้ endpoint ของ series แทน /admin/bookings/<id>
+  const statusUrl = (record) =>
+    record.virtual
+      ? `/admin/series/${record.series_id}/occurrences/${record.occurrence_date}/status`
+      : `/admin/bookings/${record.id}/status`;
+
+  const pdfUrl = (record) =>
+    record.virtual
+      ? `/bookings/series/${record.series_id}/occurrences/${record.occurrence_date}/pdf`
+      : `/bookings/${record.id}/pdf`;
+
+  const updateStatus = async (record, status) => {
+    const bookingId = record.id;
     setUpdatingId(bookingId);
     try {
       const payload = { status };
@@ -78,7 +104,7 @@ export default function MessengerSchedulePage() {
             : "ขวัญเมือง";
       }
 
-      await http.patch(`/admin/bookings/${bookingId}/status`, payload);
+      await http.patch(statusUrl(record), payload);
 
       if (status === "SUCCESS") {
         message.success("Status updated to Completed");
@@ -283,7 +309,7 @@ export default function MessengerSchedulePage() {
             size="small"
             disabled={record.status === "SUCCESS"}
             loading={updatingId === record.id && record.status !== "SUCCESS"}
-            onClick={() => updateStatus(record.id, "SUCCESS")}
+            onClick={() => updateStatus(record, "SUCCESS")}
           >
             Completed
           </Button>
@@ -292,7 +318,7 @@ export default function MessengerSchedulePage() {
           {record.status !== "SUCCESS" && (
             <Popconfirm
               title="Are you sure to cancel this job?"
-              onConfirm={() => updateStatus(record.id, "CANCEL")}
+              onConfirm={() => updateStatus(record, "CANCEL")}
               okText="Yes"
               cancelText="No"
             >
@@ -313,7 +339,7 @@ export default function MessengerSchedulePage() {
             icon={<FilePdfOutlined />}
             onClick={async () => {
               try {
-                const res = await http.get(`/bookings/${record.id}/pdf`, {
+                const res = await http.get(pdfUrl(record), {
                   responseType: "blob",
                 });
                 const blob = new Blob([res.data], { type: "application/pdf" });
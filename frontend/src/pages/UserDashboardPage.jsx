@@ -21,6 +21,7 @@ import {
   EditOutlined,
 } from "@ant-design/icons";
 import http from "../api/http";
+import { subscribeBookingEvents, mergeBooking } from "../api/events";
 
 export default function UserDashboardPage({ onLogout, onProfileChange }) {
   const [bookings, setBookings] = useState([]);
@@ -68,6 +69,12 @@ export default function UserDashboardPage({ onLogout, onProfileChange }) {
   useEffect(() => {
     loadBookings();
     loadProfile();
+
+    // booking ของเราเปลี่ยน (เช่น admin อนุมัติ) → อัปเดตเฉพาะแถวนั้น
+    return subscribeBookingEvents(
+      (b) => setBookings((list) => mergeBooking(list, b)),
+      loadBookings
+    );
   }, []);
 
   // ---------- Save Profile (full_name, email, phone) ---------- //
@@ -169,7 +176,11 @@ export default function UserDashboardPage({ onLogout, onProfileChange }) {
           icon={<FilePdfOutlined />}
           onClick={async () => {
             try {
-              const res = await http.get(`/bookings/${r.id}/pdf`, {
+              // แถว virtual (booking ซ้ำที่ยังไม่มีแถวจริง) ใช้ endpoint ของ series
+              const pdfUrl = r.virtual
+                ? `/bookings/series/${r.series_id}/occurrences/${r.occurrence_date}/pdf`
+                : `/bookings/${r.id}/pdf`;
+              const res = await http.get(pdfUrl, {
                 responseType: "blob",
               });
               const blob = new Blob([res.data], { type: "application/pdf" });
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import {
   Card,
   Table,
@@ -18,14 +18,20 @@ import {
   EditOutlined,
   DeleteOutlined,
   KeyOutlined,
+  UploadOutlined,
 } from "@ant-design/icons";
 import http from "../api/http";
 
 const { Option } = Select;
 
+const PAGE_SIZE = 50;
+
 export default function UserManagementPage() {
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(false);
+  // แบ่งหน้า + ค้นหาฝั่ง server (GET /admin/users?q=&page=&page_size=)
+  const [query, setQuery] = useState("");
+  const [pagination, setPagination] = useState({ current: 1, pageSize: PAGE_SIZE, total: 0 });
 
   const [formVisible, setFormVisible] = useState(false);
   const [formMode, setFormMode] = useState("create"); // create | edit
@@ -36,12 +42,23 @@ export default function UserManagementPage() {
   const [pwdForm] = Form.useForm();
   const [pwdUser, setPwdUser] = useState(null);
 
+  const importInput = useRef(null);
+  const [importing, setImporting] = useState(false);
+  const [importResult, setImportResult] = useState(null);
+
   // -------- Fetch Users -------- //
-  const fetchUsers = async () => {
+  const fetchUsers = async (
+    page = pagination.current,
+    pageSize = pagination.pageSize,
+    q = query
+  ) => {
     setLoading(true);
     try {
-      const res = await http.get("/admin/users");
-      setUsers(res.data);
+      const res = await http.get("/admin/users", {
+        params: { page, page_size: pageSize, q: q || undefined },
+      });
+      setUsers(res.data.users);
+      setPagination({ current: res.data.page, pageSize: res.data.page_size, total: res.data.total });
     } catch (err) {
       console.error(err);
       message.error("Failed to load users");
@@ -54,6 +71,16 @@ export default function UserManagementPage() {
     fetchUsers();
   }, []);
 
+  const handleSearch = (value) => {
+    const q = value.trim();
+    setQuery(q);
+    fetchUsers(1, pagination.pageSize, q);
+  };
+
+  const handleTableChange = (next) => {
+    fetchUsers(next.current, next.pageSize);
+  };
+
   // -------- Create user modal -------- //
   const openCreateModal = () => {
     setFormMode("create");
@@ -163,6 +190,31 @@ export default function UserManagementPage() {
     }
   };
 
+  // -------- Bulk import (CSV) -------- //
+  // คอลัมน์: username,password,full_name,email,phone,role,is_active,is_approver
+  const handleImportFile = async (e) => {
+    const file = e.target.files?.[0];
+    e.target.value = "";
+    if (!file) return;
+
+    const formData = new FormData();
+    formData.append("file", file);
+    setImporting(true);
+    try {
+      const res = await http.post("/admin/users/import", formData, {
+        headers: { "Content-Type": "multipart/form-data" },
+        timeout: 0, // hash password หลายร้อยคนใช้เวลานานกว่า timeout ปกติ
+      });
+      setImportResult(res.data);
+      fetchUsers();
+    } catch (err) {
+      console.error(err);
+      message.error(err?.response?.data?.message || "Failed to import users");
+    } finally {
+      setImporting(false);
+    }
+  };
+
   const columns = [
     { title: "Username", dataIndex: "username" },
     { title: "Full Name", dataIndex: "full_name" },
@@ -219,12 +271,41 @@ export default function UserManagementPage() {
     <Card
       title="User Management"
       extra={
-        <Button type="primary" icon={<PlusOutlined />} onClick={openCreateModal}>
-          Add User
-        </Button>
+        <Space>
+          <input
+            ref={importInput}
+            type="file"
+            accept=".csv,text/csv"
+            style={{ display: "none" }}
+            onChange={handleImportFile}
+          />
+          <Button
+            icon={<UploadOutlined />}
+            loading={importing}
+            onClick={() => importInput.current?.click()}
+          >
+            Import CSV
+          </Button>
+          <Button type="primary" icon={<PlusOutlined />} onClick={openCreateModal}>
+            Add User
+          </Button>
+        </Space>
       }
     >
-      <Table rowKey="id" dataSource={users} columns={columns} loading={loading} />
+      <Input.Search
+        placeholder="Search username / name / email"
+        allowClear
+        onSearch={handleSearch}
+        style={{ width: 320, marginBottom: 16 }}
+      />
+      <Table
+        rowKey="id"
+        dataSource={users}
+        columns={columns}
+        loading={loading}
+        pagination={{ ...pagination, showSizeChanger: true, showTotal: (total) => `${total} users` }}
+        onChange={handleTableChange}
+      />
 
       {/* Create/Edit User Modal */}
       <Modal
@@ -265,6 +346,32 @@ export default function UserManagementPage() {
         </Form>
       </Modal>
 
+      {/* Import Result Modal */}
+      <Modal
+        open={!!importResult}
+        title={
+          importResult
+            ? `Import: ${importResult.created} created, ${importResult.failed} failed`
+            : "Import"
+        }
+        onOk={() => setImportResult(null)}
+        onCancel={() => setImportResult(null)}
+        cancelButtonProps={{ style: { display: "none" } }}
+        width={640}
+      >
+        <Table
+          size="small"
+          rowKey="row"
+          pagination={{ pageSize: 10 }}
+          dataSource={(importResult?.results || []).filter((r) => r.status === "error")}
+          columns={[
+            { title: "Row", dataIndex: "row", width: 70 },
+            { title: "Username", dataIndex: "username" },
+            { title: "Error", dataIndex: "message" },
+          ]}
+        />
+      </Modal>
+
       {/* Reset Password Modal */}
       <Modal
         open={pwdVisible}